@@ -0,0 +1,98 @@
+"""
+Micro-benchmark of the workout aggregation: vectorized engine vs. the previous per-group implementation.
+
+    python benchmarks/bench_aggregation.py --scales 10 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Make the app package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from app.data_collection import compute_workout_aggregates  # noqa: E402
+
+# Path to the enriched workout data
+enriched_workout_data = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'data/current/enriched_workout_data.csv')
+
+
+def legacy_workout_aggregates(enriched_workouts: pd.DataFrame) -> [pd.DataFrame, pd.DataFrame]:
+    # Previous implementation, with a Python callback per (DATE, WORKOUT, EXERCISE) group
+    workout_day_exercises = enriched_workouts \
+        .groupby(["DATE", "WORKOUT", "EXERCISE"], sort=False) \
+        .agg(Type=("Type", "first"),
+             BodyPart=("BodyPart", "first"),
+             Equipment=("Equipment", "first"),
+             Level=("Level", "first"),
+             Rating=("Rating", "first"),
+             NB_SETS=("SET", len),
+             AVERAGE_REPS=("NB_REPS", "mean"),
+             AVERAGE_WEIGHT=("WEIGHT", lambda x: np.average(x, weights=enriched_workouts.loc[x.index, "NB_REPS"])),
+             MAX_WEIGHT=("WEIGHT", "max")) \
+        .reset_index()
+
+    workout_days = workout_day_exercises \
+        .groupby(["DATE", "WORKOUT"], sort=False) \
+        .agg(NB_EXERCISES=("EXERCISE", len),
+             NB_SETS=("NB_SETS", "sum")) \
+        .reset_index()
+
+    return workout_day_exercises, workout_days
+
+
+def scale_workouts(enriched_workouts: pd.DataFrame, scale: int) -> pd.DataFrame:
+    # Repeat the history `scale` times, shifting the dates so that every copy has its own groups
+    dates = pd.to_datetime(enriched_workouts["DATE"])
+    span = (dates.max() - dates.min()).days + 1
+    copies = []
+    for i in range(scale):
+        copy = enriched_workouts.copy()
+        copy["DATE"] = (dates + pd.Timedelta(days=i * span)).dt.strftime("%Y-%m-%d")
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_call(func, *args, repeat: int = 3) -> [float, tuple]:
+    # Best wall time over `repeat` runs
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    enriched_workouts = pd.read_csv(enriched_workout_data, header=0)
+
+    print(f"{'scale':>6} {'rows':>10} {'groups':>8} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for scale in [1] + args.scales:
+        data = scale_workouts(enriched_workouts, scale)
+
+        # Time both implementations, the legacy one only once at large scales
+        legacy_time, (legacy_exercises, legacy_days) = time_call(legacy_workout_aggregates, data,
+                                                                  repeat=args.repeat if scale < 1000 else 1)
+        vectorized_time, (exercises, days) = time_call(compute_workout_aggregates, data, repeat=args.repeat)
+
+        # Both implementations must produce the same tables
+        pd.testing.assert_frame_equal(exercises, legacy_exercises)
+        pd.testing.assert_frame_equal(days, legacy_days)
+
+        print(f"{scale:>6} {len(data):>10} {len(exercises):>8} {legacy_time:>11.3f} {vectorized_time:>15.3f} "
+              f"{legacy_time / vectorized_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
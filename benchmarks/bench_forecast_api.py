@@ -0,0 +1,149 @@
+"""
+Load test of the /api/forecast endpoint, served in-process by a threaded server, under concurrent clients.
+
+The endpoint reads the workout_perf.csv history and an LSTM model per exercise: a model of the training
+architecture is fitted once on a synthetic series, exported to NumPy and copied for each exercise. Each client
+sends requests for random exercises and horizons, and the endpoint is measured without micro-batching nor cache,
+with micro-batching, and with both. The p50/p99 latency, the throughput and the number of predictions run by the
+models are reported for each configuration.
+
+    python benchmarks/bench_forecast_api.py --clients 16 --requests 100 --exercises 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+# Make the app package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import app.app as app_module  # noqa: E402
+from app.forecast_service import ForecastService  # noqa: E402
+from app.forecasters import forecaster_path  # noqa: E402
+from app.model_registry import ModelRegistry  # noqa: E402
+from app.lstm_engine import export_lstm_model, lstm_bundle_path  # noqa: E402
+from app.series_store import SeriesStore  # noqa: E402
+from app.storage import read_table  # noqa: E402
+
+# Path to the performance data
+workout_perf = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data/current/workout_perf.csv')
+
+# Configurations of the service: batching window (seconds) and cache size
+CONFIGURATIONS = {
+    "no batching, no cache": {"window": 0.0, "cache_size": 0},
+    "batching": {"window": 0.005, "cache_size": 0},
+    "batching + cache": {"window": 0.005, "cache_size": 1024},
+}
+
+
+def fit_model(model_path: str) -> None:
+    # Fit a model of the training architecture on a noisy trend, and export it
+    from app.forecasters import LSTMForecaster
+
+    os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+    warnings.filterwarnings('ignore')
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, 40, dtype=np.float32)
+    y = (0.2 + 0.6 * x + rng.normal(0, 0.02, size=40)).astype(np.float32)
+    forecaster = LSTMForecaster()
+    forecaster.fit(x[:32], y[:32], x[32:], y[32:])
+    forecaster.save(model_path)
+    export_lstm_model(model_path)
+
+
+def prepare(tmp_dir: str) -> list:
+    # Data directory with the performance history, and models directory with a model per exercise
+    os.makedirs(os.path.join(tmp_dir, 'data/current'))
+    os.makedirs(os.path.join(tmp_dir, 'models/current'))
+    shutil.copy(workout_perf, os.path.join(tmp_dir, 'data/current/workout_perf.csv'))
+    SeriesStore.build(read_table(workout_perf)).save(os.path.join(tmp_dir, 'data/current/workout_series.npz'))
+
+    # Fit in a fresh process, so that TensorFlow is not loaded by the server
+    model_path = os.path.join(tmp_dir, 'model.h5')
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        pool.apply(fit_model, (model_path,))
+
+    exercises = sorted(read_table(workout_perf)['EXERCISE'].unique())
+    for exo in exercises:
+        exo_path = forecaster_path(os.path.join(tmp_dir, 'models'), exo, 'lstm')
+        shutil.copy2(model_path, exo_path)
+        shutil.copy2(lstm_bundle_path(model_path), lstm_bundle_path(exo_path))
+    return exercises
+
+
+def run_clients(url: str, exercises: list, horizons: list, clients: int, n_requests: int) -> dict:
+    # Each client sends its requests one after the other, on its own connection
+    def client(seed: int) -> list:
+        rng = np.random.default_rng(seed)
+        latencies = []
+        with requests.Session() as session:
+            for _ in range(n_requests):
+                exo, weeks = exercises[rng.integers(len(exercises))], horizons[rng.integers(len(horizons))]
+                start = time.perf_counter()
+                response = session.get(f"{url}/api/forecast/{exo}", params={'weeks': weeks})
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        latencies = np.concatenate(list(executor.map(client, range(clients))))
+    elapsed = time.perf_counter() - start
+    return {"p50": float(np.percentile(latencies, 50)), "p99": float(np.percentile(latencies, 99)),
+            "throughput": len(latencies) / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[4, 12, 26, 52])
+    parser.add_argument("--exercises", type=int, default=None, help="Number of exercises requested, all if unset")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        exercises = prepare(tmp_dir)
+        app_module.data_dir = os.path.join(tmp_dir, 'data')
+        app_module.models_dir = os.path.join(tmp_dir, 'models')
+
+        # The registry keeps the models of all the exercises, and the requests are not logged
+        registry = ModelRegistry(max_models=len(exercises))
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        # Warm up the registry with the models of all the exercises
+        app_module.forecast_service = ForecastService(registry=registry)
+        run_clients(url, exercises, args.horizons, 1, len(exercises))
+
+        # Requests for a few popular exercises share their models more often
+        requested = exercises[:args.exercises]
+        results = {}
+        for name, config in CONFIGURATIONS.items():
+            app_module.forecast_service = ForecastService(registry=registry, window=config["window"],
+                                                          cache_size=config["cache_size"])
+            results[name] = run_clients(url, requested, args.horizons, args.clients, args.requests)
+            results[name]["stats"] = app_module.forecast_service.stats()
+        server.shutdown()
+
+    print(f"{len(requested)} exercises, {args.clients} clients x {args.requests} requests")
+    print(f"{'configuration':<22} {'p50 (ms)':>9} {'p99 (ms)':>9} {'req/s':>8} {'predictions':>12} {'cache hits':>11}")
+    for name, result in results.items():
+        print(f"{name:<22} {result['p50'] * 1e3:>9.2f} {result['p99'] * 1e3:>9.2f} {result['throughput']:>8.0f} "
+              f"{result['stats']['batches']:>12} {result['stats']['cache_hits']:>11}")
+
+
+if __name__ == '__main__':
+    main()
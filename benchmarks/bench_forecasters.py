@@ -0,0 +1,107 @@
+"""
+Speed/accuracy benchmark of the forecaster backends on the workout_perf.csv history.
+
+For each exercise and backend, reports the fit time, the latency of a 26-week prediction,
+the size of the saved model and the validation MSE (on normalized performances).
+
+    python benchmarks/bench_forecasters.py --backends ridge holt lstm --output forecasters.csv
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Make the app package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from app.storage import read_table  # noqa: E402
+from app.forecasting import exercise_series, min_max_range  # noqa: E402
+from app.series_store import SeriesStore  # noqa: E402
+from app.forecasters import FORECASTERS  # noqa: E402
+from app.models_training import prepare_training_data  # noqa: E402
+
+# Path to the performance data
+workout_perf = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data/current/workout_perf.csv')
+
+
+def benchmark_backend(backend: str, df_exo: pd.DataFrame, n_weeks: int, repeat: int) -> dict:
+    x_train, y_train, x_val, y_val = prepare_training_data(df_exo)
+
+    # Fit time
+    forecaster = FORECASTERS[backend]()
+    start = time.perf_counter()
+    forecaster.fit(x_train, y_train, x_val, y_val)
+    fit_time = time.perf_counter() - start
+
+    # Latency of a batched prediction of n_weeks horizons (best of repeat, after a warm-up call)
+    week = 7 / min_max_range(df_exo['DAYS'].values)
+    horizons = (x_val[-1] if len(x_val) else x_train[-1]) + week * np.arange(n_weeks, dtype=np.float32)
+    forecaster.predict(horizons)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        forecaster.predict(horizons)
+        latencies.append(time.perf_counter() - start)
+
+    # Size of the saved model
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, f"model{FORECASTERS[backend].extension}")
+        forecaster.save(file_path)
+        model_size = os.path.getsize(file_path)
+
+    return {
+        "backend": backend,
+        "rows": len(df_exo),
+        "fit_s": fit_time,
+        "predict_ms": 1000 * min(latencies),
+        "model_bytes": model_size,
+        "val_mse": float(np.mean((forecaster.predict(x_val) - y_val) ** 2)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(FORECASTERS), choices=list(FORECASTERS))
+    parser.add_argument("--min-occurrence", type=int, default=10)
+    parser.add_argument("--max-exercises", type=int, default=None)
+    parser.add_argument("--n-weeks", type=int, default=26)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None, help="CSV file receiving the results per exercise and backend")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    perf = read_table(workout_perf, columns=["DATE", "EXERCISE", "PERF"])
+
+    # Exercises with enough sessions to be trained, like in the training job
+    counts = perf["EXERCISE"].value_counts()
+    exercises = counts[counts > args.min_occurrence].index.to_list()[:args.max_exercises]
+    series = SeriesStore.build(perf)
+
+    results = []
+    for exo in exercises:
+        df_exo = exercise_series(exo=exo, series=series)
+        for backend in args.backends:
+            results.append({"exercise": exo, **benchmark_backend(backend, df_exo, args.n_weeks, args.repeat)})
+            print(f"{exo:<40} {backend:<6} fit {results[-1]['fit_s']:8.3f} s  "
+                  f"predict {results[-1]['predict_ms']:8.3f} ms  "
+                  f"size {results[-1]['model_bytes']:>10} B  val_mse {results[-1]['val_mse']:.4f}")
+
+    results = pd.DataFrame(results)
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    # Summary per backend, and the backend with the lowest validation error per exercise
+    print()
+    print(results.groupby("backend")[["fit_s", "predict_ms", "model_bytes", "val_mse"]].mean().to_string())
+    print()
+    print(results.loc[results.groupby("exercise")["val_mse"].idxmin(), ["exercise", "backend", "val_mse"]]
+          .to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Inference benchmark of the LSTM models: Keras (model.predict_on_batch) vs. the NumPy export run by NumpyLSTM.
+
+An LSTM model of the training architecture is fitted on a synthetic series (or read from --model) and exported.
+Each engine then runs in a fresh process, which reports the time to import its modules and load the model, the
+per-call latency of a prediction for batches of several sizes (26 being the forecast horizon of the plots), and
+the growth of its peak RSS. The largest difference between the predictions of both engines is checked.
+
+    python benchmarks/bench_lstm_engine.py --batch-sizes 1 26 256 --repeat 200
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+# Make the app package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+def load_keras(model_path: str):
+    from app.forecasters import LSTMForecaster
+    return LSTMForecaster.load(model_path)
+
+
+def load_numpy(model_path: str):
+    from app.forecasters import load_forecaster
+    return load_forecaster(model_path)
+
+
+ENGINES = {
+    "keras": load_keras,
+    "numpy": load_numpy,
+}
+
+
+def measure(engine: str, model_path: str, batch_sizes: list, repeat: int) -> dict:
+    # Run in a fresh process, so that the import and RSS growth are the ones of the engine
+    os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+    warnings.filterwarnings('ignore')
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    start = time.perf_counter()
+    forecaster = ENGINES[engine](model_path)
+    load_seconds = time.perf_counter() - start
+
+    latencies, predictions = {}, None
+    for batch_size in batch_sizes:
+        x = np.linspace(0, 1.5, batch_size, dtype=np.float32)
+        forecaster.predict(x)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            forecaster.predict(x)
+            times.append(time.perf_counter() - start)
+        latencies[batch_size] = float(np.median(times))
+        predictions = forecaster.predict(x)
+
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - rss_before
+    return {"load_seconds": load_seconds, "latencies": latencies, "rss_growth": rss_growth,
+            "predictions": predictions, "tensorflow": "tensorflow" in sys.modules}
+
+
+def fit_model(model_path: str) -> None:
+    # Fit a model of the training architecture on a noisy trend
+    from app.forecasters import LSTMForecaster
+
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, 40, dtype=np.float32)
+    y = (0.2 + 0.6 * x + rng.normal(0, 0.02, size=40)).astype(np.float32)
+    forecaster = LSTMForecaster()
+    forecaster.fit(x[:32], y[:32], x[32:], y[32:])
+    forecaster.save(model_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Keras model file (.h5), fitted on a synthetic series if unset")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 26, 256])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "model.h5")
+        if args.model:
+            with open(args.model, 'rb') as src, open(model_path, 'wb') as dst:
+                dst.write(src.read())
+        else:
+            with context.Pool(1) as pool:
+                pool.apply(fit_model, (model_path,))
+
+        with context.Pool(1) as pool:
+            from app.lstm_engine import export_lstm_model
+            error = pool.apply(export_lstm_model, (model_path,))
+        print(f"Model exported, max validation error {error:.1e}")
+
+        results = {}
+        for engine in ENGINES:
+            with context.Pool(1) as pool:
+                results[engine] = pool.apply(measure, (engine, model_path, args.batch_sizes, args.repeat))
+
+    print(f"{'engine':<7} {'load (s)':>9} {'RSS growth (MB)':>16} {'TF loaded':>10} "
+          + " ".join(f"{f'batch {size} (ms)':>15}" for size in args.batch_sizes))
+    for engine, result in results.items():
+        print(f"{engine:<7} {result['load_seconds']:>9.2f} {result['rss_growth'] / 1e6:>16.0f} "
+              f"{str(result['tensorflow']):>10} "
+              + " ".join(f"{result['latencies'][size] * 1e3:>15.3f}" for size in args.batch_sizes))
+
+    # Speed-up of the NumPy engine and difference between the predictions of both engines
+    print()
+    print("speed-up: " + ", ".join(f"x{results['keras']['latencies'][size] / results['numpy']['latencies'][size]:.1f}"
+                                   f" (batch {size})" for size in args.batch_sizes))
+    print(f"max prediction difference: "
+          f"{np.max(np.abs(results['keras']['predictions'] - results['numpy']['predictions'])):.1e}")
+
+
+if __name__ == '__main__':
+    main()
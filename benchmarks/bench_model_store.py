@@ -0,0 +1,102 @@
+"""
+Versioning benchmark of the models: tar.gz archives of models/current vs. the content-addressed model store.
+
+A models directory of synthetic LSTM models (random float32 weights and their NumPy exports) is versioned over
+several training runs, each retraining a few exercises. For each run, the time to archive the directory with
+`tar -czf` (the previous implementation) and to commit it to the store is reported, with the storage used by all
+the versions so far. Then the time to restore a single model and a whole version is reported for both.
+
+    python benchmarks/bench_model_store.py --exercises 48 --model-mb 2 --runs 4 --retrained 4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Make the app package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from app.model_store import ModelStore  # noqa: E402
+
+
+def write_model(current_dir: str, exo: str, model_bytes: int, rng: np.random.Generator) -> None:
+    # Model and NumPy export of an exercise, with random weights, and its fingerprint
+    for extension in (".h5", ".lstm.npz"):
+        with open(os.path.join(current_dir, f"{exo}{extension}"), 'wb') as f:
+            f.write(rng.normal(0, 0.1, model_bytes // 4).astype(np.float32).tobytes())
+    with open(os.path.join(current_dir, f"{exo}.json"), 'w') as f:
+        f.write(f'{{"metrics": {{"val_loss": {rng.random()}}}}}')
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=48)
+    parser.add_argument("--model-mb", type=float, default=2.0, help="Size of each model file")
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--retrained", type=int, default=4, help="Exercises retrained by each run after the first")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    exercises = [f"Exercise {i}" for i in range(args.exercises)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        current_dir = os.path.join(tmp_dir, "current")
+        tar_dir = os.path.join(tmp_dir, "tar")
+        os.makedirs(current_dir)
+        os.makedirs(tar_dir)
+        store = ModelStore(os.path.join(tmp_dir, "store"))
+
+        print(f"{args.exercises} exercises, {2 * args.model_mb:.1f} MB of models each")
+        print(f"{'run':>3} {'tar (s)':>8} {'tar total (MB)':>15} {'store (s)':>10} {'store total (MB)':>17}")
+        for run in range(args.runs):
+            for exo in (exercises if run == 0 else rng.choice(exercises, args.retrained, replace=False)):
+                write_model(current_dir, exo, int(args.model_mb * 1e6), rng)
+
+            start = time.perf_counter()
+            subprocess.run(["tar", "-czf", os.path.join(tar_dir, f"models_{run}.tar.gz"), "-C", current_dir, "."],
+                           check=True)
+            tar_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.commit(current_dir)
+            store_seconds = time.perf_counter() - start
+
+            print(f"{run:>3} {tar_seconds:>8.2f} {directory_size(tar_dir) / 1e6:>15.0f} {store_seconds:>10.2f} "
+                  f"{directory_size(store.root) / 1e6:>17.0f}")
+
+        # Restore one model, then a whole version, of the first run
+        restore_dir = os.path.join(tmp_dir, "restored")
+        version = store.versions()[0]
+        results = {}
+        for scope, members, models in (("one model", [f"./{exercises[0]}.h5", f"./{exercises[0]}.lstm.npz",
+                                                       f"./{exercises[0]}.json"], [exercises[0]]),
+                                       ("whole version", [], None)):
+            shutil.rmtree(restore_dir, ignore_errors=True)
+            os.makedirs(restore_dir)
+            start = time.perf_counter()
+            subprocess.run(["tar", "-xzf", os.path.join(tar_dir, "models_0.tar.gz"), "-C", restore_dir] + members,
+                           check=True)
+            tar_seconds = time.perf_counter() - start
+
+            shutil.rmtree(restore_dir)
+            os.makedirs(restore_dir)
+            start = time.perf_counter()
+            store.restore(version, restore_dir, models=models)
+            results[scope] = (tar_seconds, time.perf_counter() - start)
+
+    print()
+    print(f"{'restore':<14} {'tar (s)':>8} {'store (s)':>10}")
+    for scope, (tar_seconds, store_seconds) in results.items():
+        print(f"{scope:<14} {tar_seconds:>8.3f} {store_seconds:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Scaling benchmark of the pipeline stages on synthetic workout histories.
+
+For each scale (number of weeks of history), generates the weekly workout files of an athlete, then times each
+stage: collection (full and incremental), catalog compilation and filtering, enrichment, aggregation, preprocessing
+and the app loaders (first page of the API, cold and cached, and the full table). The time (best of --repeat) and the peak
+memory allocated (traced in a separate run) of each stage are written to a results file named after the commit,
+which can be compared with the results of another commit.
+
+    python benchmarks/bench_pipeline.py --scales 52 520 5200
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<other commit>.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# Make the app package and the generator importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.data_collection import (collect_workout_data, fetch_exercise_data, filter_exercise_data,  # noqa: E402
+                                 enrich_workout_data, aggregate_workout_data)
+from app.data_loading import load_workout_data, query_workout_data, table_cache  # noqa: E402
+from app.exercise_catalog import catalog_cache, compile_exercise_catalog  # noqa: E402
+from app.models_training import load_and_preprocess_data  # noqa: E402
+from app.storage import read_table  # noqa: E402
+from generate_workouts import generate_workouts, load_catalog  # noqa: E402
+
+# Paths to the repository and to the exercise catalog
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+catalog_path = os.path.join(repo_dir, 'data/kaggle/megaGymDataset.csv')
+
+# Default directory of the results files
+results_dir = os.path.join(repo_dir, 'benchmarks/results')
+
+
+def git_revision() -> str:
+    # Commit of the benchmarked code, marked dirty when the tree has uncommitted changes
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=repo_dir, capture_output=True, text=True,
+                             check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_dir,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(func: Callable[[], object], repeat: int, memory: bool, setup: Callable[[], None] = None) -> Dict:
+    # Best wall time over `repeat` runs, then the peak traced memory of one more run
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def benchmark_scale(weeks: int, sessions_per_week: int, repeat: int, memory: bool, catalog) -> List[Dict]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, 'workouts')
+        data_path = os.path.join(tmp_dir, 'data')
+        output_path = os.path.join(data_path, 'current')
+        os.makedirs(output_path)
+
+        # Generate the weekly files of one athlete
+        generate_workouts(output_path=tmp_dir, athletes=1, weeks=weeks, sessions_per_week=sessions_per_week,
+                          catalog=catalog)
+        os.rename(os.path.join(tmp_dir, 'athlete_1', 'workouts'), input_path)
+
+        workout_data = collect_workout_data(input_path=input_path, output_path=output_path)
+        exercises = fetch_exercise_data(file_path=catalog_path)
+        filtered_exercises = filter_exercise_data(workout_data=workout_data, exercises=exercises,
+                                                  output_path=output_path)
+        enriched = enrich_workout_data(workout_data=workout_data, filtered_exercises=filtered_exercises,
+                                       output_path=output_path)
+        workout_data_path = os.path.join(output_path, 'workout_data.csv')
+
+        def remove_manifest():
+            # Start the incremental collection from scratch
+            for file in ('workout_manifest.json',):
+                if os.path.exists(os.path.join(output_path, file)):
+                    os.remove(os.path.join(output_path, file))
+
+        stages = [
+            ("collect (full)", lambda: collect_workout_data(input_path=input_path, output_path=output_path), None),
+            ("collect (incremental, first run)",
+             lambda: collect_workout_data(input_path=input_path, output_path=output_path, incremental=True),
+             remove_manifest),
+            ("collect (incremental, unchanged)",
+             lambda: collect_workout_data(input_path=input_path, output_path=output_path, incremental=True), None),
+            ("compile catalog",
+             lambda: compile_exercise_catalog(catalog_path, index_path=os.path.join(tmp_dir, 'catalog.index')), None),
+            ("fetch catalog (compiled)", lambda: fetch_exercise_data(catalog_path), catalog_cache.invalidate),
+            ("fetch and filter catalog",
+             lambda: filter_exercise_data(workout_data=workout_data, exercises=fetch_exercise_data(catalog_path),
+                                          output_path=output_path), None),
+            ("enrich", lambda: enrich_workout_data(workout_data=workout_data, filtered_exercises=filtered_exercises,
+                                                   output_path=output_path), None),
+            ("aggregate", lambda: aggregate_workout_data(enriched_workouts=enriched, output_path=output_path), None),
+            ("preprocess", lambda: load_and_preprocess_data(min_exo_occurrence=10, data_path=data_path), None),
+            ("read workout data", lambda: read_table(workout_data_path), None),
+            ("api first page (cold)", lambda: query_workout_data(file_path=workout_data_path, filters={}),
+             table_cache.invalidate),
+            ("api first page (cached)", lambda: query_workout_data(file_path=workout_data_path, filters={},
+                                                                   sort='WEIGHT', order='desc'), None),
+            ("load workout data (cold)", lambda: load_workout_data(file_path=workout_data_path),
+             table_cache.invalidate),
+        ]
+
+        results = []
+        for stage, func, setup in stages:
+            results.append({"stage": stage, "weeks": weeks, "rows": len(workout_data),
+                            **measure(func, repeat=repeat, memory=memory, setup=setup)})
+            peak = results[-1]["peak_bytes"]
+            print(f"{weeks:>6} {len(workout_data):>9} {stage:<34} {results[-1]['seconds']:>9.4f} "
+                  f"{peak / 1e6 if peak is not None else float('nan'):>10.1f}")
+        return results
+
+
+def compare(results: List[Dict], other_path: str) -> None:
+    # Ratio of the time and memory of each stage to the results of another commit
+    with open(other_path, 'r') as f:
+        other = json.load(f)
+    others = {(result["stage"], result["weeks"]): result for result in other["results"]}
+
+    print()
+    print(f"Compared with {other['revision']} ({other['date']}): time and memory ratios (< 1 is better)")
+    for result in results:
+        previous = others.get((result["stage"], result["weeks"]))
+        if previous is None:
+            continue
+        time_ratio = result["seconds"] / previous["seconds"] if previous["seconds"] else float("nan")
+        memory_ratio = result["peak_bytes"] / previous["peak_bytes"] \
+            if result["peak_bytes"] and previous.get("peak_bytes") else float("nan")
+        print(f"{result['weeks']:>6} {result['stage']:<34} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[52, 520, 5200], help="Weeks of history")
+    parser.add_argument("--sessions-per-week", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced memory runs")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Results file of another commit")
+    args = parser.parse_args()
+
+    # Silence the stage logs, only keeping the errors
+    logging.disable(logging.INFO)
+    warnings.filterwarnings('ignore')
+    catalog = load_catalog(catalog_path)
+
+    print(f"{'weeks':>6} {'rows':>9} {'stage':<34} {'time (s)':>9} {'peak (MB)':>10}")
+    results = []
+    for weeks in args.scales:
+        results += benchmark_scale(weeks=weeks, sessions_per_week=args.sessions_per_week, repeat=args.repeat,
+                                   memory=not args.no_memory, catalog=catalog)
+
+    # Save the results, keyed by the commit of the benchmarked code
+    revision = git_revision()
+    output = args.output or os.path.join(results_dir, f"{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({"revision": revision, "date": datetime.now().isoformat(), "python": platform.python_version(),
+                   "machine": platform.machine(), "cpus": os.cpu_count(), "results": results}, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
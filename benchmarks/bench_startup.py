@@ -0,0 +1,62 @@
+"""
+Startup benchmark of the entry points: cold import time and memory of the web process and of the scheduler,
+each measured in a fresh interpreter.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Path to the sources of the app package
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Imports done by each entry point of run.py, and by the jobs once they run
+ENTRY_POINTS = {
+    "web": "from app.app import app",
+    "scheduler": "import schedule; from app.jobs import data_pipeline_stage",
+    "jobs (loaded)": "from app.data_collection import collect_workout_data; "
+                     "from app.models_training import train_models; "
+                     "from app.data_analytics import plot_predicted_volume",
+}
+
+# Heavy modules whose import is reported
+HEAVY_MODULES = ["pandas", "pyarrow", "sklearn", "matplotlib", "plotly", "tensorflow", "keras"]
+
+# Code run in the fresh interpreter, printing the import time, peak RSS and heavy modules loaded
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"time": elapsed,
+                   "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+                   "modules": [m for m in {heavy_modules} if m in sys.modules]}}))
+"""
+
+
+def probe(imports: str) -> dict:
+    # Run the imports in a fresh interpreter, from the directory run.py is started from
+    code = PROBE.format(imports=imports, heavy_modules=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], cwd=src_dir, capture_output=True, text=True, check=True,
+                            env={**os.environ, "TF_CPP_MIN_LOG_LEVEL": "3"})
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entry-points", nargs="+", default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<14} {'first (s)':>10} {'best (s)':>9} {'peak RSS (MB)':>14}  heavy modules")
+    for entry_point in args.entry_points:
+        runs = [probe(ENTRY_POINTS[entry_point]) for _ in range(args.repeat)]
+        print(f"{entry_point:<14} {runs[0]['time']:>10.2f} {min(run['time'] for run in runs):>9.2f} "
+              f"{max(run['rss'] for run in runs) / 1e6:>14.0f}  {', '.join(runs[0]['modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
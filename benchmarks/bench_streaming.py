@@ -0,0 +1,125 @@
+"""
+Memory benchmark of the data ingestion: batch mode (collect, filter, enrich and aggregate whole-history tables)
+vs. streaming mode (stream_workout_data, by chunks of --chunk-rows rows), on synthetic histories of several sizes.
+
+Each mode runs in a fresh process, which reports its wall time, the peak memory traced by tracemalloc and the growth
+of its peak RSS during the run. The peak memory of the batch mode grows with the history, the one of the streaming
+mode is bounded by the chunk size. The tables written by both modes are checked to be identical.
+
+    python benchmarks/bench_streaming.py --scales 52 520 5200 --chunk-rows 50000
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+# Make the app package and the generator importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Path to the exercise catalog
+catalog_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data/kaggle/megaGymDataset.csv')
+
+# Tables written by both modes
+TABLES = ['workout_data', 'workout_exercises', 'enriched_workout_data', 'workout_day_exercises', 'workout_days']
+
+
+def run_batch(input_path: str, output_path: str, chunk_rows: int) -> None:
+    from app.data_collection import (collect_workout_data, fetch_exercise_data, filter_exercise_data,
+                                     enrich_workout_data, aggregate_workout_data)
+
+    workout_data = collect_workout_data(input_path=input_path, output_path=output_path)
+    filtered_exercises = filter_exercise_data(workout_data=workout_data, exercises=fetch_exercise_data(catalog_path),
+                                              output_path=output_path)
+    enriched_workouts = enrich_workout_data(workout_data=workout_data, filtered_exercises=filtered_exercises,
+                                            output_path=output_path)
+    aggregate_workout_data(enriched_workouts=enriched_workouts, output_path=output_path)
+
+
+def run_streaming(input_path: str, output_path: str, chunk_rows: int) -> None:
+    from app.data_collection import fetch_exercise_data, stream_workout_data
+
+    if stream_workout_data(input_path=input_path, exercises=fetch_exercise_data(catalog_path),
+                           output_path=output_path, chunk_rows=chunk_rows) is None:
+        raise RuntimeError("Streaming ingestion failed, see logs/data_collection.log")
+
+
+MODES = {
+    "batch": run_batch,
+    "streaming": run_streaming,
+}
+
+
+def measure(mode: str, input_path: str, output_path: str, chunk_rows: int) -> dict:
+    # Run in a fresh process, once the modules are imported, so that the RSS growth is the one of the run
+    logging.disable(logging.INFO)
+    warnings.filterwarnings('ignore')
+    import app.data_collection  # noqa: F401
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    tracemalloc.start()
+    start = time.perf_counter()
+    MODES[mode](input_path=input_path, output_path=output_path, chunk_rows=chunk_rows)
+    seconds = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - rss_before
+    return {"seconds": seconds, "traced_peak": traced_peak, "rss_growth": rss_growth}
+
+
+def check_tables(batch_path: str, streaming_path: str) -> None:
+    # Both modes must write the same tables
+    import pandas as pd
+    from app.storage import read_table
+
+    for table in TABLES:
+        pd.testing.assert_frame_equal(read_table(os.path.join(streaming_path, f"{table}.csv")),
+                                      read_table(os.path.join(batch_path, f"{table}.csv")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[52, 520, 5200], help="Weeks of history")
+    parser.add_argument("--sessions-per-week", type=int, default=4)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    from generate_workouts import generate_workouts, load_catalog
+    catalog = load_catalog(catalog_path)
+    context = multiprocessing.get_context("spawn")
+
+    print(f"{'weeks':>6} {'rows':>9} {'mode':<10} {'time (s)':>9} {'traced peak (MB)':>17} {'RSS growth (MB)':>16}")
+    peaks = {mode: [] for mode in MODES}
+    for weeks in args.scales:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rows = generate_workouts(output_path=tmp_dir, athletes=1, weeks=weeks,
+                                     sessions_per_week=args.sessions_per_week, catalog=catalog)["athlete_1"]
+            input_path = os.path.join(tmp_dir, 'athlete_1', 'workouts')
+
+            for mode in MODES:
+                output_path = os.path.join(tmp_dir, mode)
+                os.makedirs(output_path)
+                with context.Pool(1) as pool:
+                    result = pool.apply(measure, (mode, input_path, output_path, args.chunk_rows))
+                peaks[mode].append(result["traced_peak"])
+                print(f"{weeks:>6} {rows:>9} {mode:<10} {result['seconds']:>9.2f} "
+                      f"{result['traced_peak'] / 1e6:>17.1f} {result['rss_growth'] / 1e6:>16.1f}")
+
+            check_tables(os.path.join(tmp_dir, 'batch'), os.path.join(tmp_dir, 'streaming'))
+
+    # Growth of the peak memory of each mode from the smallest to the largest history
+    print()
+    for mode, mode_peaks in peaks.items():
+        print(f"{mode}: traced peak x{mode_peaks[-1] / mode_peaks[0]:.1f} for x{args.scales[-1] / args.scales[0]:.0f} "
+              f"weeks of history")
+
+
+if __name__ == '__main__':
+    main()
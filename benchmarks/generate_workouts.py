@@ -0,0 +1,149 @@
+"""
+Synthetic workout generator: weekly workout files with the schema of data/workouts/*.csv
+(DATE, WORKOUT, EXERCISE, MUSCLE, SET, NB_REPS, WEIGHT), with exercises drawn from the megaGymDataset.csv catalog.
+
+Each athlete follows a split of workouts (e.g. "Legs", "Back / Biceps"), each with its own exercises, and progresses
+on each exercise over the weeks. Athletes are written to {output}/{athlete}/workouts/workout_{sunday}.csv, the layout
+of the athlete partitions of data/athletes, so that they can be processed by the jobs:
+
+    python benchmarks/generate_workouts.py --output data/athletes --athletes 2 --weeks 520
+"""
+import argparse
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Path to the exercise catalog
+catalog_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data/kaggle/megaGymDataset.csv')
+
+# Muscle group (MUSCLE column) of each body part of the catalog
+MUSCLES = {
+    "Abdominals": "Abs", "Quadriceps": "Legs", "Hamstrings": "Legs", "Glutes": "Legs", "Calves": "Legs",
+    "Abductors": "Legs", "Adductors": "Legs", "Shoulders": "Shoulders", "Traps": "Shoulders", "Chest": "Chest",
+    "Biceps": "Biceps", "Forearms": "Biceps", "Triceps": "Triceps", "Lats": "Back", "Middle Back": "Back",
+    "Lower Back": "Back",
+}
+
+# Workouts of the splits followed by the athletes, named by their muscle groups like the real workouts
+SPLITS = [
+    ["Legs", "Back / Biceps", "Chest / Shoulders / Triceps"],
+    ["Legs", "Back / Shoulders", "Chest / Shoulders", "Arms"],
+    ["Legs", "Back / Shoulders / Biceps", "Chest / Shoulders / Triceps", "Biceps / Abs"],
+]
+
+
+def load_catalog(file_path: str = catalog_path) -> Dict[str, List[str]]:
+    """
+    Names of the strength exercises of the catalog, by muscle group.
+    """
+    catalog = pd.read_csv(file_path, header=0, index_col=0)
+    catalog = catalog[catalog["Type"].isin(["Strength", "Powerlifting"]) & catalog["BodyPart"].isin(MUSCLES)]
+    catalog = catalog.drop_duplicates(subset="Title")
+    muscles = catalog["BodyPart"].map(MUSCLES)
+    return {muscle: sorted(titles) for muscle, titles in catalog.groupby(muscles)["Title"]}
+
+
+def _athlete_program(rng: np.random.Generator, catalog: Dict[str, List[str]]) -> Dict[str, list]:
+    # Exercises of each workout of the athlete's split, with their starting weight and weekly progression
+    program = {}
+    for workout in SPLITS[rng.integers(len(SPLITS))]:
+        exercises = []
+        muscles = workout.split(" / ")
+        for i in range(rng.integers(4, 8)):
+            muscle = muscles[i % len(muscles)]
+            exercise = catalog[muscle][rng.integers(len(catalog[muscle]))]
+            if exercise not in [e[0] for e in exercises]:
+                exercises.append((exercise, muscle, float(rng.uniform(10, 80)), float(rng.uniform(0.05, 0.5))))
+        program[workout] = exercises
+    return program
+
+
+def generate_athlete(rng: np.random.Generator, catalog: Dict[str, List[str]], weeks: int, start: date,
+                     sessions_per_week: int = 3, max_sets: int = 4) -> pd.DataFrame:
+    """
+    Sets of an athlete over the weeks, following its split from the Monday of start.
+    """
+    program = _athlete_program(rng, catalog)
+    workouts = list(program)
+    monday = start - timedelta(days=start.weekday())
+    columns = {column: [] for column in ["DATE", "WORKOUT", "EXERCISE", "MUSCLE", "SET", "NB_REPS", "WEIGHT"]}
+
+    session = 0
+    for week in range(weeks):
+        # Train on sessions_per_week distinct days of the week, rotating through the split
+        days = np.sort(rng.choice(7, size=min(sessions_per_week, 7), replace=False))
+        for day in days:
+            workout = workouts[session % len(workouts)]
+            session += 1
+            session_date = (monday + timedelta(weeks=week, days=int(day))).isoformat()
+            for exercise, muscle, base_weight, progression in program[workout]:
+                # Weight progresses over the weeks with some noise, rounded to the closest plate
+                weight = base_weight + progression * week + rng.normal(0, 2.5)
+                for set_number in range(1, rng.integers(2, max_sets + 1) + 1):
+                    columns["DATE"].append(session_date)
+                    columns["WORKOUT"].append(workout)
+                    columns["EXERCISE"].append(exercise)
+                    columns["MUSCLE"].append(muscle)
+                    columns["SET"].append(set_number)
+                    columns["NB_REPS"].append(int(rng.integers(6, 13)))
+                    columns["WEIGHT"].append(max(2.5, round(weight / 2.5) * 2.5))
+
+    return pd.DataFrame(columns)
+
+
+def write_weekly_files(sets: pd.DataFrame, output_path: str) -> List[str]:
+    """
+    Write the sets in one workout_{sunday}.csv file per week, like the exported workout files.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    dates = pd.to_datetime(sets["DATE"])
+    sundays = (dates + pd.to_timedelta(6 - dates.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d")
+    files = []
+    for sunday, week_sets in sets.groupby(sundays, sort=True):
+        file_path = os.path.join(output_path, f"workout_{sunday}.csv")
+        week_sets.to_csv(file_path, index=False)
+        files.append(file_path)
+    return files
+
+
+def generate_workouts(output_path: str, athletes: int = 1, weeks: int = 52, sessions_per_week: int = 3,
+                      max_sets: int = 4, start: date = date(2020, 1, 6), seed: int = 0,
+                      catalog: Optional[Dict[str, List[str]]] = None) -> Dict[str, int]:
+    """
+    Generate the weekly workout files of each athlete in {output_path}/{athlete}/workouts, and return their number
+    of sets.
+    """
+    catalog = catalog or load_catalog()
+    rng = np.random.default_rng(seed)
+    nb_sets = {}
+    for i in range(athletes):
+        athlete = f"athlete_{i + 1}"
+        sets = generate_athlete(rng, catalog, weeks=weeks, start=start, sessions_per_week=sessions_per_week,
+                                max_sets=max_sets)
+        write_weekly_files(sets, os.path.join(output_path, athlete, 'workouts'))
+        nb_sets[athlete] = len(sets)
+    return nb_sets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--athletes", type=int, default=1)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--sessions-per-week", type=int, default=3)
+    parser.add_argument("--max-sets", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    nb_sets = generate_workouts(output_path=args.output, athletes=args.athletes, weeks=args.weeks,
+                                sessions_per_week=args.sessions_per_week, max_sets=args.max_sets, seed=args.seed)
+    for athlete, count in nb_sets.items():
+        print(f"{athlete}: {count} sets over {args.weeks} weeks")
+
+
+if __name__ == '__main__':
+    main()
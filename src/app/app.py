@@ -1,16 +1,28 @@
-from flask import Flask, render_template, url_for
+from flask import Flask, Response, abort, jsonify, render_template, request, send_from_directory, url_for
+from importlib import metadata, util
+import numpy as np
 import os
 import glob
 
-from .data_loading import load_workout_data, load_filtered_exercise_data
+from .instrumentation import load_records, prometheus_metrics
+from .paths import DEFAULT_ATHLETE, AthletePaths, athlete_paths, check_athlete, list_athletes
+from .data_loading import (DEFAULT_PAGE_SIZE, EXERCISE_FILTERS, WORKOUT_FILTERS, query_filtered_exercise_data,
+                           query_workout_data)
+from .forecast_service import DEFAULT_FORECAST_WEEKS, forecast_service
 
 
 # Path to the data directory
 data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
 
+# Path to the models directory
+models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'models')
+
 # Path to the static directory
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 
+# Path to the plotly.js bundle shipped with the plotly package, found without importing plotly
+plotly_dir = os.path.join(util.find_spec('plotly').submodule_search_locations[0], 'package_data')
+
 app = Flask(__name__)
 
 
@@ -19,27 +31,133 @@ def index():
     return render_template('index.html')
 
 
+def _athlete_paths() -> AthletePaths:
+    # Partition of the athlete of the request, the default athlete when not given
+    athlete = request.args.get('athlete') or DEFAULT_ATHLETE
+    try:
+        check_athlete(athlete)
+    except ValueError as e:
+        abort(400, description=str(e))
+    if athlete != DEFAULT_ATHLETE and athlete not in list_athletes(data_dir):
+        abort(404, description=f"Unknown athlete '{athlete}'")
+    return athlete_paths(athlete, data_dir=data_dir, models_dir=models_dir, static_dir=static_dir)
+
+
+def _athlete_args(paths: AthletePaths) -> dict:
+    # Query parameters keeping the athlete in the links of the pages
+    return {} if paths.athlete == DEFAULT_ATHLETE else {'athlete': paths.athlete}
+
+
+def _query_args(filter_params: dict) -> dict:
+    # Read the pagination, sorting and filtering parameters of a table query
+    args = request.args
+    return {
+        'filters': {param: args[param] for param in filter_params if args.get(param)},
+        'sort': args.get('sort') or None,
+        'order': args.get('order', 'asc'),
+        'page': args.get('page', 1, type=int),
+        'page_size': args.get('page_size', DEFAULT_PAGE_SIZE, type=int)
+    }
+
+
 @app.route('/workouts')
 def workouts():
-    workouts = load_workout_data(file_path=os.path.join(data_dir, 'current/workout_data.csv'))
-    return render_template('workouts.html', workouts=workouts)
+    # Render the first page, the next ones are fetched from the API
+    paths = _athlete_paths()
+    workouts = query_workout_data(file_path=os.path.join(paths.data_dir, 'current/workout_data.csv'), filters={})
+    return render_template('workouts.html', workouts=workouts['rows'], total=workouts['total'],
+                           page_size=DEFAULT_PAGE_SIZE, athlete_args=_athlete_args(paths))
 
 
 @app.route('/my-exercises')
 def my_exercises():
-    my_exercises = load_filtered_exercise_data(file_path=os.path.join(data_dir, 'current/workout_exercises.csv'))
-    return render_template('my-exercises.html', my_exercises=my_exercises)
+    # Render the first page, the next ones are fetched from the API
+    paths = _athlete_paths()
+    my_exercises = query_filtered_exercise_data(
+        file_path=os.path.join(paths.data_dir, 'current/workout_exercises.csv'), filters={})
+    return render_template('my-exercises.html', my_exercises=my_exercises['rows'], total=my_exercises['total'],
+                           page_size=DEFAULT_PAGE_SIZE, athlete_args=_athlete_args(paths))
+
+
+@app.route('/api/workouts')
+def api_workouts():
+    paths = _athlete_paths()
+    try:
+        workouts = query_workout_data(file_path=os.path.join(paths.data_dir, 'current/workout_data.csv'),
+                                      date_from=request.args.get('date_from') or None,
+                                      date_to=request.args.get('date_to') or None,
+                                      **_query_args(WORKOUT_FILTERS))
+        return jsonify(workouts)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/my-exercises')
+def api_my_exercises():
+    paths = _athlete_paths()
+    try:
+        my_exercises = query_filtered_exercise_data(
+            file_path=os.path.join(paths.data_dir, 'current/workout_exercises.csv'), **_query_args(EXERCISE_FILTERS))
+        return jsonify(my_exercises)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _plot_url(paths: AthletePaths, name: str) -> dict:
+    # Serve the JSON spec of a plot, or its standalone HTML page if it was saved in this format
+    plots_dir = os.path.relpath(os.path.join(paths.static_dir, 'plots'), static_dir).replace(os.sep, '/')
+    if os.path.exists(os.path.join(paths.static_dir, f'plots/{name}.json')):
+        return {'format': 'json', 'url': url_for('static', filename=f'{plots_dir}/{name}.json')}
+    return {'format': 'html', 'url': url_for('static', filename=f'{plots_dir}/{name}.html')}
 
 
 @app.route('/analytics')
 def analytics():
-    predicted_volume_files = glob.glob(f"{static_dir}/plots/predicted_volume/*.html")
-    exercises = sorted(os.path.basename(file).replace('.html', '') for file in predicted_volume_files)
+    paths = _athlete_paths()
+    predicted_volume_files = glob.glob(f"{paths.static_dir}/plots/predicted_volume/*.json") \
+        + glob.glob(f"{paths.static_dir}/plots/predicted_volume/*.html")
+    exercises = sorted({os.path.splitext(os.path.basename(file))[0] for file in predicted_volume_files})
     plot_paths = {
         'exercises': exercises,
-        'predicted_volume': [url_for('static', filename=f'plots/predicted_volume/{exercise}.html') for exercise in exercises],
-        'distribution_workout_types': url_for('static', filename='plots/distribution_workout_types.html'),
-        'distribution_muscle_groups': url_for('static', filename='plots/distribution_muscle_groups.html'),
-        'weight_reps_over_time': url_for('static', filename='plots/weight_reps_over_time.html')
+        'predicted_volume': {exercise: _plot_url(paths, f'predicted_volume/{exercise}') for exercise in exercises},
+        'distribution_workout_types': _plot_url(paths, 'distribution_workout_types'),
+        'distribution_muscle_groups': _plot_url(paths, 'distribution_muscle_groups'),
+        'weight_reps_over_time': _plot_url(paths, 'weight_reps_over_time')
     }
-    return render_template('analytics.html', plot_paths=plot_paths)
+    return render_template('analytics.html', plot_paths=plot_paths, athlete_args=_athlete_args(paths),
+                           plotly_url=url_for('plotly_js', v=metadata.version('plotly')))
+
+
+@app.route('/api/forecast/<exercise>')
+def api_forecast(exercise):
+    # Forecast of an exercise for a custom horizon, from the current model of the exercise
+    paths = _athlete_paths()
+    weeks = request.args.get('weeks', DEFAULT_FORECAST_WEEKS, type=int)
+    try:
+        forecast = forecast_service.forecast(exo=exercise, n_weeks=weeks, data_path=paths.data_dir,
+                                             models_path=paths.models_dir)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'exercise': exercise,
+                    'dates': np.datetime_as_string(forecast.dates, unit='D').tolist(),
+                    'perf': np.asarray(forecast.perf, dtype=float).tolist()})
+
+
+@app.route('/api/athletes')
+def api_athletes():
+    # Athletes with workout data, each one browsed with the athlete parameter of the pages
+    return jsonify({'athletes': list_athletes(data_dir), 'default': DEFAULT_ATHLETE})
+
+
+@app.route('/plotly.min.js')
+def plotly_js():
+    # The bundle is versioned by its URL, so browsers can cache it for a year
+    return send_from_directory(plotly_dir, 'plotly.min.js', max_age=365 * 24 * 3600)
+
+
+@app.route('/metrics')
+def metrics():
+    # Timings, memory and rows of the stages of the recent pipeline runs, in the Prometheus text format
+    return Response(prometheus_metrics(load_records()), mimetype='text/plain; version=0.0.4')
@@ -1,20 +1,126 @@
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-import numpy as np
-import tensorflow as tf
-from sklearn.preprocessing import MinMaxScaler
 import os
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional
 
 from .logger_config import configure_logger
+from .instrumentation import instrumented
+from .storage import read_table
+from .forecasting import exercise_series, forecast_exercises
+from .forecasters import list_forecasters
+from .series_store import SeriesStore, load_series_store
 
 data_analytics_logger = configure_logger(name="data_analytics")
 
+# Number of plots generated concurrently by generate_plots
+MAX_PLOT_WORKERS = 4
 
-def plot_predicted_volume(models_path: str, data_path: str, static_path: str, n_weeks: int) -> bool:
+# Format of the saved plots: "json" (figure spec, drawn by the app with a shared plotly.js) or "html" (standalone page)
+PLOT_FORMAT = "json"
+
+
+def save_figure(fig: go.Figure, file_path: str, output_format: Optional[str] = None) -> None:
+    """
+    Save a figure under file_path (without extension) as a JSON spec or a standalone HTML page.
+    """
+    output_format = output_format or PLOT_FORMAT
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    if output_format == "json":
+        fig.write_json(f"{file_path}.json")
+    elif output_format == "html":
+        fig.write_html(f"{file_path}.html")
+    else:
+        raise ValueError(f"Unknown plot format '{output_format}'")
+
+    # Remove the plot saved in the other format, so that the app does not serve a stale one
+    for other_format in ("json", "html"):
+        if other_format != output_format and os.path.exists(f"{file_path}.{other_format}"):
+            os.remove(f"{file_path}.{other_format}")
+
+
+@instrumented(item="exo")
+def plot_exercise_predicted_volume(exo: str, series: SeriesStore, models_path: str, static_path: str, n_weeks: int,
+                                   output_format: Optional[str] = None) -> bool:
+    """
+    Plot the predicted volume of an exercise.
+    """
+    try:
+        data_analytics_logger.info(f"Plotting predicted volume for exercise '{exo}'...")
+
+        # Get the performance history of the specific exercise
+        df_exo = exercise_series(exo=exo, series=series)
+
+        # Predict the next n_weeks weeks with a single batched prediction
+        predictions = forecast_exercises(exercises=exo, series=series, models_path=models_path,
+                                         n_weeks=n_weeks)[exo]
+
+        # Plot the actual data and the predictions
+        fig = go.Figure()
+
+        # Add actual data to the plot
+        fig.add_trace(go.Scatter(x=df_exo['DATE'],
+                                 y=df_exo['PERF'],
+                                 mode='lines',
+                                 name='History',
+                                 hovertemplate="%{y:.1f} kg",
+                                 line=dict(color='#4a3e80', width=2)))
+
+        # Add predictions to the plot
+        fig.add_trace(go.Scatter(x=predictions.dates,
+                                 y=predictions.perf,
+                                 mode='lines',
+                                 name='Predictions',
+                                 hovertemplate="%{y:.1f} kg",
+                                 line=dict(color='#bc75ff', width=2)))
+
+        # Add title and labels
+        fig.update_layout(
+            title=f"Evolution of the Average Volume - {exo}",
+            xaxis_title=None,
+            yaxis_title="Average Volume (kg)",
+            hovermode="x unified",
+            font=dict(
+                family="Roboto, sans-serif",
+                size=18,
+                color="#333"
+            ),
+            template="plotly_white",
+            height=700,
+            plot_bgcolor="#f4f4f4",
+            paper_bgcolor="#f4f4f4",
+            yaxis=dict(
+                gridcolor="#ddd",
+                zerolinecolor="#ddd",
+            ),
+            xaxis=dict(
+                gridcolor="#ddd",
+                zerolinecolor="#ddd",
+                dtick="M1",
+                tickformat="%b\n%Y"
+            ),
+        )
+
+        # Save the plot
+        save_figure(fig, f"{static_path}/plots/predicted_volume/{exo}", output_format=output_format)
+
+        data_analytics_logger.info(f"Plotted predicted volume for exercise '{exo}'.")
+        return True
+
+    except Exception as e:
+        data_analytics_logger.error(f"Error occurred while plotting predicted volume for exercise '{exo}': {e}")
+        return False
+
+
+@instrumented()
+def plot_predicted_volume(models_path: str, data_path: str, static_path: str, n_weeks: int,
+                          output_format: Optional[str] = None) -> bool:
     """
     Plot the predicted volume for each exercise.
+    A failing exercise does not stop the others.
     """
     try:
         data_analytics_logger.info(f"Plotting predicted volume for each exercise...")
@@ -22,120 +128,18 @@ def plot_predicted_volume(models_path: str, data_path: str, static_path: str, n_
         # Disable warnings
         warnings.filterwarnings('ignore')
 
-        # Load performance data
-        perf = pd.read_csv(os.path.join(data_path, "current/workout_perf.csv"), header=0)
-
-        # Get the list of models
-        models = os.listdir(f"{models_path}/current")
+        # Load the performance series of the exercises
+        series = load_series_store(data_path)
 
         # Get the list of exercises from the models names
-        exercises = [model.split(".")[0] for model in models]
+        exercises = list(list_forecasters(models_path))
 
         # For each exercise, load the model and make predictions
-        for exo in exercises:
-            try:
-                data_analytics_logger.info(f"Plotting predicted volume for exercise '{exo}'...")
-
-                # Filter the performance data for the specific exercise
-                df_exo = perf[perf["EXERCISE"] == exo].reset_index(drop=True)
-                if df_exo.empty:
-                    data_analytics_logger.error(f"No data found for exercise '{exo}'")
-                    return False
-
-                # Format the DATE column to the number of days since the beginning of the exercises
-                df_exo['DATE'] = pd.to_datetime(df_exo['DATE'])
-                min_date = df_exo['DATE'].min()
-                df_exo['DATE'] = (df_exo['DATE'] - df_exo['DATE'].min()) / np.timedelta64(1, 'D')
-
-                # Get the minimum performance value
-                min_perf = df_exo['PERF'].min()
-
-                # Normalize columns for the LSTM model
-                scaler = MinMaxScaler(feature_range=(0, 1))
-                df_exo['PERF'] = scaler.fit_transform(df_exo[['PERF']])
-                df_exo['DATE'] = scaler.fit_transform(df_exo[['DATE']])
-
-                # Load exercise model
-                model = tf.keras.models.load_model(f'{models_path}/current/{exo}.h5')
-
-                # Create a dataframe with the predictions
-                predictions = pd.DataFrame(columns=["DATE", "PERF"])
-
-                # Define a future date
-                future_date = scaler.inverse_transform(df_exo[['DATE']]).max()
-
-                # Make predictions for the next n_weeks weeks
-                for i in range(n_weeks):
-                    future_date_scaled = scaler.transform([[future_date]])
-                    future_date_scaled = np.array([[future_date_scaled]])
-                    future_date_scaled = future_date_scaled.reshape((future_date_scaled.shape[0], 1, future_date_scaled.shape[1]))
-                    future_perf = model.predict(future_date_scaled, verbose=0)
-                    future_perf = scaler.inverse_transform(future_perf) + min_perf
-                    new_row = pd.DataFrame({"DATE": [future_date], "PERF": [future_perf[0][0]]})
-                    predictions = pd.concat([predictions, new_row], ignore_index=True)
-                    future_date = future_date + 7
-
-                df_exo['DATE'] = scaler.inverse_transform(df_exo[['DATE']])
-                df_exo['DATE'] = pd.to_timedelta(df_exo['DATE'], unit='D') + min_date
-
-                df_exo['PERF'] = scaler.inverse_transform(df_exo[['PERF']]) + min_perf
-
-                predictions['DATE'] = pd.to_timedelta(predictions['DATE'], unit='D') + min_date
-
-                # Plot the actual data and the predictions
-                fig = go.Figure()
-
-                # Add actual data to the plot
-                fig.add_trace(go.Scatter(x=df_exo['DATE'],
-                                         y=df_exo['PERF'],
-                                         mode='lines',
-                                         name='History',
-                                         hovertemplate="%{y:.1f} kg",
-                                         line=dict(color='#4a3e80', width=2)))
-
-                # Add predictions to the plot
-                fig.add_trace(go.Scatter(x=predictions['DATE'],
-                                         y=predictions['PERF'],
-                                         mode='lines',
-                                         name='Predictions',
-                                         hovertemplate="%{y:.1f} kg",
-                                         line=dict(color='#bc75ff', width=2)))
-
-                # Add title and labels
-                fig.update_layout(
-                    title=f"Evolution of the Average Volume - {exo}",
-                    xaxis_title=None,
-                    yaxis_title="Average Volume (kg)",
-                    hovermode="x unified",
-                    font=dict(
-                        family="Roboto, sans-serif",
-                        size=18,
-                        color="#333"
-                    ),
-                    template="plotly_white",
-                    height=700,
-                    plot_bgcolor="#f4f4f4",
-                    paper_bgcolor="#f4f4f4",
-                    yaxis=dict(
-                        gridcolor="#ddd",
-                        zerolinecolor="#ddd",
-                    ),
-                    xaxis=dict(
-                        gridcolor="#ddd",
-                        zerolinecolor="#ddd",
-                        dtick="M1",
-                        tickformat="%b\n%Y"
-                    ),
-                )
-
-                # Save the plot as an HTML file
-                fig.write_html(f"{static_path}/plots/predicted_volume/{exo}.html")
-
-                data_analytics_logger.info(f"Plotted predicted volume for exercise '{exo}'.")
-
-            except Exception as e:
-                data_analytics_logger.error(f"Error occurred while plotting predicted volume for exercise '{exo}': {e}")
-                return False
+        plotted = [plot_exercise_predicted_volume(exo=exo, series=series, models_path=models_path, static_path=static_path,
+                                                  n_weeks=n_weeks, output_format=output_format)
+                   for exo in exercises]
+        if not all(plotted):
+            return False
 
         data_analytics_logger.info(f"Plotted predicted volume for each exercise.")
         return True
@@ -145,7 +149,8 @@ def plot_predicted_volume(models_path: str, data_path: str, static_path: str, n_
         return False
 
 
-def plot_distribution_muscle_groups(data_path: str, static_path: str) -> bool:
+@instrumented()
+def plot_distribution_muscle_groups(data_path: str, static_path: str, output_format: Optional[str] = None) -> bool:
     """
     Plot the distribution of the targeted muscle groups.
     """
@@ -153,7 +158,7 @@ def plot_distribution_muscle_groups(data_path: str, static_path: str) -> bool:
         data_analytics_logger.info("Plotting the distribution of the targeted muscle groups...")
 
         # Load enriched workout data
-        enriched_workout_data = pd.read_csv(f"{data_path}/current/enriched_workout_data.csv", header=0)
+        enriched_workout_data = read_table(f"{data_path}/current/enriched_workout_data.csv", columns=["BodyPart"])
 
         # Calculate the distribution of the targeted muscle groups
         hist_data = enriched_workout_data['BodyPart'].value_counts().sort_values(ascending=False)
@@ -190,8 +195,8 @@ def plot_distribution_muscle_groups(data_path: str, static_path: str) -> bool:
             ),
         )
 
-        # Save the plot as an HTML file
-        fig.write_html(f"{static_path}/plots/distribution_muscle_groups.html")
+        # Save the plot
+        save_figure(fig, f"{static_path}/plots/distribution_muscle_groups", output_format=output_format)
 
         data_analytics_logger.info("Plotted the distribution of the targeted muscle groups.")
         return True
@@ -201,7 +206,8 @@ def plot_distribution_muscle_groups(data_path: str, static_path: str) -> bool:
         return False
 
 
-def plot_distribution_workout_types(data_path: str, static_path: str) -> bool:
+@instrumented()
+def plot_distribution_workout_types(data_path: str, static_path: str, output_format: Optional[str] = None) -> bool:
     """
     Plot the distribution of the workout types.
     """
@@ -209,7 +215,7 @@ def plot_distribution_workout_types(data_path: str, static_path: str) -> bool:
         data_analytics_logger.info("Plotting the distribution of the workout types...")
 
         # Load workout days data
-        workout_days = pd.read_csv(f"{data_path}/current/workout_days.csv", header=0)
+        workout_days = read_table(f"{data_path}/current/workout_days.csv", columns=["WORKOUT"])
 
         # Count of workout types
         workout_occurrences = workout_days["WORKOUT"].value_counts()
@@ -247,8 +253,8 @@ def plot_distribution_workout_types(data_path: str, static_path: str) -> bool:
             height=500,
         )
 
-        # Save the plot as an HTML file
-        fig.write_html(f"{static_path}/plots/distribution_workout_types.html")
+        # Save the plot
+        save_figure(fig, f"{static_path}/plots/distribution_workout_types", output_format=output_format)
 
         data_analytics_logger.info("Plotted the distribution of the workout types.")
         return True
@@ -258,7 +264,8 @@ def plot_distribution_workout_types(data_path: str, static_path: str) -> bool:
         return False
 
 
-def plot_weight_reps_over_time(data_path: str, static_path: str) -> bool:
+@instrumented()
+def plot_weight_reps_over_time(data_path: str, static_path: str, output_format: Optional[str] = None) -> bool:
     """
     Plot the evolution of the weight and reps over time.
     """
@@ -266,7 +273,8 @@ def plot_weight_reps_over_time(data_path: str, static_path: str) -> bool:
         data_analytics_logger.info("Plotting the evolution of the weight and reps over time...")
 
         # Load workout day exercises data
-        workout_day_exercises = pd.read_csv(f"{data_path}/current/workout_day_exercises.csv", header=0)
+        workout_day_exercises = read_table(f"{data_path}/current/workout_day_exercises.csv",
+                                           columns=["DATE", "EXERCISE", "AVERAGE_REPS", "AVERAGE_WEIGHT"])
 
         # Get top 5 exercises
         top_5_exercises = workout_day_exercises['EXERCISE'].value_counts().head(5).index
@@ -322,8 +330,8 @@ def plot_weight_reps_over_time(data_path: str, static_path: str) -> bool:
             ),
         )
 
-        # Save the plot as an HTML file
-        fig.write_html(f"{static_path}/plots/weight_reps_over_time.html")
+        # Save the plot
+        save_figure(fig, f"{static_path}/plots/weight_reps_over_time", output_format=output_format)
 
         data_analytics_logger.info("Plotted the evolution of the weight and reps over time.")
         return True
@@ -331,3 +339,71 @@ def plot_weight_reps_over_time(data_path: str, static_path: str) -> bool:
     except Exception as e:
         data_analytics_logger.error(f"Error occurred while plotting the evolution of the weight and reps over time: {e}")
         return False
+
+
+class PlotResult(NamedTuple):
+    """
+    Outcome and duration of the generation of a plot.
+    """
+    name: str
+    plotted: bool
+    seconds: float
+
+
+def _timed_plot(name: str, plot: Callable[[], bool]) -> PlotResult:
+    # Time a plot, isolating its failure from the other plots
+    start = time.perf_counter()
+    try:
+        plotted = bool(plot())
+    except Exception as e:
+        data_analytics_logger.error(f"Error occurred while generating plot '{name}': {e}")
+        plotted = False
+    return PlotResult(name=name, plotted=plotted, seconds=time.perf_counter() - start)
+
+
+@instrumented(rows=len)
+def generate_plots(models_path: str, data_path: str, static_path: str, n_weeks: int,
+                   max_workers: int = MAX_PLOT_WORKERS, output_format: Optional[str] = None) -> List[PlotResult]:
+    """
+    Generate the predicted volume plot of each exercise and the summary plots in a pool of max_workers threads.
+    A failing plot does not stop the others, the outcome and duration of each plot are returned and logged.
+    """
+    data_analytics_logger.info(f"Generating plots with {max_workers} workers...")
+    start = time.perf_counter()
+
+    # Disable warnings
+    warnings.filterwarnings('ignore')
+
+    # Plots of the exercises, sharing the performance series and the loaded models
+    plots = {}
+    try:
+        series = load_series_store(data_path)
+        for exo in list_forecasters(models_path):
+            plots[f"predicted_volume/{exo}"] = lambda exo=exo: plot_exercise_predicted_volume(
+                exo=exo, series=series, models_path=models_path, static_path=static_path, n_weeks=n_weeks,
+                output_format=output_format)
+    except Exception as e:
+        data_analytics_logger.error(f"Error occurred while listing the predicted volume plots: {e}")
+        plots["predicted_volume"] = lambda: False
+
+    # Summary plots
+    plots["distribution_workout_types"] = lambda: plot_distribution_workout_types(
+        data_path=data_path, static_path=static_path, output_format=output_format)
+    plots["distribution_muscle_groups"] = lambda: plot_distribution_muscle_groups(
+        data_path=data_path, static_path=static_path, output_format=output_format)
+    plots["weight_reps_over_time"] = lambda: plot_weight_reps_over_time(
+        data_path=data_path, static_path=static_path, output_format=output_format)
+
+    # Generate the plots concurrently, results are kept in submission order
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(lambda item: _timed_plot(*item), plots.items()))
+
+    # Report the duration of each plot, slowest first
+    data_analytics_logger.info("Plot timing report:")
+    for result in sorted(results, key=lambda result: result.seconds, reverse=True):
+        data_analytics_logger.info(f"  {result.name}: {result.seconds:.2f} s{'' if result.plotted else ' (failed)'}")
+    failed = [result.name for result in results if not result.plotted]
+    data_analytics_logger.info(f"Generated {len(results) - len(failed)}/{len(results)} plots "
+                               f"in {time.perf_counter() - start:.2f} s.")
+
+    return results
@@ -1,20 +1,58 @@
 import pandas as pd
-import numpy as np
+import json
 import os
 import re
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
 
 from .logger_config import configure_logger
+from .instrumentation import instrumented
+from .files import atomic_write, hash_file
+from .storage import read_table, write_table, append_table, table_rows, TableWriter
+from .exercise_catalog import EXERCISE_ATTRIBUTES, ExerciseCatalog, load_exercise_catalog
+from .exercise_names import ExerciseResolver
 
 # Configure logging for the data collection
 data_collection_logger = configure_logger(name='data_collection')
 
+# Manifest of the ingested workout files, stored next to the current workout data
+MANIFEST_FILE = 'workout_manifest.json'
 
-def collect_workout_data(input_path: str, output_path: str) -> pd.DataFrame:
+# Number of workout rows processed at once by the streaming ingestion
+STREAMING_CHUNK_ROWS = 50_000
+
+
+def _load_manifest(output_path: str) -> dict:
+    # A missing or unreadable manifest means that nothing was ingested yet
+    try:
+        with open(os.path.join(output_path, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_path: str, manifest: dict) -> None:
+    # Written atomically so that an interrupted run never leaves a truncated manifest
+    with atomic_write(os.path.join(output_path, MANIFEST_FILE)) as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _list_workout_files(input_path: str) -> list:
+    # Get a sorted list of all workout files in the input directory
+    return sorted(f for f in os.listdir(input_path) if re.match(r'workout_\d{4}-\d{2}-\d{2}.csv', f))
+
+
+@instrumented()
+def collect_workout_data(input_path: str, output_path: str, incremental: bool = False) -> pd.DataFrame:
     try:
         data_collection_logger.info("Collecting workout data...")
 
+        if incremental:
+            workout_data = _collect_workout_data_incremental(input_path=input_path, output_path=output_path)
+            data_collection_logger.info("Workout data collected.")
+            return workout_data
+
         # Get a list of all workout files in the data/workout directory
-        csv_files = sorted(f for f in os.listdir(input_path) if re.match(r'workout_\d{4}-\d{2}-\d{2}.csv', f))
+        csv_files = _list_workout_files(input_path)
 
         # Initialize an empty list to hold the dataframes
         dfs = []
@@ -30,7 +68,7 @@ def collect_workout_data(input_path: str, output_path: str) -> pd.DataFrame:
         workout_data = pd.concat(dfs, ignore_index=True)
 
         # Save the workout data to current directory
-        workout_data.to_csv(f"{output_path}/workout_data.csv", index=False, header=True)
+        write_table(workout_data, f"{output_path}/workout_data.csv")
 
         data_collection_logger.info("Workout data collected.")
         return workout_data
@@ -40,31 +78,156 @@ def collect_workout_data(input_path: str, output_path: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
-def fetch_exercise_data(file_path: str) -> pd.DataFrame:
+def _collect_workout_data_incremental(input_path: str, output_path: str) -> pd.DataFrame:
+    dataset_path = f"{output_path}/workout_data.csv"
+
+    # Load the manifest of the previously ingested files, in ingestion order
+    manifest = _load_manifest(output_path)
+    previous_files = manifest.get('files', [])
+    previous = {entry['name']: entry for entry in previous_files}
+
+    # Compare each workout file with its manifest entry: size and mtime first, content hash only if they differ
+    csv_files = _list_workout_files(input_path)
+    entries, changed = {}, []
+    for csv_file in csv_files:
+        stat = os.stat(os.path.join(input_path, csv_file))
+        entry = previous.get(csv_file)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            entries[csv_file] = entry
+            continue
+
+        sha256 = hash_file(os.path.join(input_path, csv_file))
+        if entry is not None and entry['sha256'] == sha256:
+            # The file was only touched, refresh its signature without parsing it
+            entries[csv_file] = {**entry, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+            continue
+
+        entries[csv_file] = {'name': csv_file, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                             'sha256': sha256, 'rows': 0}
+        changed.append(csv_file)
+
+    # Parse only the new or changed weeks
+    parsed = {}
+    for csv_file in changed:
+        df = pd.read_csv(f"{input_path}/{csv_file}")
+        entries[csv_file]['rows'] = len(df)
+        parsed[csv_file] = df
+
+    # A deletion, a schema change or an inconsistent current dataset requires a full rebuild
+    deleted = [name for name in previous if name not in entries]
+    columns = manifest.get('columns')
+    schema_changed = any(columns is not None and list(df.columns) != columns
+                         for df in parsed.values() if not df.empty)
+    dataset_missing = bool(previous_files) and not os.path.exists(dataset_path)
+    if not previous_files or deleted or schema_changed or dataset_missing:
+        data_collection_logger.info(f"Rebuilding workout data from scratch "
+                                    f"(deleted: {len(deleted)}, schema changed: {schema_changed}).")
+        return _rebuild_workout_data(input_path=input_path, output_path=output_path,
+                                     csv_files=csv_files, entries=entries, parsed=parsed)
+
+    # Nothing to do when no week was added or modified
+    if not changed:
+        if entries != previous:
+            _save_manifest(output_path, {'columns': columns, 'files': [entries[f] for f in csv_files]})
+        data_collection_logger.info("Workout data is up to date.")
+        return read_table(dataset_path)
+
+    # The row count of the current dataset is checked without loading it
+    if table_rows(dataset_path) != sum(entry['rows'] for entry in previous_files):
+        data_collection_logger.info("Workout data does not match the manifest, rebuilding from scratch.")
+        return _rebuild_workout_data(input_path=input_path, output_path=output_path,
+                                     csv_files=csv_files, entries=entries, parsed=parsed)
+
+    new_partitions = [parsed[f] for f in changed if not parsed[f].empty]
+    if all(f not in previous and f > previous_files[-1]['name'] for f in changed):
+        # Only new weeks after the last ingested one: append them to the current dataset, without loading it
+        data_collection_logger.info(f"Appending {len(changed)} new workout file(s).")
+        if new_partitions:
+            append_table(pd.concat(new_partitions, ignore_index=True), dataset_path)
+
+        # The next stages are still given the whole history, read back from the current dataset
+        workout_data = read_table(dataset_path)
+    else:
+        # Replace the changed partitions and keep the others as they are
+        data_collection_logger.info(f"Replacing {len(changed)} new or changed workout file(s).")
+        existing = read_table(dataset_path)
+
+        # Locate the partition of each previously ingested file in the current dataset
+        offsets, start = {}, 0
+        for entry in previous_files:
+            offsets[entry['name']] = (start, start + entry['rows'])
+            start += entry['rows']
+
+        dfs = []
+        for csv_file in csv_files:
+            if csv_file in parsed:
+                df = parsed[csv_file]
+            else:
+                start, end = offsets[csv_file]
+                df = existing.iloc[start:end]
+            if not df.empty:
+                dfs.append(df)
+        workout_data = pd.concat(dfs, ignore_index=True)
+        write_table(workout_data, dataset_path)
+
+    _save_manifest(output_path, {'columns': columns, 'files': [entries[f] for f in csv_files]})
+    return workout_data
+
+
+def _rebuild_workout_data(input_path: str, output_path: str, csv_files: list, entries: dict,
+                          parsed: dict) -> pd.DataFrame:
+    # Read every workout file that was not already parsed
+    dfs = []
+    for csv_file in csv_files:
+        df = parsed.get(csv_file)
+        if df is None:
+            df = pd.read_csv(f"{input_path}/{csv_file}")
+            entries[csv_file] = {**entries[csv_file], 'rows': len(df)}
+        if not df.empty:
+            dfs.append(df)
+
+    # Concatenate all the dataframes in the list into a single dataframe
+    workout_data = pd.concat(dfs, ignore_index=True)
+
+    # Save the workout data and the manifest to current directory
+    write_table(workout_data, f"{output_path}/workout_data.csv")
+    _save_manifest(output_path, {'columns': list(dfs[0].columns), 'files': [entries[f] for f in csv_files]})
+
+    return workout_data
+
+
+@instrumented(rows=len)
+def fetch_exercise_data(file_path: str) -> [ExerciseCatalog, None]:
     try:
         data_collection_logger.info("Fetching exercise data...")
 
-        # Read the exercise data
-        exercises = pd.read_csv(file_path, header=0, index_col=0)
+        # Load the compiled exercise catalog, compiled again only when the catalog file changed
+        exercises = load_exercise_catalog(file_path)
 
         data_collection_logger.info("Exercise data fetched.")
         return exercises
 
     except Exception as e:
         data_collection_logger.error(f"An error occurred fetching exercise data: {e}")
-        return pd.DataFrame()
+        return None
 
 
-def filter_exercise_data(workout_data: pd.DataFrame, exercises: pd.DataFrame, output_path: str) -> pd.DataFrame:
+@instrumented()
+def filter_exercise_data(workout_data: pd.DataFrame, exercises: ExerciseCatalog, output_path: str,
+                         resolver: Optional[ExerciseResolver] = None) -> pd.DataFrame:
     try:
         data_collection_logger.info("Filtering exercise data...")
 
+        # Resolve the exercise names that are not catalog titles, through the alias table and the n-gram index
+        titles = workout_data['EXERCISE'].unique()
+        if resolver is not None:
+            titles = [title for title in resolver.resolve_all(titles).values() if title is not None]
+
         # Filter the exercise data to only include exercises that are in the workout data
-        filtered_exercises = exercises[exercises['Title'].isin(workout_data['EXERCISE'].unique())] \
-            .drop_duplicates(ignore_index=True)
+        filtered_exercises = exercises.filter(titles)
 
         # Save the filtered exercise data to current directory
-        filtered_exercises.to_csv(f"{output_path}/workout_exercises.csv", index=False, header=True)
+        write_table(filtered_exercises, f"{output_path}/workout_exercises.csv")
 
         data_collection_logger.info("Exercise data filtered.")
         return filtered_exercises
@@ -74,18 +237,18 @@ def filter_exercise_data(workout_data: pd.DataFrame, exercises: pd.DataFrame, ou
         return pd.DataFrame()
 
 
-def enrich_workout_data(workout_data: pd.DataFrame, filtered_exercises: pd.DataFrame, output_path: str) -> pd.DataFrame:
+@instrumented()
+def enrich_workout_data(workout_data: pd.DataFrame, filtered_exercises: pd.DataFrame, output_path: str,
+                        aliases: Optional[Dict[str, Optional[str]]] = None) -> pd.DataFrame:
     try:
         data_collection_logger.info("Enriching workout data...")
 
-        # Merge the workout data with the filtered exercise data
-        enriched_workouts = pd.merge(workout_data, filtered_exercises, how='left', left_on='EXERCISE', right_on='Title')
-
-        # Drop unnecessary columns
-        enriched_workouts = enriched_workouts.drop(columns=['Title', 'Desc', 'RatingDesc'])
+        # Look the attributes of each exercise up by its title, or by the title its name is an alias of
+        enriched_workouts = enrich_workout_chunk(workout_data, build_exercise_lookup(filtered_exercises),
+                                                 aliases=aliases)
 
         # Save the enriched workout data to current directory
-        enriched_workouts.to_csv(f"{output_path}/enriched_workout_data.csv", index=False, header=True)
+        write_table(enriched_workouts, f"{output_path}/enriched_workout_data.csv")
 
         data_collection_logger.info("Workout data enriched.")
         return enriched_workouts
@@ -95,34 +258,66 @@ def enrich_workout_data(workout_data: pd.DataFrame, filtered_exercises: pd.DataF
         return pd.DataFrame()
 
 
+def _with_weighted_reps(enriched_workouts: pd.DataFrame) -> pd.DataFrame:
+    # Rep-weighted weight of each set, and whether it is unknown (missing weight or number of reps): like
+    # np.average, the average weight of a group with an unknown set is NaN
+    weighted_reps = enriched_workouts["WEIGHT"] * enriched_workouts["NB_REPS"]
+    return enriched_workouts.assign(WEIGHTED_REPS=weighted_reps, UNKNOWN_WEIGHTED_REPS=weighted_reps.isna())
+
+
+def _average_weight(total_weighted_reps: pd.Series, total_reps: pd.Series, unknown: pd.Series) -> pd.Series:
+    # Average weight weighted by the number of reps, NaN for the groups with an unknown set
+    return (total_weighted_reps / total_reps).where(unknown == 0)
+
+
+def compute_workout_aggregates(enriched_workouts: pd.DataFrame) -> [pd.DataFrame, pd.DataFrame]:
+    # Rep-weighted weight of each set, so that the average weight is a ratio of two vectorized sums
+    weighted_workouts = _with_weighted_reps(enriched_workouts)
+
+    # Aggregate the enriched workout data by date, workout, and exercise in a single pass
+    workout_day_exercises = weighted_workouts \
+        .groupby(["DATE", "WORKOUT", "EXERCISE"], sort=False) \
+        .agg(Type=("Type", "first"),
+             BodyPart=("BodyPart", "first"),
+             Equipment=("Equipment", "first"),
+             Level=("Level", "first"),
+             Rating=("Rating", "first"),
+             NB_SETS=("SET", "size"),
+             AVERAGE_REPS=("NB_REPS", "mean"),
+             TOTAL_REPS=("NB_REPS", "sum"),
+             TOTAL_WEIGHTED_REPS=("WEIGHTED_REPS", "sum"),
+             UNKNOWN_WEIGHTED_REPS=("UNKNOWN_WEIGHTED_REPS", "sum"),
+             MAX_WEIGHT=("WEIGHT", "max")) \
+        .reset_index()
+
+    # Average weight weighted by the number of reps
+    average_weight = _average_weight(workout_day_exercises["TOTAL_WEIGHTED_REPS"], workout_day_exercises["TOTAL_REPS"],
+                                     workout_day_exercises["UNKNOWN_WEIGHTED_REPS"])
+    workout_day_exercises.insert(workout_day_exercises.columns.get_loc("MAX_WEIGHT"), "AVERAGE_WEIGHT", average_weight)
+    workout_day_exercises = workout_day_exercises.drop(columns=["TOTAL_REPS", "TOTAL_WEIGHTED_REPS",
+                                                                "UNKNOWN_WEIGHTED_REPS"])
+
+    # Roll the exercises up by date and workout
+    workout_days = workout_day_exercises \
+        .groupby(["DATE", "WORKOUT"], sort=False) \
+        .agg(NB_EXERCISES=("EXERCISE", "size"),
+             NB_SETS=("NB_SETS", "sum")) \
+        .reset_index()
+
+    return workout_day_exercises, workout_days
+
+
+@instrumented()
 def aggregate_workout_data(enriched_workouts: pd.DataFrame, output_path: str) -> [pd.DataFrame, pd.DataFrame]:
     try:
         data_collection_logger.info("Aggregating workout data...")
 
-        # Aggregate the enriched workout data by date, workout, and exercise
-        workout_day_exercises = enriched_workouts \
-            .groupby(["DATE", "WORKOUT", "EXERCISE"], sort=False) \
-            .agg(Type=("Type", "first"),
-                 BodyPart=("BodyPart", "first"),
-                 Equipment=("Equipment", "first"),
-                 Level=("Level", "first"),
-                 Rating=("Rating", "first"),
-                 NB_SETS=("SET", len),
-                 AVERAGE_REPS=("NB_REPS", "mean"),
-                 AVERAGE_WEIGHT=("WEIGHT", lambda x: np.average(x, weights=enriched_workouts.loc[x.index, "NB_REPS"])),
-                 MAX_WEIGHT=("WEIGHT", "max")) \
-            .reset_index()
-
-        # Aggregate the enriched workout data by date and workout
-        workout_days = workout_day_exercises \
-            .groupby(["DATE", "WORKOUT"], sort=False) \
-            .agg(NB_EXERCISES=("EXERCISE", len),
-                 NB_SETS=("NB_SETS", "sum")) \
-            .reset_index()
+        # Aggregate the enriched workout data by day and exercise, then by day
+        workout_day_exercises, workout_days = compute_workout_aggregates(enriched_workouts)
 
         # Save the aggregated workout data to current directory
-        workout_day_exercises.to_csv(f"{output_path}/workout_day_exercises.csv", index=False, header=True)
-        workout_days.to_csv(f"{output_path}/workout_days.csv", index=False, header=True)
+        write_table(workout_day_exercises, f"{output_path}/workout_day_exercises.csv")
+        write_table(workout_days, f"{output_path}/workout_days.csv")
 
         data_collection_logger.info("Workout data aggregated.")
         return workout_day_exercises, workout_days
@@ -130,3 +325,258 @@ def aggregate_workout_data(enriched_workouts: pd.DataFrame, output_path: str) ->
     except Exception as e:
         data_collection_logger.error(f"An error occurred aggregating workout data: {e}")
         return pd.DataFrame(), pd.DataFrame()
+
+
+def iter_workout_chunks(input_path: str, chunk_rows: int = STREAMING_CHUNK_ROWS,
+                        entries: dict = None) -> Iterator[pd.DataFrame]:
+    """
+    Read the weekly workout files in order, as chunks of about chunk_rows rows.
+    The manifest entry of each file read is added to entries.
+    """
+    columns, buffer, buffered = None, [], 0
+    for csv_file in _list_workout_files(input_path):
+        file_path = os.path.join(input_path, csv_file)
+        stat = os.stat(file_path)
+        entry = {'name': csv_file, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': hash_file(file_path),
+                 'rows': 0}
+
+        # Large files are themselves read by chunks
+        for df in pd.read_csv(file_path, chunksize=chunk_rows):
+            if columns is None:
+                columns = list(df.columns)
+            elif list(df.columns) != columns:
+                raise ValueError(f"Workout file {csv_file} has columns {list(df.columns)} instead of {columns}")
+            entry['rows'] += len(df)
+            if not df.empty:
+                buffer.append(df)
+                buffered += len(df)
+
+            # Small files are grouped until the chunk is full
+            if buffered >= chunk_rows:
+                yield pd.concat(buffer, ignore_index=True)
+                buffer, buffered = [], 0
+
+        if entries is not None:
+            entries[csv_file] = entry
+
+    if buffer:
+        yield pd.concat(buffer, ignore_index=True)
+
+
+def build_exercise_lookup(exercises: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attributes of the exercises of a catalog table, indexed by their title (the first entry of a title listed twice).
+    """
+    return exercises.drop_duplicates(subset='Title').set_index('Title')[EXERCISE_ATTRIBUTES]
+
+
+def enrich_workout_chunk(workout_data: pd.DataFrame, exercise_lookup: pd.DataFrame,
+                         aliases: Optional[Dict[str, Optional[str]]] = None) -> pd.DataFrame:
+    """
+    Add the attributes of their exercise to a chunk of workout data, looked up by title (the title of their alias
+    for the aliased names).
+    """
+    titles = workout_data['EXERCISE']
+    if aliases:
+        titles = titles.map(aliases).fillna(titles)
+    attributes = exercise_lookup.reindex(titles.to_numpy()).set_axis(workout_data.index)
+    return pd.concat([workout_data, attributes], axis=1).reset_index(drop=True)
+
+
+def _partial_workout_aggregates(enriched_workouts: pd.DataFrame) -> pd.DataFrame:
+    # Sums, counts and extrema by date, workout and exercise, which can be combined across chunks
+    return _with_weighted_reps(enriched_workouts) \
+        .groupby(["DATE", "WORKOUT", "EXERCISE"], sort=False) \
+        .agg(Type=("Type", "first"),
+             BodyPart=("BodyPart", "first"),
+             Equipment=("Equipment", "first"),
+             Level=("Level", "first"),
+             Rating=("Rating", "first"),
+             NB_SETS=("SET", "size"),
+             COUNT_REPS=("NB_REPS", "count"),
+             TOTAL_REPS=("NB_REPS", "sum"),
+             TOTAL_WEIGHTED_REPS=("WEIGHTED_REPS", "sum"),
+             UNKNOWN_WEIGHTED_REPS=("UNKNOWN_WEIGHTED_REPS", "sum"),
+             MAX_WEIGHT=("WEIGHT", "max")) \
+        .reset_index()
+
+
+def _combine_workout_aggregates(partials: pd.DataFrame) -> pd.DataFrame:
+    # Merge the partial aggregates of the same date, workout and exercise, in order of appearance
+    return partials \
+        .groupby(["DATE", "WORKOUT", "EXERCISE"], sort=False) \
+        .agg(Type=("Type", "first"),
+             BodyPart=("BodyPart", "first"),
+             Equipment=("Equipment", "first"),
+             Level=("Level", "first"),
+             Rating=("Rating", "first"),
+             NB_SETS=("NB_SETS", "sum"),
+             COUNT_REPS=("COUNT_REPS", "sum"),
+             TOTAL_REPS=("TOTAL_REPS", "sum"),
+             TOTAL_WEIGHTED_REPS=("TOTAL_WEIGHTED_REPS", "sum"),
+             UNKNOWN_WEIGHTED_REPS=("UNKNOWN_WEIGHTED_REPS", "sum"),
+             MAX_WEIGHT=("MAX_WEIGHT", "max")) \
+        .reset_index()
+
+
+def _finalize_workout_aggregates(partials: pd.DataFrame) -> pd.DataFrame:
+    # Averages of the complete groups, with the columns of compute_workout_aggregates
+    workout_day_exercises = partials.drop(columns=["COUNT_REPS", "TOTAL_REPS", "TOTAL_WEIGHTED_REPS",
+                                                   "UNKNOWN_WEIGHTED_REPS", "MAX_WEIGHT"])
+    workout_day_exercises["AVERAGE_REPS"] = partials["TOTAL_REPS"] / partials["COUNT_REPS"]
+    workout_day_exercises["AVERAGE_WEIGHT"] = _average_weight(partials["TOTAL_WEIGHTED_REPS"], partials["TOTAL_REPS"],
+                                                              partials["UNKNOWN_WEIGHTED_REPS"])
+    workout_day_exercises["MAX_WEIGHT"] = partials["MAX_WEIGHT"]
+    return workout_day_exercises
+
+
+class StreamingAggregator:
+    """
+    Aggregation of the enriched workout data chunk by chunk, equivalent to compute_workout_aggregates.
+    The workout files are weekly and in date order, so the groups before the last date of a chunk are complete:
+    they are returned, and only the groups that may continue in the next chunk are kept.
+    """
+
+    def __init__(self):
+        self.pending_exercises = None
+        self.pending_days = None
+        self.last_date = None
+
+    def update(self, enriched_workouts: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Add a chunk of enriched workout data, and return the aggregates of the groups completed by it.
+        """
+        first_date, last_date = enriched_workouts["DATE"].min(), enriched_workouts["DATE"].max()
+        if self.last_date is not None and first_date < self.last_date:
+            raise ValueError(f"Workout data is not in date order: {first_date} after {self.last_date}")
+        self.last_date = last_date if self.last_date is None else max(self.last_date, last_date)
+
+        partials = _partial_workout_aggregates(enriched_workouts)
+        if self.pending_exercises is not None:
+            partials = _combine_workout_aggregates(pd.concat([self.pending_exercises, partials], ignore_index=True))
+
+        # The groups appearing before the first group of the last date are complete
+        complete = _split_before(partials, partials["DATE"] >= self.last_date)
+        self.pending_exercises = partials.iloc[len(complete):]
+        return self._complete(complete)
+
+    def finish(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Return the aggregates of the remaining groups.
+        """
+        complete = self.pending_exercises if self.pending_exercises is not None else pd.DataFrame()
+        self.pending_exercises = None
+        return self._complete(complete, last=True)
+
+    def _complete(self, complete: pd.DataFrame, last: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        workout_day_exercises = _finalize_workout_aggregates(complete) if not complete.empty else complete
+
+        # Roll the complete exercises up by date and workout, the days of the pending exercises are not complete
+        if not complete.empty:
+            days = workout_day_exercises \
+                .groupby(["DATE", "WORKOUT"], sort=False) \
+                .agg(NB_EXERCISES=("EXERCISE", "size"),
+                     NB_SETS=("NB_SETS", "sum")) \
+                .reset_index()
+            if self.pending_days is not None:
+                days = pd.concat([self.pending_days, days], ignore_index=True) \
+                    .groupby(["DATE", "WORKOUT"], sort=False) \
+                    .agg(NB_EXERCISES=("NB_EXERCISES", "sum"),
+                         NB_SETS=("NB_SETS", "sum")) \
+                    .reset_index()
+        else:
+            days = self.pending_days if self.pending_days is not None else pd.DataFrame()
+
+        if last or days.empty:
+            self.pending_days = None
+            return workout_day_exercises, days
+        workout_days = _split_before(days, days["DATE"] >= self.pending_exercises["DATE"].min())
+        self.pending_days = days.iloc[len(workout_days):]
+        return workout_day_exercises, workout_days
+
+
+def _split_before(df: pd.DataFrame, mask: pd.Series) -> pd.DataFrame:
+    # Rows before the first row matching the mask, so that the order of appearance is kept
+    matches = mask.to_numpy()
+    return df.iloc[:matches.argmax()] if matches.any() else df
+
+
+class StreamingSummary(NamedTuple):
+    """
+    Rows written by a streaming ingestion.
+    """
+    chunks: int
+    rows: int
+    exercises: int
+    day_exercises: int
+    days: int
+
+
+@instrumented(rows=lambda summary: summary.rows)
+def stream_workout_data(input_path: str, exercises: ExerciseCatalog, output_path: str,
+                        chunk_rows: int = STREAMING_CHUNK_ROWS,
+                        resolver: Optional[ExerciseResolver] = None) -> [StreamingSummary, None]:
+    """
+    Collect, filter, enrich and aggregate the workout data in a single pass over the weekly files, by chunks of
+    chunk_rows rows: the tables of the batch mode are written chunk by chunk, so that the memory used is bounded
+    by the chunk size rather than by the history.
+    """
+    try:
+        data_collection_logger.info("Streaming workout data...")
+
+        # Attributes of the catalog exercises, looked up by each chunk
+        exercise_lookup = exercises.attributes
+
+        aggregator = StreamingAggregator()
+        entries, columns, titles, chunks = {}, None, {}, 0
+        with TableWriter(f"{output_path}/workout_data.csv") as workout_writer, \
+                TableWriter(f"{output_path}/enriched_workout_data.csv") as enriched_writer, \
+                TableWriter(f"{output_path}/workout_day_exercises.csv") as day_exercises_writer, \
+                TableWriter(f"{output_path}/workout_days.csv") as days_writer:
+
+            for workout_data in iter_workout_chunks(input_path, chunk_rows=chunk_rows, entries=entries):
+                # Resolve the exercise names seen for the first time
+                names = [name for name in workout_data['EXERCISE'].unique() if name not in titles]
+                titles.update(resolver.resolve_all(names) if resolver is not None else {name: name for name in names})
+
+                # Enrich the chunk and aggregate its complete groups
+                enriched_workouts = enrich_workout_chunk(workout_data, exercise_lookup,
+                                                         aliases={name: title for name, title in titles.items()
+                                                                  if title is not None and title != name})
+                workout_day_exercises, workout_days = aggregator.update(enriched_workouts)
+
+                # Append the chunk and its complete aggregates to the current tables
+                workout_writer.write(workout_data)
+                enriched_writer.write(enriched_workouts)
+                for writer, df in ((day_exercises_writer, workout_day_exercises), (days_writer, workout_days)):
+                    if not df.empty:
+                        writer.write(df)
+
+                columns = list(workout_data.columns)
+                chunks += 1
+
+            if not chunks:
+                raise ValueError(f"No workout data found in {input_path}")
+
+            # Write the groups of the last days
+            workout_day_exercises, workout_days = aggregator.finish()
+            for writer, df in ((day_exercises_writer, workout_day_exercises), (days_writer, workout_days)):
+                if not df.empty:
+                    writer.write(df)
+
+        # Filter the exercise data to only include exercises that are in the workout data
+        filtered_exercises = exercises.filter(title for title in titles.values() if title is not None)
+        write_table(filtered_exercises, f"{output_path}/workout_exercises.csv")
+
+        # The manifest of the ingested files lets the next incremental collection start from this one
+        _save_manifest(output_path, {'columns': columns, 'files': list(entries.values())})
+
+        summary = StreamingSummary(chunks=chunks, rows=workout_writer.rows, exercises=len(filtered_exercises),
+                                   day_exercises=day_exercises_writer.rows, days=days_writer.rows)
+        data_collection_logger.info(f"Workout data streamed: {summary.rows} rows in {summary.chunks} chunks, "
+                                    f"{summary.day_exercises} exercises by day, {summary.days} days.")
+        return summary
+
+    except Exception as e:
+        data_collection_logger.error(f"An error occurred during streaming data ingestion: {e}")
+        return None
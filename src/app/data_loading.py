@@ -1,21 +1,141 @@
-import pandas as pd
 import numpy as np
+import pandas as pd
+import os
+import threading
+from typing import Dict, List, Optional
 
 from .logger_config import configure_logger
+from .storage import read_table, table_version
 
 # Configure logging for the data loading
 data_loading_logger = configure_logger(name='data_loading')
 
+# Columns that can be filtered by substring, by query parameter
+WORKOUT_FILTERS = {"workout": "WORKOUT", "exercise": "EXERCISE", "muscle": "MUSCLE", "set": "SET",
+                   "reps": "NB_REPS", "weight": "WEIGHT"}
+EXERCISE_FILTERS = {"exercise": "Title", "description": "Desc", "type": "Type", "muscle": "BodyPart",
+                    "equipment": "Equipment", "level": "Level", "rating": "Rating"}
+
+# Bounds of the page size of the paginated queries
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class _CachedTable:
+    """
+    Typed copy of a table, with the indexes derived from it computed once.
+    """
+    def __init__(self, table: pd.DataFrame, version: tuple):
+        self.table = table
+        self.version = version
+        self._text = {}
+        self._orders = {}
+        self._records = None
+
+    def text(self, column: str) -> pd.Series:
+        # Upper-cased text of a column, as displayed, for the substring filters
+        if column not in self._text:
+            self._text[column] = self.table[column].astype("string").fillna("").str.upper()
+        return self._text[column]
+
+    def order(self, column: str, ascending: bool = True) -> np.ndarray:
+        # Stable order of the rows by a column, missing values last
+        if (column, ascending) not in self._orders:
+            values = self.table[column].reset_index(drop=True)
+            self._orders[column, ascending] = values.sort_values(ascending=ascending, kind="stable",
+                                                                 na_position="last").index.to_numpy()
+        return self._orders[column, ascending]
+
+    def records(self) -> list:
+        if self._records is None:
+            self._records = _to_records(self.table)
+        return self._records
+
+
+class TableCache:
+    """
+    Keeps an in-memory copy of each table, reloaded only when its file changes.
+    """
+    def __init__(self):
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> _CachedTable:
+        file_path = os.path.abspath(file_path)
+        version = table_version(file_path)
+        with self._lock:
+            cached = self._tables.get(file_path)
+            if cached is None or cached.version != version:
+                data_loading_logger.info(f"Reading table '{file_path}'...")
+                cached = _CachedTable(table=read_table(file_path), version=version)
+                self._tables[file_path] = cached
+            return cached
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        with self._lock:
+            if file_path is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(os.path.abspath(file_path), None)
+
+
+# Table cache shared by the routes of the app
+table_cache = TableCache()
+
+
+def _to_records(table: pd.DataFrame) -> list:
+    # Replace NaN with empty strings and convert the table to a list of dictionaries
+    return table.astype(object).where(table.notna(), "").to_dict(orient='records')
+
+
+def query_table(cached: _CachedTable, filters: Dict[str, str], filter_columns: Dict[str, str],
+                date_from: Optional[str] = None, date_to: Optional[str] = None, sort: Optional[str] = None,
+                order: str = "asc", page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> dict:
+    """
+    Filter, sort and paginate a cached table, only converting the rows of the requested page.
+    """
+    table = cached.table
+
+    # Validate the query
+    if sort is not None and sort not in table.columns:
+        raise ValueError(f"Unknown sort column '{sort}'")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unknown sort order '{order}'")
+    if (date_from or date_to) and "DATE" not in table.columns:
+        raise ValueError("The table has no dates to filter")
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid page {page} of size {page_size}")
+
+    # Filter the rows by date range and by substring of the filtered columns
+    mask = np.ones(len(table), dtype=bool)
+    if date_from:
+        mask &= (table["DATE"] >= pd.Timestamp(date_from).strftime("%Y-%m-%d")).to_numpy()
+    if date_to:
+        mask &= (table["DATE"] <= pd.Timestamp(date_to).strftime("%Y-%m-%d")).to_numpy()
+    for param, value in filters.items():
+        if value:
+            mask &= cached.text(filter_columns[param]).str.contains(value.upper(), regex=False).to_numpy()
+
+    # Sort the matching rows with the cached order of the sort column
+    if sort is not None:
+        rows = cached.order(sort, ascending=order == "asc")
+    else:
+        rows = np.arange(len(table)) if order == "asc" else np.arange(len(table))[::-1]
+    rows = rows[mask[rows]]
+
+    # Convert the rows of the page
+    start = (page - 1) * page_size
+    page_rows = table.iloc[rows[start:start + page_size]]
+
+    return {"total": int(len(rows)), "page": page, "page_size": page_size, "rows": _to_records(page_rows)}
+
 
 def load_workout_data(file_path: str) -> list:
     try:
         data_loading_logger.info("Loading workout data...")
 
-        # Read the workout data and replace NaN with empty strings
-        workout_data = (pd.read_csv(file_path, header=0)).replace({np.nan: ""})
-
-        # Convert the workout data to a list of dictionaries
-        workout_data = workout_data.to_dict(orient='records')
+        # Get the cached workout data as a list of dictionaries, with NaN replaced with empty strings
+        workout_data = table_cache.get(file_path).records()
 
         data_loading_logger.info("Workout data loaded.")
         return workout_data
@@ -29,11 +149,9 @@ def load_filtered_exercise_data(file_path: str) -> list:
     try:
         data_loading_logger.info("Loading filtered exercise data...")
 
-        # Read the filtered exercise data drop column "RatingDesc" and replace NaN with empty strings
-        filtered_exercise_data = pd.read_csv(file_path, header=0).drop(columns=["RatingDesc"]).replace({np.nan: ""})
-
-        # Convert the filtered exercise data to a list of dictionaries
-        filtered_exercise_data = filtered_exercise_data.to_dict(orient='records')
+        # Get the cached filtered exercise data without column "RatingDesc", with NaN replaced with empty strings
+        filtered_exercise_data = [{column: value for column, value in exercise.items() if column != "RatingDesc"}
+                                  for exercise in table_cache.get(file_path).records()]
 
         data_loading_logger.info("Filtered exercise data loaded.")
         return filtered_exercise_data
@@ -41,3 +159,56 @@ def load_filtered_exercise_data(file_path: str) -> list:
     except Exception as e:
         data_loading_logger.error(f"An error occurred loading filtered exercise data: {e}")
         return list()
+
+
+def _empty_page(query: dict) -> dict:
+    return {"total": 0, "page": query.get("page", 1), "page_size": query.get("page_size", DEFAULT_PAGE_SIZE),
+            "rows": []}
+
+
+def query_workout_data(file_path: str, filters: Dict[str, str], **query) -> dict:
+    """
+    Get a page of the workout data, filtered by date range and by workout, exercise, etc.
+    Invalid queries raise a ValueError.
+    """
+    try:
+        data_loading_logger.info("Loading workout data...")
+
+        # Query the cached workout data
+        workout_data = query_table(table_cache.get(file_path), filters=filters, filter_columns=WORKOUT_FILTERS,
+                                   **query)
+
+        data_loading_logger.info("Workout data loaded.")
+        return workout_data
+
+    except ValueError:
+        raise
+
+    except Exception as e:
+        data_loading_logger.error(f"An error occurred loading workout data: {e}")
+        return _empty_page(query)
+
+
+def query_filtered_exercise_data(file_path: str, filters: Dict[str, str], **query) -> dict:
+    """
+    Get a page of the filtered exercise data, filtered by exercise, type, muscle, etc.
+    Invalid queries raise a ValueError.
+    """
+    try:
+        data_loading_logger.info("Loading filtered exercise data...")
+
+        # Query the cached filtered exercise data and drop column "RatingDesc"
+        filtered_exercise_data = query_table(table_cache.get(file_path), filters=filters,
+                                             filter_columns=EXERCISE_FILTERS, **query)
+        for exercise in filtered_exercise_data["rows"]:
+            exercise.pop("RatingDesc", None)
+
+        data_loading_logger.info("Filtered exercise data loaded.")
+        return filtered_exercise_data
+
+    except ValueError:
+        raise
+
+    except Exception as e:
+        data_loading_logger.error(f"An error occurred loading filtered exercise data: {e}")
+        return _empty_page(query)
@@ -0,0 +1,192 @@
+import pandas as pd
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+from .logger_config import configure_logger
+from .files import atomic_write, hash_file
+from .storage import read_table, write_table
+from .exercise_names import NameIndex
+
+# The catalog is compiled by the data collection
+exercise_catalog_logger = configure_logger(name='data_collection')
+
+# Attributes of the catalog exercises added to the workout data by the enrichment
+EXERCISE_ATTRIBUTES = ['Type', 'BodyPart', 'Equipment', 'Level', 'Rating']
+
+# Free-text columns of the catalog, stored apart and only loaded when needed
+DESCRIPTION_COLUMNS = ['Desc', 'RatingDesc']
+
+# Version of the compiled index layout, compiled again when it changes
+INDEX_VERSION = 2
+
+# Signature of the source file and layout of the compiled index
+INDEX_FILE = 'index.json'
+
+
+def catalog_index_path(file_path: str) -> str:
+    """
+    Directory of the compiled index of a catalog file, next to it.
+    """
+    return f"{os.path.splitext(file_path)[0]}.index"
+
+
+class ExerciseCatalog:
+    """
+    Compiled exercise catalog: a hash map from each title to its attributes, the descriptions and the n-gram index
+    of the titles being loaded on first use. A title listed several times in the catalog keeps its first entry.
+    """
+
+    def __init__(self, index_path: str, columns: list):
+        self.index_path = index_path
+        self.columns = columns
+
+        # Attributes of each exercise, indexed by title for keyed lookups
+        self.attributes = read_table(os.path.join(index_path, 'attributes.csv')).set_index('Title')
+        self._descriptions = None
+        self._name_index = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.attributes)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.attributes.index
+
+    def get(self, title: str) -> Optional[dict]:
+        """
+        Attributes of an exercise, or None if it is not in the catalog.
+        """
+        if title not in self.attributes.index:
+            return None
+        return self.attributes.loc[title].to_dict()
+
+    def descriptions(self) -> pd.DataFrame:
+        """
+        Descriptions of each exercise, indexed by title, read from the index on first use.
+        """
+        with self._lock:
+            if self._descriptions is None:
+                self._descriptions = read_table(os.path.join(self.index_path, 'descriptions.csv')).set_index('Title')
+            return self._descriptions
+
+    def name_index(self) -> NameIndex:
+        """
+        N-gram index of the titles, read from the index on first use.
+        """
+        with self._lock:
+            if self._name_index is None:
+                self._name_index = NameIndex.load(os.path.join(self.index_path, 'names.npz'))
+            return self._name_index
+
+    def filter(self, titles: Iterable[str]) -> pd.DataFrame:
+        """
+        Catalog entries of the exercises, with their descriptions, in the order and with the columns of the catalog.
+        """
+        attributes = self.attributes[self.attributes.index.isin(list(titles))]
+        exercises = attributes.join(self.descriptions(), how='left')
+        return exercises.reset_index()[self.columns]
+
+
+def compile_exercise_catalog(file_path: str, index_path: Optional[str] = None) -> dict:
+    """
+    Compile a catalog file into its index: the attributes and the descriptions of each title, as binary tables,
+    and the n-gram index of the titles.
+    """
+    index_path = index_path or catalog_index_path(file_path)
+    os.makedirs(index_path, exist_ok=True)
+    exercise_catalog_logger.info(f"Compiling exercise catalog '{file_path}'...")
+
+    # Hash the file before reading it, so that a file changed meanwhile is compiled again next time
+    stat = os.stat(file_path)
+    sha256 = hash_file(file_path)
+    exercises = pd.read_csv(file_path, header=0, index_col=0)
+    exercises = exercises.dropna(subset=['Title']).drop_duplicates(subset='Title', ignore_index=True)
+
+    write_table(exercises[['Title'] + EXERCISE_ATTRIBUTES], os.path.join(index_path, 'attributes.csv'),
+                export_csv=False)
+    write_table(exercises[['Title'] + DESCRIPTION_COLUMNS], os.path.join(index_path, 'descriptions.csv'),
+                export_csv=False)
+    NameIndex.build(exercises['Title']).save(os.path.join(index_path, 'names.npz'))
+
+    # The signature is written last, an interrupted compilation is compiled again
+    signature = {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': sha256,
+                 'columns': list(exercises.columns), 'exercises': len(exercises)}
+    _save_signature(index_path, signature)
+
+    exercise_catalog_logger.info(f"Exercise catalog compiled: {len(exercises)} exercises.")
+    return signature
+
+
+def _load_signature(index_path: str) -> dict:
+    # A missing or unreadable signature means that the catalog was not compiled yet
+    try:
+        with open(os.path.join(index_path, INDEX_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_signature(index_path: str, signature: dict) -> None:
+    # Written atomically so that an interrupted run never leaves a truncated signature
+    with atomic_write(os.path.join(index_path, INDEX_FILE)) as f:
+        json.dump(signature, f, indent=2)
+
+
+def _is_compiled(file_path: str, index_path: str, signature: dict) -> bool:
+    # Compare the source file with its signature: size and mtime first, content hash only if they differ
+    stat = os.stat(file_path)
+    if signature.get('version') != INDEX_VERSION:
+        return False
+    if signature['size'] == stat.st_size and signature['mtime'] == stat.st_mtime_ns:
+        return True
+    if signature['sha256'] != hash_file(file_path):
+        return False
+
+    # The file was only touched, refresh its signature without compiling it
+    _save_signature(index_path, {**signature, 'size': stat.st_size, 'mtime': stat.st_mtime_ns})
+    return True
+
+
+class CatalogCache:
+    """
+    Keeps the compiled catalog of each catalog file in memory, compiled again only when the file changes.
+    """
+
+    def __init__(self):
+        self._catalogs: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> ExerciseCatalog:
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        with self._lock:
+            cached = self._catalogs.get(file_path)
+            if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+                return cached[1]
+
+            # Compile the catalog file unless its index is up to date
+            index_path = catalog_index_path(file_path)
+            signature = _load_signature(index_path)
+            if not signature or not _is_compiled(file_path, index_path, signature):
+                signature = compile_exercise_catalog(file_path, index_path)
+
+            catalog = ExerciseCatalog(index_path=index_path, columns=signature['columns'])
+            self._catalogs[file_path] = ((stat.st_size, stat.st_mtime_ns), catalog)
+            return catalog
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._catalogs.clear()
+
+
+# Compiled catalogs of the process
+catalog_cache = CatalogCache()
+
+
+def load_exercise_catalog(file_path: str) -> ExerciseCatalog:
+    """
+    Compiled catalog of a catalog file.
+    """
+    return catalog_cache.get(file_path)
@@ -0,0 +1,194 @@
+import numpy as np
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .logger_config import configure_logger
+from .files import atomic_write
+
+# The exercise names are resolved by the data collection
+exercise_names_logger = configure_logger(name='data_collection')
+
+# Length of the character n-grams of the index
+NGRAM_SIZE = 3
+
+# Similarity from which the best candidate of a name is used without review, and its minimum lead over the second one
+RESOLVE_MIN_SCORE = 0.7
+RESOLVE_MIN_LEAD = 0.05
+
+# Number of candidates logged for a name that could not be resolved
+LOGGED_CANDIDATES = 3
+
+
+class Candidate(NamedTuple):
+    """
+    Catalog title matching a name, with the Dice similarity of their n-grams (1 for the same normalized name).
+    """
+    title: str
+    score: float
+
+
+def normalize_name(name: str) -> str:
+    """
+    Lower-cased letters and digits of a name, so that "Lat pull-down" and "Lat Pulldown" are the same.
+    """
+    return re.sub(r'[^0-9a-z]', '', str(name).lower())
+
+
+def name_ngrams(name: str) -> List[str]:
+    """
+    Distinct character n-grams of the normalized name, with its boundaries.
+    """
+    padded = f" {normalize_name(name)} "
+    return list(dict.fromkeys(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)))
+
+
+class NameIndex:
+    """
+    Inverted index from each character n-gram to the titles containing it, stored as sorted n-grams with the
+    offsets of their postings in a single array, so that a name is matched against all the titles at once.
+    """
+
+    def __init__(self, titles: List[str], ngrams: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 sizes: np.ndarray):
+        self.titles = titles
+        self.ngrams = ngrams
+        self.offsets = offsets
+        self.postings = postings
+        self.sizes = sizes
+        self._positions = {ngram: i for i, ngram in enumerate(ngrams.tolist())}
+
+    @classmethod
+    def build(cls, titles: Iterable[str]) -> "NameIndex":
+        titles = list(titles)
+        postings: Dict[str, List[int]] = {}
+        sizes = np.zeros(len(titles), dtype=np.int32)
+        for i, title in enumerate(titles):
+            ngrams = name_ngrams(title)
+            sizes[i] = len(ngrams)
+            for ngram in ngrams:
+                postings.setdefault(ngram, []).append(i)
+
+        ngrams = sorted(postings)
+        offsets = np.cumsum([0] + [len(postings[ngram]) for ngram in ngrams]).astype(np.int32)
+        flat = np.fromiter((i for ngram in ngrams for i in postings[ngram]), dtype=np.int32, count=int(offsets[-1]))
+        return cls(titles=titles, ngrams=np.array(ngrams, dtype=str), offsets=offsets, postings=flat, sizes=sizes)
+
+    def save(self, path: str) -> None:
+        # Written atomically so that readers never see a partially written index
+        with atomic_write(path, 'wb') as f:
+            np.savez(f, titles=np.array(self.titles, dtype=str), ngrams=self.ngrams, offsets=self.offsets,
+                     postings=self.postings, sizes=self.sizes)
+
+    @classmethod
+    def load(cls, path: str) -> "NameIndex":
+        with np.load(path) as data:
+            return cls(titles=data['titles'].tolist(), ngrams=data['ngrams'], offsets=data['offsets'],
+                       postings=data['postings'], sizes=data['sizes'])
+
+    def search(self, name: str, limit: int = 5) -> List[Candidate]:
+        """
+        Titles sharing the most n-grams with the name, best first.
+        """
+        ngrams = name_ngrams(name)
+        positions = [self._positions[ngram] for ngram in ngrams if ngram in self._positions]
+        if not positions:
+            return []
+
+        # Count the n-grams shared with each title from the postings of the n-grams of the name
+        postings = np.concatenate([self.postings[self.offsets[i]:self.offsets[i + 1]] for i in positions])
+        shared = np.bincount(postings, minlength=len(self.titles))
+        scores = 2 * shared / (len(ngrams) + self.sizes)
+
+        limit = min(limit, int(np.count_nonzero(shared)))
+        if limit <= 0:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.lexsort((best, -scores[best]))]
+        return [Candidate(title=self.titles[i], score=float(scores[i])) for i in best]
+
+
+def load_aliases(file_path: Optional[str]) -> Dict[str, dict]:
+    """
+    Alias table: the catalog title of each logged name ("title", None for a name without catalog exercise),
+    with its "source" ("manual" or "index") and "score".
+    """
+    if file_path is None:
+        return {}
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_aliases(file_path: str, aliases: Dict[str, dict]) -> None:
+    # Written atomically so that an interrupted run never leaves a truncated alias table
+    with atomic_write(file_path) as f:
+        json.dump(dict(sorted(aliases.items())), f, indent=2)
+
+
+def alias_titles(aliases: Dict[str, dict]) -> Dict[str, Optional[str]]:
+    """
+    Catalog title of each aliased name.
+    """
+    return {name: alias.get('title') for name, alias in aliases.items()}
+
+
+class ExerciseResolver:
+    """
+    Resolves the exercise names of the workouts to catalog titles: an exact title first, then the alias table, then
+    the best candidate of the n-gram index when it is similar and ahead enough. Names resolved by the index are added
+    to the alias table, where they can be reviewed and overridden (with "source": "manual").
+    """
+
+    def __init__(self, catalog, aliases_path: Optional[str] = None):
+        self.catalog = catalog
+        self.aliases_path = aliases_path
+        self.aliases = load_aliases(aliases_path)
+        self._changed = False
+        self._lock = threading.Lock()
+
+    def candidates(self, name: str, limit: int = 5) -> List[Candidate]:
+        """
+        Catalog titles matching a name, best first.
+        """
+        return self.catalog.name_index().search(name, limit=limit)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Catalog title of an exercise name, or None if it could not be resolved.
+        """
+        if name in self.catalog:
+            return name
+        with self._lock:
+            if name in self.aliases:
+                return self.aliases[name].get('title')
+
+            candidates = self.candidates(name, limit=max(2, LOGGED_CANDIDATES))
+            if candidates and candidates[0].score >= RESOLVE_MIN_SCORE \
+                    and (len(candidates) == 1 or candidates[0].score - candidates[1].score >= RESOLVE_MIN_LEAD):
+                best = candidates[0]
+                exercise_names_logger.info(f"Exercise '{name}' resolved to '{best.title}' (score {best.score:.2f}).")
+                self.aliases[name] = {'title': best.title, 'source': 'index', 'score': round(best.score, 4)}
+                self._changed = True
+                return best.title
+
+            exercise_names_logger.info(f"Exercise '{name}' could not be resolved, candidates: "
+                                       f"{[(c.title, round(c.score, 2)) for c in candidates[:LOGGED_CANDIDATES]]}")
+            return None
+
+    def resolve_all(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Catalog title of each distinct name, the new aliases being persisted.
+        """
+        titles = {name: self.resolve(name) for name in dict.fromkeys(names) if isinstance(name, str)}
+        self.save()
+        return titles
+
+    def save(self) -> None:
+        with self._lock:
+            if self._changed and self.aliases_path is not None:
+                save_aliases(self.aliases_path, self.aliases)
+            self._changed = False
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import uuid
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+
+def hash_file(file_path: str) -> str:
+    """
+    SHA-256 of the content of a file, read by blocks to avoid loading large files at once.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class AtomicFile:
+    """
+    File written to a temporary file next to its path, which replaces it once committed: readers never see a
+    partially written file, and an aborted or interrupted write keeps the previous one. The temporary name is unique,
+    so that concurrent writers of a same path do not write to the same temporary file.
+    """
+
+    def __init__(self, path: str, mode: str = 'w', **kwargs):
+        self.path = path
+        self.tmp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+        self.file = open(self.tmp_path, mode, **kwargs)
+
+    def commit(self) -> None:
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', **kwargs) -> Iterator[IO]:
+    """
+    Open a file to write path atomically, replacing it on exit unless an exception was raised.
+    """
+    atomic_file = AtomicFile(path, mode, **kwargs)
+    try:
+        yield atomic_file.file
+    except BaseException:
+        atomic_file.abort()
+        raise
+    atomic_file.commit()
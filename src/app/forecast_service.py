@@ -0,0 +1,224 @@
+import numpy as np
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from .model_registry import ModelRegistry, model_registry
+from .forecasters import GlobalForecaster, global_model_path, list_forecasters
+from .forecasting import Forecast, denormalize_forecast, exercise_series, forecast_dates
+from .series_store import SeriesStore, load_series_store, series_store_path
+from .storage import table_version
+
+# Horizon of a forecast when none is requested, and the longest one served
+DEFAULT_FORECAST_WEEKS = 26
+MAX_FORECAST_WEEKS = 260
+
+# Seconds during which the predictions requested for a same model are coalesced, and the largest batch
+BATCH_WINDOW = 0.005
+MAX_BATCH_ROWS = 4096
+
+# Number of forecasts kept by the cache of the service
+FORECAST_CACHE_SIZE = 1024
+
+
+class _Batch:
+    """
+    Inputs of the requests coalesced into a batch, and the outputs of its prediction.
+    """
+    def __init__(self):
+        self.inputs: List[np.ndarray] = []
+        self.rows = 0
+        self.closed = threading.Event()
+        self.done = threading.Event()
+        self.outputs: Optional[List[np.ndarray]] = None
+        self.error: Optional[Exception] = None
+
+
+class MicroBatcher:
+    """
+    Coalesces the predictions requested for a same model within window seconds into a single batched predict:
+    the first request of a batch waits for the window to end (or for max_rows rows) and runs it, the other
+    requests wait for their slice of its outputs.
+    """
+    def __init__(self, window: float = BATCH_WINDOW, max_rows: int = MAX_BATCH_ROWS):
+        self.window = window
+        self.max_rows = max_rows
+        self._batches: Dict[Hashable, _Batch] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+
+    def predict(self, key: Hashable, predict: Callable[[np.ndarray], np.ndarray], x: np.ndarray) -> np.ndarray:
+        """
+        Predictions of predict for the inputs x, batched with the concurrent requests of the same key.
+        """
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[key] = _Batch()
+            index = len(batch.inputs)
+            batch.inputs.append(x)
+            batch.rows += len(x)
+            self.requests += 1
+
+            # A full batch is run without waiting for the end of the window, the next requests start a new one
+            if batch.rows >= self.max_rows:
+                del self._batches[key]
+                batch.closed.set()
+
+        if leader:
+            batch.closed.wait(self.window)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+                self.batches += 1
+            self._run(batch, predict)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.outputs[index]
+
+    @staticmethod
+    def _run(batch: _Batch, predict: Callable[[np.ndarray], np.ndarray]) -> None:
+        # Predict the inputs of all the requests at once, and split the outputs back into their requests
+        try:
+            outputs = np.asarray(predict(np.concatenate(batch.inputs))).reshape(-1)
+            batch.outputs = np.split(outputs, np.cumsum([len(x) for x in batch.inputs])[:-1])
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+
+class ForecastCache:
+    """
+    Bounded LRU cache of the forecasts, by model version, exercise, horizon and version of the series.
+    """
+    def __init__(self, max_size: int = FORECAST_CACHE_SIZE):
+        self.max_size = max_size
+        self._forecasts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Forecast]:
+        with self._lock:
+            forecast = self._forecasts.get(key)
+            if forecast is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._forecasts.move_to_end(key)
+            return forecast
+
+    def put(self, key: Hashable, forecast: Forecast) -> None:
+        with self._lock:
+            self._forecasts[key] = forecast
+            self._forecasts.move_to_end(key)
+            while len(self._forecasts) > self.max_size:
+                self._forecasts.popitem(last=False)
+
+
+class ForecastService:
+    """
+    Online forecasts of the exercises, from the models of a models directory and the series store of a data
+    directory: the models are shared with the model registry, the concurrent predictions of a same model are
+    micro-batched and the forecasts are cached until their model or series change.
+    """
+    def __init__(self, registry: ModelRegistry = model_registry, window: float = BATCH_WINDOW,
+                 max_batch_rows: int = MAX_BATCH_ROWS, cache_size: int = FORECAST_CACHE_SIZE):
+        self.registry = registry
+        self.batcher = MicroBatcher(window=window, max_rows=max_batch_rows)
+        self.cache = ForecastCache(max_size=cache_size)
+        self._series: Dict[str, tuple] = {}
+        self._models: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def models(self, models_path: str) -> Dict[str, str]:
+        """
+        Model file of each exercise of a models directory, listed again only when a model is added or replaced.
+        """
+        models_path = os.path.abspath(models_path)
+        current_path = os.path.join(models_path, 'current')
+        if not os.path.isdir(current_path):
+            return {}
+
+        # The directory changes with its files, and the exercises of the global model with its index
+        global_index_path = os.path.join(os.path.dirname(global_model_path(models_path)), 'index.json')
+        version = tuple(os.stat(path).st_mtime_ns for path in (current_path, global_index_path) if os.path.exists(path))
+        with self._lock:
+            cached = self._models.get(models_path)
+        if cached is None or cached[0] != version:
+            cached = (version, list_forecasters(models_path))
+            with self._lock:
+                self._models[models_path] = cached
+        return cached[1]
+
+    def series(self, data_path: str) -> Tuple[SeriesStore, tuple]:
+        """
+        Series store of a data directory and its version, reloaded only when it or the performance table changes.
+        """
+        data_path = os.path.abspath(data_path)
+        store_path = series_store_path(data_path)
+        version = table_version(os.path.join(data_path, 'current/workout_perf.csv')) \
+            + ((os.stat(store_path).st_mtime_ns,) if os.path.exists(store_path) else ())
+        with self._lock:
+            cached = self._series.get(data_path)
+            if cached is None or cached[0] != version:
+                cached = self._series[data_path] = (version, load_series_store(data_path))
+            return cached[1], version
+
+    def forecast(self, exo: str, n_weeks: int, data_path: str, models_path: str) -> Forecast:
+        """
+        Forecast of the next n_weeks weeks of an exercise.
+        Raise a KeyError for an exercise without model or data, and a ValueError for an invalid horizon.
+        """
+        if not 1 <= n_weeks <= MAX_FORECAST_WEEKS:
+            raise ValueError(f"Invalid number of weeks {n_weeks}, expected 1 to {MAX_FORECAST_WEEKS}")
+
+        models = self.models(models_path)
+        if exo not in models:
+            raise KeyError(f"No model found for exercise '{exo}'")
+        series, series_version = self.series(data_path)
+        if exo not in series:
+            raise KeyError(f"No data found for exercise '{exo}'")
+
+        # A forecast only changes with the model file and the series it is computed from, so a cached forecast is
+        # served without loading its model
+        model_path = os.path.abspath(models[exo])
+        stat = os.stat(model_path)
+        model_key = (model_path, stat.st_mtime_ns, stat.st_size, exo)
+        key = model_key + (n_weeks, series_version)
+        forecast = self.cache.get(key)
+        if forecast is not None:
+            return forecast
+
+        model = self.registry.get(model_path)
+        df_exo = exercise_series(exo=exo, series=series)
+        if isinstance(model, GlobalForecaster):
+            model = model.exercise(exo)
+        future_days, future_days_scaled = forecast_dates(df_exo, n_weeks)
+        future_perf_scaled = self.batcher.predict(model_key, model.predict, future_days_scaled)
+        forecast = denormalize_forecast(df_exo, future_days, future_perf_scaled)
+
+        self.cache.put(key, forecast)
+        return forecast
+
+    def stats(self) -> dict:
+        """
+        Counters of the service.
+        """
+        return {
+            "requests": self.batcher.requests,
+            "batches": self.batcher.batches,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+
+# Forecast service shared by the routes of the app
+forecast_service = ForecastService()
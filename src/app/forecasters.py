@@ -0,0 +1,491 @@
+import numpy as np
+import inspect
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .files import atomic_write
+from .instrumentation import epoch_callback
+from .lstm_engine import load_lstm_engine
+
+# Backend used when none is requested for an exercise
+DEFAULT_BACKEND = "lstm"
+
+# Directory of models/current holding the global multi-exercise model
+GLOBAL_MODEL_DIR = "_global"
+
+
+class Forecaster:
+    """
+    Model forecasting the normalized performances of an exercise from its normalized dates.
+    """
+    name = None
+    extension = None
+    params = {}
+
+    def fit(self, x_train: np.ndarray, y_train: np.ndarray,
+            x_val: np.ndarray, y_val: np.ndarray) -> Dict[str, List[float]]:
+        """
+        Fit the model and return its training history ('loss' and 'val_loss' per epoch).
+        """
+        raise NotImplementedError
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """
+        Predict the performances of a batch of dates, in a single call.
+        """
+        raise NotImplementedError
+
+    def save(self, file_path: str) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, file_path: str) -> "Forecaster":
+        raise NotImplementedError
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the parameters of the model.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def code_version(cls) -> str:
+        """
+        Source of the backend, so that changing it invalidates the models it trained.
+        """
+        return inspect.getsource(cls)
+
+
+def _mse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    return float(np.mean((np.asarray(y_true) - np.asarray(y_pred)) ** 2)) if len(y_true) else float("nan")
+
+
+class LSTMForecaster(Forecaster):
+    """
+    Stacked bidirectional LSTM (Keras), keeping the weights of its best validation epoch.
+    """
+    name = "lstm"
+    extension = ".h5"
+    params = {
+        "units": [200, 150, 100, 50],
+        "dropout": 0.2,
+        "epochs": 20,
+        "batch_size": 5,
+    }
+
+    def __init__(self, model=None):
+        self.model = model
+
+    def fit(self, x_train, y_train, x_val, y_val):
+        import tensorflow as tf
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Bidirectional, Dropout, Flatten
+
+        # Clear session
+        tf.keras.backend.clear_session()
+
+        # Define LSTM model
+        model = Sequential()
+        model.add(tf.keras.Input(shape=(1, 1)))
+        for units in self.params["units"]:
+            model.add(Bidirectional(LSTM(units, return_sequences=True)))
+            model.add(Dropout(self.params["dropout"]))
+        model.add(Flatten())
+        model.add(Dense(1))
+
+        # Define the loss and optimizer
+        model.compile(loss='mse', optimizer='adam')
+
+        # Keep the best model based on the validation loss
+        best_weights = _BestWeights()
+
+        # Fit model
+        history = model.fit(
+            x_train.reshape(-1, 1, 1), y_train,
+            validation_data=[x_val.reshape(-1, 1, 1), y_val],
+            epochs=self.params["epochs"],
+            batch_size=self.params["batch_size"],
+            callbacks=[best_weights.callback(), epoch_callback()],
+            verbose=0,
+            shuffle=False
+        )
+        best_weights.restore(model)
+
+        self.model = model
+        return history.history
+
+    def predict(self, x):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, 1, 1)
+        return np.asarray(self.model.predict_on_batch(x)).reshape(-1)
+
+    def save(self, file_path):
+        import h5py
+
+        # Written atomically so that the registry never loads a partially written model
+        with atomic_write(file_path, 'wb') as f:
+            with h5py.File(f, 'w') as h5:
+                self.model.save(h5)
+
+    @classmethod
+    def load(cls, file_path):
+        import tensorflow as tf
+        return cls(model=tf.keras.models.load_model(file_path, compile=False))
+
+    @property
+    def nbytes(self):
+        return int(sum(weights.nbytes for weights in self.model.get_weights()))
+
+
+class _BestWeights:
+    """
+    Keeps the weights of the epoch with the lowest validation loss.
+    """
+    def __init__(self):
+        self.best_val_loss = float("inf")
+        self.weights = None
+
+    def callback(self):
+        import tensorflow as tf
+
+        def on_epoch_end(epoch, logs):
+            val_loss = logs.get("val_loss", float("nan"))
+            if val_loss < self.best_val_loss:
+                self.best_val_loss = val_loss
+                self.weights = callback.model.get_weights()
+
+        callback = tf.keras.callbacks.LambdaCallback(on_epoch_end=on_epoch_end)
+        return callback
+
+    def restore(self, model) -> None:
+        if self.weights is not None:
+            model.set_weights(self.weights)
+
+
+class RidgeTrendForecaster(Forecaster):
+    """
+    Polynomial trend of the dates, fitted in closed form with a ridge penalty.
+    """
+    name = "ridge"
+    extension = ".ridge.npz"
+    params = {
+        "degree": 2,
+        "alpha": 1e-3,
+    }
+
+    def __init__(self, coefs: Optional[np.ndarray] = None):
+        self.coefs = coefs
+
+    def _features(self, x: np.ndarray) -> np.ndarray:
+        return np.vander(np.asarray(x, dtype=np.float64).reshape(-1), self.params["degree"] + 1, increasing=True)
+
+    def fit(self, x_train, y_train, x_val, y_val):
+        # Solve (X'X + alpha I) w = X'y, without penalizing the intercept
+        features = self._features(x_train)
+        penalty = self.params["alpha"] * np.eye(features.shape[1])
+        penalty[0, 0] = 0.0
+        self.coefs = np.linalg.solve(features.T @ features + penalty, features.T @ np.asarray(y_train, dtype=np.float64))
+        return {"loss": [_mse(y_train, self.predict(x_train))], "val_loss": [_mse(y_val, self.predict(x_val))]}
+
+    def predict(self, x):
+        return self._features(x) @ self.coefs
+
+    def save(self, file_path):
+        with atomic_write(file_path, 'wb') as f:
+            np.savez(f, coefs=self.coefs)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as arrays:
+            return cls(coefs=arrays["coefs"])
+
+    @property
+    def nbytes(self):
+        return int(self.coefs.nbytes)
+
+
+class HoltForecaster(Forecaster):
+    """
+    Holt's linear exponential smoothing adapted to irregular dates, its smoothing factors are chosen
+    by a grid search on the one-step-ahead errors (no gradient).
+    """
+    name = "holt"
+    extension = ".holt.npz"
+    params = {
+        "grid": [0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9],
+    }
+
+    def __init__(self, state: Optional[np.ndarray] = None):
+        # Smoothing factors, last date, level and trend
+        self.state = state
+
+    @staticmethod
+    def _smooth(x: np.ndarray, y: np.ndarray, alpha: float, beta: float) -> [np.ndarray, float, float]:
+        # Run the smoothing over the series, returning the one-step-ahead predictions and the final state
+        level, trend = y[0], 0.0
+        if len(y) > 1 and x[1] != x[0]:
+            trend = (y[1] - y[0]) / (x[1] - x[0])
+        predictions = np.empty(len(y))
+        predictions[0] = y[0]
+        for i in range(1, len(y)):
+            step = x[i] - x[i - 1]
+            predictions[i] = level + trend * step
+            previous_level = level
+            level = alpha * y[i] + (1 - alpha) * predictions[i]
+            if step > 0:
+                trend = beta * (level - previous_level) / step + (1 - beta) * trend
+        return predictions, level, trend
+
+    def fit(self, x_train, y_train, x_val, y_val):
+        x = np.asarray(x_train, dtype=np.float64).reshape(-1)
+        y = np.asarray(y_train, dtype=np.float64).reshape(-1)
+
+        # Grid search of the smoothing factors minimizing the one-step-ahead errors
+        best = None
+        for alpha in self.params["grid"]:
+            for beta in self.params["grid"]:
+                predictions, level, trend = self._smooth(x, y, alpha, beta)
+                loss = _mse(y[1:], predictions[1:]) if len(y) > 1 else 0.0
+                if best is None or loss < best[0]:
+                    best = (loss, alpha, beta, level, trend)
+
+        loss, alpha, beta, level, trend = best
+        self.state = np.array([alpha, beta, x[-1], level, trend])
+        return {"loss": [loss], "val_loss": [_mse(y_val, self.predict(x_val))]}
+
+    def predict(self, x):
+        alpha, beta, last_x, level, trend = self.state
+        return level + trend * (np.asarray(x, dtype=np.float64).reshape(-1) - last_x)
+
+    def save(self, file_path):
+        with atomic_write(file_path, 'wb') as f:
+            np.savez(f, state=self.state)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as arrays:
+            return cls(state=arrays["state"])
+
+    @property
+    def nbytes(self):
+        return int(self.state.nbytes)
+
+
+class GlobalForecaster:
+    """
+    Single network forecasting every exercise, from the normalized date and an embedding of the exercise.
+    """
+    name = "global"
+    params = {
+        "embedding_dim": 8,
+        "units": [64, 64],
+        "epochs": 200,
+        "batch_size": 32,
+    }
+
+    def __init__(self, model=None, exercises: Optional[List[str]] = None):
+        self.model = model
+        self.exercises = exercises or []
+        self._ids = {exo: i for i, exo in enumerate(self.exercises)}
+
+    def fit(self, series: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]) -> Dict[str, List[float]]:
+        """
+        Fit the model on the (x_train, y_train, x_val, y_val) normalized series of each exercise.
+        """
+        import tensorflow as tf
+
+        self.exercises = sorted(series)
+        self._ids = {exo: i for i, exo in enumerate(self.exercises)}
+
+        # Stack the series of all the exercises, with the id of their exercise
+        def stack(offset: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            x = np.concatenate([series[exo][offset] for exo in self.exercises]).astype(np.float32)
+            y = np.concatenate([series[exo][offset + 1] for exo in self.exercises]).astype(np.float32)
+            ids = np.concatenate([np.full(len(series[exo][offset]), self._ids[exo]) for exo in self.exercises])
+            return x, ids.astype(np.int32), y
+
+        x_train, ids_train, y_train = stack(0)
+        x_val, ids_val, y_val = stack(2)
+
+        # Clear session
+        tf.keras.backend.clear_session()
+
+        # Define the model: the embedding of the exercise is concatenated to the date
+        date_input = tf.keras.Input(shape=(1,), name="date")
+        exercise_input = tf.keras.Input(shape=(1,), name="exercise", dtype="int32")
+        embedding = tf.keras.layers.Embedding(len(self.exercises), self.params["embedding_dim"])(exercise_input)
+        hidden = tf.keras.layers.Concatenate()([date_input, tf.keras.layers.Flatten()(embedding)])
+        for units in self.params["units"]:
+            hidden = tf.keras.layers.Dense(units, activation="relu")(hidden)
+        output = tf.keras.layers.Dense(1)(hidden)
+        model = tf.keras.Model(inputs=[date_input, exercise_input], outputs=output)
+
+        # Define the loss and optimizer
+        model.compile(loss='mse', optimizer='adam')
+
+        # Keep the best model based on the validation loss
+        best_weights = _BestWeights()
+
+        # Fit model
+        history = model.fit(
+            [x_train, ids_train], y_train,
+            validation_data=[[x_val, ids_val], y_val],
+            epochs=self.params["epochs"],
+            batch_size=self.params["batch_size"],
+            callbacks=[best_weights.callback(), epoch_callback()],
+            verbose=0
+        )
+        best_weights.restore(model)
+
+        self.model = model
+        return history.history
+
+    def predict(self, x: np.ndarray, exo: str) -> np.ndarray:
+        """
+        Predict the performances of an exercise for a batch of dates, in a single call.
+        """
+        x = np.asarray(x, dtype=np.float32).reshape(-1, 1)
+        ids = np.full((len(x), 1), self._ids[exo], dtype=np.int32)
+        return np.asarray(self.model.predict_on_batch([x, ids])).reshape(-1)
+
+    def exercise(self, exo: str) -> "Forecaster":
+        """
+        Per-exercise view of the model, usable wherever a Forecaster is expected.
+        """
+        if exo not in self._ids:
+            raise ValueError(f"Exercise '{exo}' is not known by the global model")
+        return _GlobalExerciseForecaster(self, exo)
+
+    def save(self, file_path: str) -> None:
+        import h5py
+
+        # The exercises are stored in the model file, so that the weights are never loaded with the exercise ids
+        # of another model, and the index listing them without loading the model is written once the model is in place
+        with atomic_write(file_path, 'wb') as f:
+            with h5py.File(f, 'w') as h5:
+                self.model.save(h5)
+                h5.attrs["exercises"] = json.dumps(self.exercises)
+        with atomic_write(_global_index_path(file_path)) as f:
+            json.dump({"exercises": self.exercises}, f, indent=2)
+
+    @classmethod
+    def load(cls, file_path: str) -> "GlobalForecaster":
+        import h5py
+        import tensorflow as tf
+        with h5py.File(file_path, 'r') as h5:
+            if "exercises" in h5.attrs:
+                exercises = json.loads(h5.attrs["exercises"])
+            else:
+                # Model saved before its exercises were stored in it
+                with open(_global_index_path(file_path), 'r') as f:
+                    exercises = json.load(f)["exercises"]
+            return cls(model=tf.keras.models.load_model(h5, compile=False), exercises=exercises)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(weights.nbytes for weights in self.model.get_weights()))
+
+    @classmethod
+    def code_version(cls) -> str:
+        return inspect.getsource(cls)
+
+
+class _GlobalExerciseForecaster(Forecaster):
+    """
+    Forecaster of one exercise backed by the global model.
+    """
+    name = GlobalForecaster.name
+
+    def __init__(self, global_forecaster: GlobalForecaster, exo: str):
+        self.global_forecaster = global_forecaster
+        self.exo = exo
+
+    def predict(self, x):
+        return self.global_forecaster.predict(x, self.exo)
+
+
+def global_model_path(models_dir: str) -> str:
+    """
+    Path of the global multi-exercise model.
+    """
+    return os.path.join(models_dir, "current", GLOBAL_MODEL_DIR, "model.h5")
+
+
+def global_fingerprint_path(models_dir: str) -> str:
+    """
+    Path of the fingerprint of the global multi-exercise model.
+    """
+    return os.path.join(models_dir, "current", GLOBAL_MODEL_DIR, "fingerprint.json")
+
+
+def _global_index_path(model_path: str) -> str:
+    # Index of the exercises of the global model, stored alongside it
+    return os.path.join(os.path.dirname(model_path), "index.json")
+
+
+def global_model_exercises(models_dir: str) -> List[str]:
+    """
+    Exercises served by the global model, if any.
+    """
+    try:
+        if not os.path.exists(global_model_path(models_dir)):
+            return []
+        with open(_global_index_path(global_model_path(models_dir)), 'r') as f:
+            return json.load(f)["exercises"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+# Available forecaster backends, by name
+FORECASTERS = {forecaster.name: forecaster for forecaster in (LSTMForecaster, RidgeTrendForecaster, HoltForecaster)}
+
+
+def forecaster_path(models_dir: str, exo: str, backend: str) -> str:
+    """
+    Path of the model of an exercise trained with a backend.
+    """
+    return os.path.join(models_dir, "current", f"{exo}{FORECASTERS[backend].extension}")
+
+
+def forecaster_backend(file_path: str) -> Optional[str]:
+    """
+    Backend of a model file, from its extension.
+    """
+    # Longest extensions first, so that '.ridge.npz' is not mistaken for another '.npz'
+    for forecaster in sorted(FORECASTERS.values(), key=lambda forecaster: -len(forecaster.extension)):
+        if file_path.endswith(forecaster.extension):
+            return forecaster.name
+    return None
+
+
+def list_forecasters(models_dir: str) -> Dict[str, str]:
+    """
+    Model file of each exercise of models_dir/current.
+    The model of an exercise takes precedence over the global model.
+    """
+    models = {exo: global_model_path(models_dir) for exo in global_model_exercises(models_dir)}
+    for file in sorted(os.listdir(os.path.join(models_dir, "current"))):
+        backend = forecaster_backend(file)
+        if backend is not None:
+            models[file[:-len(FORECASTERS[backend].extension)]] = os.path.join(models_dir, "current", file)
+    return dict(sorted(models.items()))
+
+
+def load_forecaster(file_path: str):
+    """
+    Load a model file with the backend matching its extension.
+    """
+    if os.path.basename(os.path.dirname(file_path)) == GLOBAL_MODEL_DIR:
+        return GlobalForecaster.load(file_path)
+
+    backend = forecaster_backend(file_path)
+    if backend is None:
+        raise ValueError(f"Unknown model file '{file_path}'")
+
+    # An LSTM model is run by its NumPy export when it is up to date, without importing TensorFlow
+    if backend == LSTMForecaster.name:
+        engine = load_lstm_engine(file_path)
+        if engine is not None:
+            return LSTMForecaster(model=engine)
+    return FORECASTERS[backend].load(file_path)
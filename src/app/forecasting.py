@@ -0,0 +1,86 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+from .model_registry import model_registry
+from .forecasters import Forecaster, GlobalForecaster, list_forecasters
+from .series_store import SeriesStore
+
+
+class Forecast(NamedTuple):
+    """
+    Predicted performances of an exercise, one value per forecasted week.
+    """
+    dates: np.ndarray
+    perf: np.ndarray
+
+
+def min_max_range(values: np.ndarray) -> float:
+    """
+    Range used to normalize values between 0 and 1 (1 for constant values, like MinMaxScaler).
+    """
+    value_range = float(values.max() - values.min())
+    return value_range if value_range != 0 else 1.0
+
+
+def exercise_series(exo: str, series: SeriesStore) -> pd.DataFrame:
+    """
+    Get the performance history of an exercise, with the number of days since its first session.
+    """
+    return series.frame(exo)
+
+
+def forecast_dates(df_exo: pd.DataFrame, n_weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dates of the next n_weeks weeks of an exercise, in days since its first session, and normalized like the
+    training dates as the inputs of its model.
+    """
+    # Future dates, in days since the first session, starting from the last session
+    future_days = df_exo['DAYS'].max() + 7 * np.arange(n_weeks, dtype=np.float64)
+    return future_days, (future_days / min_max_range(df_exo['DAYS'].values)).astype(np.float32)
+
+
+def forecast_exercise(model: Forecaster, df_exo: pd.DataFrame, n_weeks: int) -> Forecast:
+    """
+    Forecast the next n_weeks weeks of an exercise with a single batched prediction.
+    """
+    # Normalize the future dates like the training dates and predict all the horizons at once
+    future_days, future_days_scaled = forecast_dates(df_exo, n_weeks)
+    return denormalize_forecast(df_exo, future_days, model.predict(future_days_scaled))
+
+
+def denormalize_forecast(df_exo: pd.DataFrame, future_days: np.ndarray, future_perf_scaled: np.ndarray) -> Forecast:
+    """
+    Forecast of an exercise from the normalized predictions of its model for the future dates.
+    """
+    # Denormalize the predicted performances
+    perf_min = df_exo['PERF'].min()
+    future_perf = future_perf_scaled * min_max_range(df_exo['PERF'].values) + perf_min
+
+    # Convert the future dates back to dates
+    future_dates = (df_exo['DATE'].min() + pd.to_timedelta(future_days, unit='D')).values
+
+    return Forecast(dates=future_dates, perf=future_perf)
+
+
+def forecast_exercises(exercises: Union[str, List[str]], series: SeriesStore, models_path: str,
+                       n_weeks: int) -> Dict[str, Forecast]:
+    """
+    Forecast the next n_weeks weeks of one or several exercises, with one prediction per model.
+    """
+    if isinstance(exercises, str):
+        exercises = [exercises]
+
+    models = list_forecasters(models_path)
+
+    forecasts = {}
+    for exo in exercises:
+        if exo not in models:
+            raise ValueError(f"No model found for exercise '{exo}'")
+        df_exo = exercise_series(exo=exo, series=series)
+        model = model_registry.get(models[exo])
+        if isinstance(model, GlobalForecaster):
+            model = model.exercise(exo)
+        forecasts[exo] = forecast_exercise(model=model, df_exo=df_exo, n_weeks=n_weeks)
+
+    return forecasts
@@ -0,0 +1,210 @@
+import functools
+import glob
+import json
+import os
+import resource
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Directory of the records of each run, one JSON lines file per run
+metrics_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           'logs/metrics')
+
+# Environment variable holding the id of the current run, inherited by the worker processes
+RUN_ID_VARIABLE = "WORKOUT_METRICS_RUN_ID"
+
+# Number of most recent runs read by the /metrics endpoint
+METRICS_RUNS = 20
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def new_run(name: str = "run") -> str:
+    """
+    Start a new run: the next records are persisted in their own file.
+    """
+    run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{name}-{os.getpid()}"
+    os.environ[RUN_ID_VARIABLE] = run_id
+    return run_id
+
+
+def current_run() -> str:
+    """
+    Id of the current run, started on first use if needed.
+    """
+    return os.environ.get(RUN_ID_VARIABLE) or new_run()
+
+
+def _rss_bytes() -> Tuple[int, int]:
+    # Current and peak resident set size of the process
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        current = peak
+    return current, peak
+
+
+def _count_rows(result: Any) -> Optional[int]:
+    # Number of rows of a returned table, or of the first table of a returned tuple
+    if hasattr(result, "shape") and hasattr(result, "columns"):
+        return int(len(result))
+    if isinstance(result, tuple):
+        for value in result:
+            rows = _count_rows(value)
+            if rows is not None:
+                return rows
+    return None
+
+
+def record(stage: str, wall: float, cpu: float, rows: Optional[int] = None, item: Optional[str] = None,
+           ok: bool = True, **extra) -> dict:
+    """
+    Persist the record of a stage in the file of the current run.
+    """
+    rss, peak_rss = _rss_bytes()
+    entry = {"run": current_run(), "stage": stage, "item": item, "time": datetime.now().isoformat(),
+             "wall_seconds": wall, "cpu_seconds": cpu, "rss_bytes": rss, "peak_rss_bytes": peak_rss,
+             "rows": rows, "ok": ok, "pid": os.getpid(), **extra}
+
+    # Append the record as a single line, so that concurrent processes do not interleave their records
+    os.makedirs(metrics_dir, exist_ok=True)
+    line = json.dumps(entry, default=str) + "\n"
+    with _lock:
+        with open(os.path.join(metrics_dir, f"{entry['run']}.jsonl"), 'a') as f:
+            f.write(line)
+    return entry
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def instrumented(stage: Optional[str] = None, item: Optional[str] = None,
+                 rows: Callable[[Any], Optional[int]] = _count_rows, check: bool = True):
+    """
+    Record the wall time, CPU time (of the process, including the threads of the libraries), memory and rows
+    processed of each call of the decorated function.
+    item names the argument identifying what is processed (e.g. the exercise), rows counts the rows of the result.
+    A call raising an exception, or returning False, None or an empty table when check is set, is recorded as failed.
+    """
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            label = kwargs.get(item) if item is not None else None
+            _stack().append((name, label))
+            start, start_cpu = time.perf_counter(), time.process_time()
+            result, raised = None, True
+            try:
+                result = func(*args, **kwargs)
+                raised = False
+                return result
+            finally:
+                _stack().pop()
+                try:
+                    row_count = rows(result) if result is not None else None
+                    record(stage=name, wall=time.perf_counter() - start, cpu=time.process_time() - start_cpu,
+                           rows=row_count, item=label,
+                           ok=not raised and (not check or (result is not None and result is not False
+                                                            and row_count != 0)))
+                except Exception:
+                    # Instrumentation never breaks the instrumented code
+                    pass
+
+        return wrapper
+
+    return decorator
+
+
+def epoch_callback():
+    """
+    Keras callback recording the duration and losses of each epoch, under the stage being run.
+    """
+    import tensorflow as tf
+
+    stage, item = _stack()[-1] if _stack() else ("fit", None)
+    epoch_start = {}
+
+    def on_epoch_begin(epoch, logs=None):
+        epoch_start["wall"], epoch_start["cpu"] = time.perf_counter(), time.process_time()
+
+    def on_epoch_end(epoch, logs=None):
+        logs = logs or {}
+        try:
+            record(stage=f"{stage}.epoch", wall=time.perf_counter() - epoch_start["wall"],
+                   cpu=time.process_time() - epoch_start["cpu"], item=item, epoch=epoch + 1,
+                   loss=logs.get("loss"), val_loss=logs.get("val_loss"))
+        except Exception:
+            pass
+
+    return tf.keras.callbacks.LambdaCallback(on_epoch_begin=on_epoch_begin, on_epoch_end=on_epoch_end)
+
+
+def load_records(runs: int = METRICS_RUNS) -> List[dict]:
+    """
+    Records of the most recent runs, oldest first.
+    """
+    files = sorted(glob.glob(os.path.join(metrics_dir, "*.jsonl")), key=os.path.getmtime)[-runs:]
+    records = []
+    for file in files:
+        with open(file, 'r') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Skip a line being written
+                    continue
+    return records
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_metrics(records: List[dict]) -> str:
+    """
+    Prometheus text exposition of the last record of each stage (and item), with its number of calls and failures.
+    """
+    last: Dict[tuple, dict] = {}
+    calls: Dict[tuple, int] = {}
+    failures: Dict[tuple, int] = {}
+    for entry in records:
+        key = (entry["stage"], entry.get("item"))
+        last[key] = entry
+        calls[key] = calls.get(key, 0) + 1
+        failures[key] = failures.get(key, 0) + (not entry.get("ok", True))
+
+    gauges = [("wall_seconds", "Wall time of the last call of the stage, in seconds."),
+              ("cpu_seconds", "CPU time of the last call of the stage, in seconds."),
+              ("peak_rss_bytes", "Peak resident memory of the process at the end of the last call of the stage."),
+              ("rows", "Rows processed by the last call of the stage.")]
+
+    lines = []
+    for field, description in gauges:
+        lines += [f"# HELP workout_stage_{field} {description}", f"# TYPE workout_stage_{field} gauge"]
+        for (stage, item), entry in sorted(last.items(), key=lambda kv: (kv[0][0], str(kv[0][1]))):
+            if entry.get(field) is not None:
+                lines.append(f"workout_stage_{field}{{{_labels(stage, item)}}} {entry[field]}")
+
+    for name, counts, description in (("calls", calls, "Calls of the stage in the recent runs."),
+                                      ("failures", failures, "Failed calls of the stage in the recent runs.")):
+        lines += [f"# HELP workout_stage_{name} {description}", f"# TYPE workout_stage_{name} gauge"]
+        for (stage, item), count in sorted(counts.items(), key=lambda kv: (kv[0][0], str(kv[0][1]))):
+            lines.append(f"workout_stage_{name}{{{_labels(stage, item)}}} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _labels(stage: str, item: Optional[str]) -> str:
+    labels = f'stage="{_escape(stage)}"'
+    if item is not None:
+        labels += f',item="{_escape(item)}"'
+    return labels
@@ -1,11 +1,12 @@
 import os
 
 from .logger_config import configure_logger
-from .data_collection import (collect_workout_data, fetch_exercise_data, filter_exercise_data,
-                              enrich_workout_data, aggregate_workout_data)
-from .models_training import train_models, archive_models
-from .data_analytics import (plot_predicted_volume, plot_distribution_workout_types,
-                             plot_distribution_muscle_groups, plot_weight_reps_over_time)
+from .instrumentation import instrumented, new_run
+from .pipeline import MAX_PIPELINE_WORKERS, Node, Pipeline
+from .paths import DEFAULT_ATHLETE, AthletePaths, athlete_paths, create_athlete_dirs, list_athletes
+
+# The modules of the jobs (pandas, Keras, matplotlib, plotly...) are only imported when a job runs,
+# so that importing the jobs stays cheap for the scheduler
 
 # Configure logging for the scheduler
 scheduler_logger = configure_logger(name='scheduler')
@@ -19,37 +20,67 @@ models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.pat
 # Path to the static directory
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 
+# Number of processes training the models in parallel
+training_workers = max(1, (os.cpu_count() or 1) // 2)
+
+# Path to the exercise catalog, shared by the athletes
+catalog_path = os.path.join(data_dir, 'kaggle/megaGymDataset.csv')
+
+# Path to the catalog titles of the exercise names that are not titles of the catalog, shared by the athletes
+aliases_path = os.path.join(data_dir, 'exercise_aliases.json')
+
+
+def _athlete_paths(athlete: str) -> AthletePaths:
+    # Directories of the partition of the athlete, created if needed
+    paths = athlete_paths(athlete, data_dir=data_dir, models_dir=models_dir, static_dir=static_dir)
+    create_athlete_dirs(paths)
+    return paths
+
 
-def data_ingestion_job():
-    scheduler_logger.info("Running data ingestion job...")
+@instrumented(check=False)
+def data_ingestion_job(athlete=DEFAULT_ATHLETE, streaming=False, chunk_rows=None):
+    new_run(name="data_ingestion")
+    scheduler_logger.info(f"Running data ingestion job for athlete '{athlete}'...")
+    paths = _athlete_paths(athlete)
 
-    workout_data = collect_workout_data(input_path=os.path.join(data_dir, 'workouts'),
-                                        output_path=os.path.join(data_dir, 'current'))
+    if streaming:
+        return _streaming_data_ingestion(paths=paths, chunk_rows=chunk_rows)
+
+    from .data_collection import (collect_workout_data, fetch_exercise_data, filter_exercise_data,
+                                  enrich_workout_data, aggregate_workout_data)
+    from .exercise_names import ExerciseResolver, alias_titles
+
+    workout_data = collect_workout_data(input_path=os.path.join(paths.data_dir, 'workouts'),
+                                        output_path=os.path.join(paths.data_dir, 'current'),
+                                        incremental=True)
     if workout_data.empty:
         scheduler_logger.error("No workout data was collected.")
         return
 
-    exercise_data = fetch_exercise_data(file_path=os.path.join(data_dir, 'kaggle/megaGymDataset.csv'))
-    if exercise_data.empty:
+    exercise_data = fetch_exercise_data(file_path=catalog_path)
+    if exercise_data is None:
         scheduler_logger.error("No exercise data was fetched.")
         return
 
+    resolver = ExerciseResolver(catalog=exercise_data, aliases_path=aliases_path)
     filtered_exercise_data = filter_exercise_data(workout_data=workout_data,
                                                   exercises=exercise_data,
-                                                  output_path=os.path.join(data_dir, 'current'))
+                                                  output_path=os.path.join(paths.data_dir, 'current'),
+                                                  resolver=resolver)
     if filtered_exercise_data.empty:
         scheduler_logger.error("No exercise data was filtered.")
         return
 
     enriched_workout_data = enrich_workout_data(workout_data=workout_data,
                                                 filtered_exercises=filtered_exercise_data,
-                                                output_path=os.path.join(data_dir, 'current'))
+                                                output_path=os.path.join(paths.data_dir, 'current'),
+                                                aliases=alias_titles(resolver.aliases))
     if enriched_workout_data.empty:
         scheduler_logger.error("No workout data was enriched.")
         return
 
     workout_day_exercises, workout_days = aggregate_workout_data(enriched_workouts=enriched_workout_data,
-                                                                 output_path=os.path.join(data_dir, 'current'))
+                                                                 output_path=os.path.join(paths.data_dir, 'current'))
     if workout_day_exercises.empty and workout_days.empty:
         scheduler_logger.error("No workout data was aggregated.")
         return
@@ -58,18 +89,50 @@ def data_ingestion_job():
     return
 
 
-def model_training_job(max_models=None):
-    scheduler_logger.info("Running model training job...")
+def _streaming_data_ingestion(paths: AthletePaths, chunk_rows=None):
+    from .data_collection import STREAMING_CHUNK_ROWS, fetch_exercise_data, stream_workout_data
+    from .exercise_names import ExerciseResolver
+
+    exercise_data = fetch_exercise_data(file_path=catalog_path)
+    if exercise_data is None:
+        scheduler_logger.error("No exercise data was fetched.")
+        return
+
+    # Collect, filter, enrich and aggregate the workout files by chunks, in bounded memory
+    summary = stream_workout_data(input_path=os.path.join(paths.data_dir, 'workouts'),
+                                  exercises=exercise_data,
+                                  output_path=os.path.join(paths.data_dir, 'current'),
+                                  chunk_rows=chunk_rows or STREAMING_CHUNK_ROWS,
+                                  resolver=ExerciseResolver(catalog=exercise_data, aliases_path=aliases_path))
+    if summary is None:
+        scheduler_logger.error("No workout data was streamed.")
+        return
+
+    scheduler_logger.info("Data ingestion job complete.")
+    return
+
+
+@instrumented(check=False)
+def model_training_job(max_models=None, n_workers=training_workers, force=False, mode="per_exercise",
+                       athlete=DEFAULT_ATHLETE):
+    new_run(name="model_training")
+    scheduler_logger.info(f"Running model training job for athlete '{athlete}'...")
+    paths = _athlete_paths(athlete)
+
+    from .models_training import train_models, archive_models
 
     models_trained = train_models(max_models=max_models,
                                   min_exo_occurrence=10,
-                                  data_path=data_dir,
-                                  models_dir=models_dir)
+                                  data_path=paths.data_dir,
+                                  models_dir=paths.models_dir,
+                                  n_workers=n_workers,
+                                  force=force,
+                                  mode=mode)
     if not models_trained:
         scheduler_logger.error("Models were not trained.")
         return
 
-    models_archived = archive_models(models_dir=models_dir)
+    models_archived = archive_models(models_dir=paths.models_dir)
     if not models_archived:
         scheduler_logger.error("Models were not archived.")
         return
@@ -78,41 +141,153 @@ def model_training_job(max_models=None):
     return
 
 
-def data_analytics_job():
-    scheduler_logger.info("Running data analytics job...")
+@instrumented(check=False)
+def data_analytics_job(max_workers=None, athlete=DEFAULT_ATHLETE):
+    new_run(name="data_analytics")
+    scheduler_logger.info(f"Running data analytics job for athlete '{athlete}'...")
+    paths = _athlete_paths(athlete)
 
-    predicted_volume_plotted = plot_predicted_volume(models_path=models_dir,
-                                                     data_path=data_dir,
-                                                     static_path=static_dir,
-                                                     n_weeks=26)
-    if not predicted_volume_plotted:
-        scheduler_logger.error("Predicted volumes were not plotted.")
-        return
+    from .data_analytics import MAX_PLOT_WORKERS, generate_plots
 
-    distribution_workout_types_plotted = plot_distribution_workout_types(data_path=data_dir,
-                                                                         static_path=static_dir)
-    if not distribution_workout_types_plotted:
-        scheduler_logger.error("Distribution of workout types was not plotted.")
-        return
-
-    distribution_muscle_groups_plotted = plot_distribution_muscle_groups(data_path=data_dir,
-                                                                         static_path=static_dir)
-    if not distribution_muscle_groups_plotted:
-        scheduler_logger.error("Distribution of muscle groups was not plotted.")
-        return
-
-    weight_reps_over_time_plotted = plot_weight_reps_over_time(data_path=data_dir,
-                                                               static_path=static_dir)
-    if not weight_reps_over_time_plotted:
-        scheduler_logger.error("Weight and reps over time were not plotted.")
+    plot_results = generate_plots(models_path=paths.models_dir,
+                                  data_path=paths.data_dir,
+                                  static_path=paths.static_dir,
+                                  n_weeks=26,
+                                  max_workers=max_workers or MAX_PLOT_WORKERS)
+    failed_plots = [result.name for result in plot_results if not result.plotted]
+    if failed_plots:
+        scheduler_logger.error(f"{len(failed_plots)} plots were not generated: {failed_plots}")
         return
 
     scheduler_logger.info("Data analytics job complete.")
     return
 
 
-def data_pipeline_stage():
-    data_ingestion_job()
-    model_training_job()
-    data_analytics_job()
+def pipeline_nodes(athlete=DEFAULT_ATHLETE, n_workers=training_workers, n_weeks=26, force=False):
+    paths = _athlete_paths(athlete)
+    data_dir, models_dir, static_dir = paths.data_dir, paths.models_dir, paths.static_dir
+    current_dir = os.path.join(data_dir, 'current')
+    workout_data_path = os.path.join(current_dir, 'workout_data.csv')
+    exercises_path = os.path.join(current_dir, 'workout_exercises.csv')
+    enriched_path = os.path.join(current_dir, 'enriched_workout_data.csv')
+    day_exercises_path = os.path.join(current_dir, 'workout_day_exercises.csv')
+    days_path = os.path.join(current_dir, 'workout_days.csv')
+    perf_path = os.path.join(current_dir, 'workout_perf.csv')
+    series_path = os.path.join(current_dir, 'workout_series.npz')
+    plots_dir = os.path.join(static_dir, 'plots')
+
+    def collect():
+        from .data_collection import collect_workout_data
+        return not collect_workout_data(input_path=os.path.join(data_dir, 'workouts'), output_path=current_dir,
+                                        incremental=True).empty
+
+    def filter_catalog():
+        from .data_collection import fetch_exercise_data, filter_exercise_data
+        from .exercise_names import ExerciseResolver
+        from .storage import read_table
+        exercise_data = fetch_exercise_data(file_path=catalog_path)
+        if exercise_data is None:
+            return False
+        resolver = ExerciseResolver(catalog=exercise_data, aliases_path=aliases_path)
+        return not filter_exercise_data(workout_data=read_table(workout_data_path), exercises=exercise_data,
+                                        output_path=current_dir, resolver=resolver).empty
+
+    def enrich():
+        from .data_collection import enrich_workout_data
+        from .exercise_names import alias_titles, load_aliases
+        from .storage import read_table
+        return not enrich_workout_data(workout_data=read_table(workout_data_path),
+                                       filtered_exercises=read_table(exercises_path),
+                                       output_path=current_dir,
+                                       aliases=alias_titles(load_aliases(aliases_path))).empty
+
+    def aggregate():
+        from .data_collection import aggregate_workout_data
+        from .storage import read_table
+        workout_day_exercises, workout_days = aggregate_workout_data(enriched_workouts=read_table(enriched_path),
+                                                                     output_path=current_dir)
+        return not (workout_day_exercises.empty and workout_days.empty)
+
+    def preprocess():
+        from .models_training import load_and_preprocess_data
+        return load_and_preprocess_data(min_exo_occurrence=10, data_path=data_dir)[1] is not None
+
+    def train():
+        from .models_training import train_models
+        return train_models(max_models=None, min_exo_occurrence=10, data_path=data_dir, models_dir=models_dir,
+                            n_workers=n_workers, force=force)
+
+    def archive():
+        from .models_training import archive_models
+        return archive_models(models_dir=models_dir)
+
+    def plot(name):
+        def plot_summary():
+            from . import data_analytics
+            return getattr(data_analytics, f"plot_{name}")(data_path=data_dir, static_path=static_dir,
+                                                           output_format="json")
+        return plot_summary
+
+    def plot_predicted_volume():
+        from .data_analytics import plot_predicted_volume
+        return plot_predicted_volume(models_path=models_dir, data_path=data_dir, static_path=static_dir,
+                                     n_weeks=n_weeks, output_format="json")
+
+    ingestion_modules = [f'{__package__}.data_collection', f'{__package__}.exercise_catalog',
+                         f'{__package__}.exercise_names', f'{__package__}.storage']
+    training_modules = [f'{__package__}.models_training', f'{__package__}.forecasters', f'{__package__}.forecasting',
+                        f'{__package__}.lstm_engine', f'{__package__}.model_store', f'{__package__}.series_store',
+                        f'{__package__}.storage']
+    analytics_modules = [f'{__package__}.data_analytics', f'{__package__}.storage']
+
+    return [
+        Node(name='collect', func=collect, inputs=[os.path.join(data_dir, 'workouts')],
+             outputs=[workout_data_path], modules=ingestion_modules),
+        Node(name='filter_catalog', func=filter_catalog, inputs=[workout_data_path, catalog_path, aliases_path],
+             outputs=[exercises_path], modules=ingestion_modules),
+        Node(name='enrich', func=enrich, inputs=[workout_data_path, exercises_path, aliases_path],
+             outputs=[enriched_path], modules=ingestion_modules),
+        Node(name='aggregate', func=aggregate, inputs=[enriched_path],
+             outputs=[day_exercises_path, days_path], modules=ingestion_modules),
+        Node(name='preprocess', func=preprocess, inputs=[workout_data_path],
+             outputs=[perf_path, series_path], modules=training_modules),
+        Node(name='train', func=train, inputs=[perf_path, series_path],
+             outputs=[os.path.join(models_dir, 'current'), os.path.join(models_dir, 'loss')],
+             modules=training_modules),
+        Node(name='archive', func=archive, inputs=[os.path.join(models_dir, 'current')],
+             outputs=[os.path.join(models_dir, 'versions')], modules=training_modules),
+        Node(name='plot_predicted_volume', func=plot_predicted_volume,
+             inputs=[os.path.join(models_dir, 'current'), perf_path, series_path],
+             outputs=[os.path.join(plots_dir, 'predicted_volume')], modules=analytics_modules + training_modules,
+             params={'n_weeks': n_weeks}),
+        Node(name='plot_distribution_workout_types', func=plot('distribution_workout_types'), inputs=[days_path],
+             outputs=[os.path.join(plots_dir, 'distribution_workout_types.json')], modules=analytics_modules),
+        Node(name='plot_distribution_muscle_groups', func=plot('distribution_muscle_groups'),
+             inputs=[enriched_path],
+             outputs=[os.path.join(plots_dir, 'distribution_muscle_groups.json')], modules=analytics_modules),
+        Node(name='plot_weight_reps_over_time', func=plot('weight_reps_over_time'), inputs=[day_exercises_path],
+             outputs=[os.path.join(plots_dir, 'weight_reps_over_time.json')], modules=analytics_modules),
+    ]
+
+
+@instrumented(check=False)
+def data_pipeline_stage(max_workers=MAX_PIPELINE_WORKERS, force=False, athletes=None):
+    new_run(name="data_pipeline")
+    scheduler_logger.info("Running data pipeline stage...")
+
+    # Run the pipeline of each athlete on its own partition, with its own state: only the nodes whose inputs
+    # or code changed since their last successful run are run
+    failed_nodes = []
+    for athlete in athletes or list_athletes(data_dir):
+        scheduler_logger.info(f"Running data pipeline of athlete '{athlete}'...")
+        state_path = os.path.join(_athlete_paths(athlete).data_dir, 'current/pipeline_state.json')
+        pipeline = Pipeline(nodes=pipeline_nodes(athlete=athlete, force=force), state_path=state_path)
+        results = pipeline.run(max_workers=max_workers, force=force)
+        failed_nodes += [f"{athlete}/{result.name}" for result in results if result.status in ("failed", "blocked")]
+
+    if failed_nodes:
+        scheduler_logger.error(f"Pipeline nodes were not run: {failed_nodes}")
+        return
+
+    scheduler_logger.info("Data pipeline stage complete.")
     return
@@ -1,29 +1,141 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+from typing import Dict, Optional
+
+# Get absolute path to the project root
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Directory of the log files, one per logger
+logs_dir = os.path.join(project_root, "logs")
+
+# Format of the log messages
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_lock = threading.RLock()
+
+# Handler enqueueing the records, shared by all the loggers of the process, its queue set on first use
+_queue_handler = logging.handlers.QueueHandler(None)
+
+# Listener writing the records of the queue, only run by the process owning the queue
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class LogRouter(logging.Handler):
+    """
+    Write each record to the file of its logger (logs/{name}.log) and to the console.
+    Only used by the listener thread, so the files are written by a single writer.
+    """
+
+    def __init__(self, directory: str = logs_dir):
+        super().__init__()
+        self.directory = directory
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.console_handler = logging.StreamHandler()
+        self.console_handler.setFormatter(self.formatter)
+        self.file_handlers: Dict[str, logging.FileHandler] = {}
+
+    def _file_handler(self, name: str) -> logging.FileHandler:
+        # Open the file of a logger on its first record
+        if name not in self.file_handlers:
+            file_handler = logging.FileHandler(os.path.join(self.directory, f"{name}.log"))
+            file_handler.setFormatter(self.formatter)
+            self.file_handlers[name] = file_handler
+        return self.file_handlers[name]
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._file_handler(record.name).handle(record)
+        self.console_handler.handle(record)
+
+    def close(self) -> None:
+        for file_handler in self.file_handlers.values():
+            file_handler.close()
+        self.file_handlers.clear()
+        super().close()
+
+
+def _start_listener() -> None:
+    global _listener
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, LogRouter())
+    _listener.start()
+
+    # Write the records left in the queue at exit, before multiprocessing closes its queues
+    atexit.unregister(_stop_listener)
+    atexit.register(_stop_listener)
+
+
+def _stop_listener() -> None:
+    global _listener
+    # Write the records left in the queue, then close the files
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def start_log_listener(log_queue=None):
+    """
+    Write the records of the process, and of the child processes given the returned queue, from a background thread.
+    Pass a multiprocessing queue to funnel the logs of several processes to this single writer.
+    """
+    with _lock:
+        if _listener is not None and (log_queue is None or log_queue is _queue_handler.queue):
+            return _queue_handler.queue
+        _stop_listener()
+        _queue_handler.queue = log_queue if log_queue is not None else queue.SimpleQueue()
+        _start_listener()
+        return _queue_handler.queue
+
+
+def use_log_queue(log_queue) -> None:
+    """
+    Enqueue the records of the process (e.g. a child process of run.py) in the queue of a listener of another process.
+    """
+    with _lock:
+        _stop_listener()
+        _queue_handler.queue = log_queue
+
+
+def _after_fork() -> None:
+    global _listener
+    # The listener thread is not copied to a forked child: the child writes the records of its own queue,
+    # unless it shares a multiprocessing queue with the process of the listener
+    if _listener is not None:
+        _listener = None
+        if isinstance(_queue_handler.queue, queue.SimpleQueue):
+            _queue_handler.queue = queue.SimpleQueue()
+            _start_listener()
+
+
+def flush_logs() -> None:
+    """
+    Wait until the records enqueued by the process are written, e.g. before reading a log file in the tests.
+    """
+    with _lock:
+        if _listener is not None:
+            _stop_listener()
+            _start_listener()
 
 
 def configure_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # Get absolute path to the project root
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # Enqueue the records instead of writing them, the listener writes them to logs/{name}.log and to the console
+    with _lock:
+        if _queue_handler.queue is None:
+            start_log_listener()
 
-    # Create file handler which logs even debug messages
-    file_handler = logging.FileHandler(os.path.join(project_root, f"logs/{name}.log"))
-    file_handler.setLevel(level)
+        # Install a single queue handler, so that configuring a logger again does not duplicate its records
+        if not any(isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers):
+            logger.addHandler(_queue_handler)
 
-    # Create console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-
-    # Create formatter and add it to the handlers
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    return logger
 
-    # Add the handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
 
-    return logger
+os.register_at_fork(after_in_child=_after_fork)
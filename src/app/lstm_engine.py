@@ -0,0 +1,193 @@
+import numpy as np
+import json
+import os
+from typing import List, Optional
+
+from .files import atomic_write
+
+# Extension of the NumPy export of a Keras LSTM model, written next to it
+LSTM_BUNDLE_EXTENSION = ".lstm.npz"
+
+# Largest difference allowed between the predictions of an export and of its Keras model
+EXPORT_TOLERANCE = 1e-5
+
+# Normalized dates on which an export is validated, beyond the training range to cover the forecasts
+VALIDATION_DATES = np.linspace(0.0, 2.0, 101, dtype=np.float32)
+
+
+def lstm_bundle_path(model_path: str) -> str:
+    """
+    Path of the NumPy export of a Keras model file.
+    """
+    return f"{os.path.splitext(model_path)[0]}{LSTM_BUNDLE_EXTENSION}"
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _lstm(i: np.ndarray, f: np.ndarray, g: np.ndarray, o: np.ndarray, recurrent_kernel: np.ndarray) -> np.ndarray:
+    # Run an LSTM over the input projections of its gates for all the timesteps, from a zero initial state
+    batch, timesteps, units = i.shape
+    h = np.zeros((batch, units), dtype=i.dtype)
+    c = np.zeros((batch, units), dtype=i.dtype)
+    outputs = np.empty((batch, timesteps, units), dtype=i.dtype)
+    for t in range(timesteps):
+        # The recurrent kernel is in Keras' gate order (i, f, c, o)
+        ri, rf, rg, ro = np.split(h @ recurrent_kernel, 4, axis=1) if t > 0 else (0, 0, 0, 0)
+        c = _sigmoid(f[:, t] + rf) * c + _sigmoid(i[:, t] + ri) * np.tanh(g[:, t] + rg)
+        h = _sigmoid(o[:, t] + ro) * np.tanh(c)
+        outputs[:, t] = h
+    return outputs
+
+
+def _gate_columns(weights: np.ndarray, units: int) -> list:
+    # Split the columns of Keras weights into its gates (i, f, c, o)
+    return [weights[..., k * units:(k + 1) * units] for k in range(4)]
+
+
+class NumpyLSTM:
+    """
+    NumPy implementation of the inference of the Bidirectional LSTM / Dropout / Flatten / Dense stack of the LSTM
+    backend, from the weights of the Keras model. The input projections of both directions of a layer are computed
+    with a single product for all the timesteps, and the dropout is the identity at inference.
+
+    The input kernels of both directions are stored side by side with the forget gates last: from a zero state,
+    a single timestep (the dates of the forecasts) depends neither on the forget gates nor on the recurrent weights,
+    which are then left out of the product.
+    """
+
+    def __init__(self, layers: List[dict]):
+        self.layers = layers
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyLSTM":
+        layers = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == "Bidirectional":
+                configs = [layer.forward_layer.get_config(), layer.backward_layer.get_config()]
+                if layer.merge_mode != "concat" or any(
+                        type(direction).__name__ != "LSTM" or config["activation"] != "tanh"
+                        or config["recurrent_activation"] != "sigmoid" or not config["use_bias"]
+                        or not config["return_sequences"] or config.get("stateful")
+                        for direction, config in zip((layer.forward_layer, layer.backward_layer), configs)):
+                    raise ValueError(f"Unsupported bidirectional layer '{layer.name}'")
+
+                units = int(configs[0]["units"])
+                forward_kernel, forward_recurrent, forward_bias, backward_kernel, backward_recurrent, backward_bias \
+                    = layer.get_weights()
+
+                # Columns (i, c, o) of the forward then backward direction, then their forget gates
+                def gates_layout(forward: np.ndarray, backward: np.ndarray) -> np.ndarray:
+                    (fi, ff, fg, fo), (bi, bf, bg, bo) = _gate_columns(forward, units), _gate_columns(backward, units)
+                    return np.ascontiguousarray(np.concatenate([fi, fg, fo, bi, bg, bo, ff, bf], axis=-1))
+
+                layers.append({"type": "bidirectional_lstm", "units": units,
+                               "kernel": gates_layout(forward_kernel, backward_kernel),
+                               "bias": gates_layout(forward_bias, backward_bias),
+                               "forward_recurrent": forward_recurrent, "backward_recurrent": backward_recurrent})
+            elif kind == "Dense":
+                if layer.get_config()["activation"] != "linear" or not layer.get_config()["use_bias"]:
+                    raise ValueError(f"Unsupported dense layer '{layer.name}'")
+                kernel, bias = layer.get_weights()
+                layers.append({"type": "dense", "kernel": kernel, "bias": bias})
+            elif kind == "Flatten":
+                layers.append({"type": "flatten"})
+            elif kind not in ("Dropout", "InputLayer"):
+                raise ValueError(f"Unsupported layer '{layer.name}' ({kind})")
+        return cls(layers)
+
+    def predict_on_batch(self, x: np.ndarray) -> np.ndarray:
+        """
+        Outputs of the model for a batch of sequences, like the Keras model.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            if layer["type"] == "bidirectional_lstm":
+                x = self._bidirectional_lstm(layer, x)
+            elif layer["type"] == "flatten":
+                x = x.reshape(len(x), -1)
+            else:
+                x = x @ layer["kernel"] + layer["bias"]
+        return x
+
+    @staticmethod
+    def _bidirectional_lstm(layer: dict, x: np.ndarray) -> np.ndarray:
+        batch, timesteps = x.shape[:2]
+        units = layer["units"]
+
+        # A single matrix product for the batch and the timesteps, rather than one per sequence
+        columns = 6 * units if timesteps == 1 else 8 * units
+        projected = x.reshape(-1, x.shape[-1]) @ layer["kernel"][:, :columns] + layer["bias"][:columns]
+        projected = projected.reshape(batch, timesteps, columns)
+
+        if timesteps == 1:
+            # From a zero state: c = i * g and h = o * tanh(c), in both directions at once
+            i, g, o = np.split(projected.reshape(batch, 1, 2, 3, units), 3, axis=3)
+            h = _sigmoid(o) * np.tanh(_sigmoid(i) * np.tanh(g))
+            return h.reshape(batch, 1, 2 * units)
+
+        fi, fg, fo, bi, bg, bo, ff, bf = np.split(projected, 8, axis=-1)
+        forward = _lstm(fi, ff, fg, fo, layer["forward_recurrent"])
+        backward = _lstm(bi[:, ::-1], bf[:, ::-1], bg[:, ::-1], bo[:, ::-1], layer["backward_recurrent"])[:, ::-1]
+        return np.concatenate([forward, backward], axis=-1)
+
+    def get_weights(self) -> List[np.ndarray]:
+        return [weights for layer in self.layers for weights in layer.values() if isinstance(weights, np.ndarray)]
+
+    def save(self, file_path: str) -> None:
+        # The layers are stored as a JSON spec and their weights as arrays, so that no pickle is needed to load them
+        spec, arrays = [], {}
+        for i, layer in enumerate(self.layers):
+            spec.append({key: value for key, value in layer.items() if not isinstance(value, np.ndarray)})
+            arrays.update({f"{i}/{key}": value for key, value in layer.items() if isinstance(value, np.ndarray)})
+
+        # Written atomically so that readers never see a partially written export
+        with atomic_write(file_path, 'wb') as f:
+            np.savez(f, spec=np.array(json.dumps(spec)), **arrays)
+
+    @classmethod
+    def load(cls, file_path: str) -> "NumpyLSTM":
+        with np.load(file_path) as data:
+            layers = json.loads(str(data["spec"]))
+            for i, layer in enumerate(layers):
+                layer.update({key.split("/", 1)[1]: data[key] for key in data.files if key.startswith(f"{i}/")})
+        return cls(layers)
+
+
+def export_lstm_model(model_path: str) -> float:
+    """
+    Export a Keras model file to NumPy, next to it, once its predictions are checked against the Keras ones.
+    Return the largest difference between them.
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    engine = NumpyLSTM.from_keras(model)
+
+    # Check the export on the dates of the training range and of the forecasts
+    x = VALIDATION_DATES.reshape(-1, 1, 1)
+    error = float(np.max(np.abs(engine.predict_on_batch(x) - np.asarray(model.predict_on_batch(x)))))
+    if not error <= EXPORT_TOLERANCE:
+        raise ValueError(f"NumPy export of '{model_path}' differs from the Keras model by {error:.2e}")
+
+    engine.save(lstm_bundle_path(model_path))
+    return error
+
+
+def is_export_up_to_date(model_path: str) -> bool:
+    """
+    Check if the NumPy export of a Keras model file exists and is not older than it.
+    """
+    bundle_path = lstm_bundle_path(model_path)
+    return os.path.exists(bundle_path) and os.path.getmtime(bundle_path) >= os.path.getmtime(model_path)
+
+
+def load_lstm_engine(model_path: str) -> Optional[NumpyLSTM]:
+    """
+    NumPy export of a Keras model file, unless it is missing or older than it.
+    """
+    if not is_export_up_to_date(model_path):
+        return None
+    return NumpyLSTM.load(lstm_bundle_path(model_path))
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+from .logger_config import configure_logger
+from .files import hash_file
+from .forecasters import load_forecaster
+
+model_registry_logger = configure_logger(name="model_registry")
+
+# Default limits of the process-wide registry
+MAX_CACHED_MODELS = 32
+MAX_CACHED_BYTES = 1 << 30
+
+
+class _CachedModel(NamedTuple):
+    model: Any
+    mtime_ns: int
+    size: int
+    sha256: str
+    nbytes: int
+
+
+def model_nbytes(model: Any) -> int:
+    """
+    Memory used by the weights of a model.
+    """
+    return int(getattr(model, "nbytes", 0))
+
+
+class ModelRegistry:
+    """
+    Loads each model once and keeps it in a bounded LRU cache.
+    A model is reloaded when the content of its file changes (checked by mtime and size, then hash).
+    """
+    def __init__(self, max_models: int = MAX_CACHED_MODELS, max_bytes: int = MAX_CACHED_BYTES,
+                 loader: Callable[[str], Any] = load_forecaster,
+                 sizeof: Callable[[Any], int] = model_nbytes):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._sizeof = sizeof
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_time = 0.0
+
+    def get(self, file_path: str) -> Any:
+        """
+        Get the model stored in file_path, loading it if it is not cached or if its file changed.
+        """
+        file_path = os.path.abspath(file_path)
+
+        # Serialize the loads of a same model, without blocking the other models
+        with self._lock:
+            path_lock = self._path_locks.setdefault(file_path, threading.Lock())
+
+        with path_lock:
+            stat = os.stat(file_path)
+            with self._lock:
+                cached = self._models.get(file_path)
+
+            if cached is not None:
+                if (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+                    return self._hit(file_path, cached)
+
+                # The file was touched, only reload the model if its content changed
+                sha256 = hash_file(file_path)
+                if sha256 == cached.sha256:
+                    return self._hit(file_path, cached._replace(mtime_ns=stat.st_mtime_ns, size=stat.st_size))
+
+                model_registry_logger.info(f"Model '{file_path}' changed, reloading it...")
+                with self._lock:
+                    self.reloads += 1
+            else:
+                sha256 = hash_file(file_path)
+                with self._lock:
+                    self.misses += 1
+
+            # Load the model
+            start = time.perf_counter()
+            model = self._loader(file_path)
+            load_time = time.perf_counter() - start
+
+            cached = _CachedModel(model=model, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+                                  sha256=sha256, nbytes=self._sizeof(model))
+            with self._lock:
+                self.load_time += load_time
+                self._models[file_path] = cached
+                self._models.move_to_end(file_path)
+                self._evict()
+
+            return model
+
+    def _hit(self, file_path: str, cached: _CachedModel) -> Any:
+        with self._lock:
+            self.hits += 1
+            self._models[file_path] = cached
+            self._models.move_to_end(file_path)
+        return cached.model
+
+    def _evict(self) -> None:
+        # Evict the least recently used models, always keeping the most recent one
+        while len(self._models) > 1 and (len(self._models) > self.max_models or self.nbytes > self.max_bytes):
+            file_path, _ = self._models.popitem(last=False)
+            self.evictions += 1
+            model_registry_logger.info(f"Model '{file_path}' evicted from the registry.")
+
+    def version(self, file_path: str) -> Optional[str]:
+        """
+        Content hash of the cached model stored in file_path, if any.
+        """
+        with self._lock:
+            cached = self._models.get(os.path.abspath(file_path))
+        return cached.sha256 if cached is not None else None
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """
+        Drop a model (or all of them) from the registry.
+        """
+        with self._lock:
+            if file_path is None:
+                self._models.clear()
+            else:
+                self._models.pop(os.path.abspath(file_path), None)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(cached.nbytes for cached in self._models.values())
+
+    def stats(self) -> dict:
+        """
+        Counters of the registry.
+        """
+        with self._lock:
+            return {
+                "models": len(self._models),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "load_time": self.load_time,
+            }
+
+
+# Registry shared by the analytics and serving code of the process
+model_registry = ModelRegistry()
@@ -0,0 +1,268 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from .files import atomic_write, hash_file
+from .forecasters import FORECASTERS, GLOBAL_MODEL_DIR, global_fingerprint_path
+from .lstm_engine import LSTM_BUNDLE_EXTENSION
+
+# Compression level of the stored models, and number of threads compressing and decompressing them
+COMPRESS_LEVEL = 6
+MAX_STORE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Retention of the versions: the last versions and the versions of the last days are kept by the garbage collection
+KEEP_LAST_VERSIONS = 10
+KEEP_DAYS = 30
+
+# Objects written less than this number of seconds ago are not collected, as a version may be being committed
+GC_GRACE_SECONDS = 3600
+
+# Extensions of the files of a model, longest first so that '.lstm.npz' is not mistaken for another '.npz'
+MODEL_FILE_EXTENSIONS = sorted({forecaster.extension for forecaster in FORECASTERS.values()}
+                               | {LSTM_BUNDLE_EXTENSION, ".json"}, key=lambda extension: -len(extension))
+
+
+class Commit(NamedTuple):
+    version: str
+    created: bool
+    files: int
+    new_objects: int
+    new_bytes: int
+
+
+def model_key(relpath: str) -> Optional[str]:
+    """
+    Model (exercise, or the global model) a file of a models directory belongs to, from its path relative to it.
+    """
+    relpath = relpath.replace(os.sep, "/")
+    if relpath.startswith(f"{GLOBAL_MODEL_DIR}/"):
+        return GLOBAL_MODEL_DIR
+    for extension in MODEL_FILE_EXTENSIONS:
+        if relpath.endswith(extension) and "/" not in relpath:
+            return relpath[:-len(extension)]
+    return None
+
+
+def _model_files(current_dir: str) -> Dict[str, str]:
+    # Files of the models of a directory, by path relative to it
+    files = {}
+    for root, _, names in os.walk(current_dir):
+        for name in names:
+            relpath = os.path.relpath(os.path.join(root, name), current_dir).replace(os.sep, "/")
+            if not name.endswith(".tmp") and model_key(relpath) is not None:
+                files[relpath] = os.path.join(root, name)
+    return dict(sorted(files.items()))
+
+
+def _hash_bytes(data: bytes) -> str:
+    # Hash of a content already read, by the commits which compress it and the restores which decompress it
+    return hashlib.sha256(data).hexdigest()
+
+
+def _metrics(current_dir: str, key: str) -> dict:
+    # Metrics stored with the fingerprint of a model, current_dir being the current models of a models directory
+    fingerprint_path = global_fingerprint_path(os.path.dirname(current_dir)) if key == GLOBAL_MODEL_DIR \
+        else os.path.join(current_dir, f"{key}.json")
+    try:
+        with open(fingerprint_path, 'r') as f:
+            fingerprint = json.load(f)
+        return {**fingerprint.get("metrics", {}), "trained_at": fingerprint.get("trained_at")}
+    except (OSError, ValueError):
+        return {}
+
+
+def diff_manifests(old: dict, new: dict) -> Dict[str, List[str]]:
+    """
+    Models added, removed and changed between two manifests.
+    """
+    old_models, new_models = old["models"], new["models"]
+    return {
+        "added": sorted(new_models.keys() - old_models.keys()),
+        "removed": sorted(old_models.keys() - new_models.keys()),
+        "changed": sorted(key for key in old_models.keys() & new_models.keys()
+                          if old_models[key]["files"] != new_models[key]["files"]),
+    }
+
+
+class ModelStore:
+    """
+    Content-addressed store of the versions of a models directory. Each file is stored once, compressed, under the
+    hash of its content (objects/), and each version is a manifest mapping each model to the hashes of its files and
+    its metrics (manifests/), so that an unchanged model costs no storage and a model or a version is restored
+    without unpacking an archive.
+    """
+    def __init__(self, root: str, max_workers: int = MAX_STORE_WORKERS):
+        self.root = root
+        self.max_workers = max_workers
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.gz")
+
+    def _manifest_path(self, version: str) -> str:
+        return os.path.join(self.root, "manifests", f"{version}.json")
+
+    def _store_file(self, file_path: str) -> tuple:
+        # Hash a file and store it unless an object already holds its content
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        sha256 = _hash_bytes(data)
+        object_path = self._object_path(sha256)
+        if os.path.exists(object_path):
+            # Refresh the object, so that it is not collected while the version is being committed
+            os.utime(object_path)
+            return sha256, len(data), 0
+
+        # Written atomically so that readers never see a partially written object
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        compressed = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+        with atomic_write(object_path, 'wb') as f:
+            f.write(compressed)
+        return sha256, len(data), len(compressed)
+
+    def _read_object(self, sha256: str) -> bytes:
+        with open(self._object_path(sha256), 'rb') as f:
+            data = gzip.decompress(f.read())
+        if _hash_bytes(data) != sha256:
+            raise ValueError(f"Corrupted object '{sha256}' in the model store")
+        return data
+
+    def snapshot(self, current_dir: str) -> dict:
+        """
+        Manifest of the models of a directory, without storing them.
+        """
+        files = _model_files(current_dir)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            hashes = list(executor.map(hash_file, files.values()))
+        return self._manifest(current_dir, {relpath: {"sha256": sha256, "size": os.path.getsize(path)}
+                                            for (relpath, path), sha256 in zip(files.items(), hashes)})
+
+    @staticmethod
+    def _manifest(current_dir: str, files: Dict[str, dict]) -> dict:
+        # Group the files by model, with the metrics of each model
+        models = {}
+        for relpath, entry in files.items():
+            models.setdefault(model_key(relpath), {"files": {}})["files"][relpath] = entry
+        for key, model in models.items():
+            model["metrics"] = _metrics(current_dir, key)
+        return {"models": dict(sorted(models.items()))}
+
+    def commit(self, current_dir: str) -> Commit:
+        """
+        Store the models of a directory as a new version, unless they did not change since the last version.
+        The files are hashed and compressed in parallel, and only the new contents are stored.
+        """
+        files = _model_files(current_dir)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            stored = list(executor.map(self._store_file, files.values()))
+        manifest = self._manifest(current_dir, {relpath: {"sha256": sha256, "size": size}
+                                                for relpath, (sha256, size, _) in zip(files, stored)})
+        new_objects = sum(1 for *_, new_bytes in stored if new_bytes)
+        new_bytes = sum(new_bytes for *_, new_bytes in stored)
+
+        # An unchanged directory does not create a new version
+        versions = self.versions()
+        if versions and not any(diff_manifests(self.manifest(versions[-1]), manifest).values()):
+            return Commit(version=versions[-1], created=False, files=len(files), new_objects=new_objects,
+                          new_bytes=new_bytes)
+
+        version = datetime.now().strftime("%Y-%m-%dT%H-%M-%S-%f")
+        manifest = {"version": version, "created_at": datetime.now().isoformat(timespec="seconds"), **manifest}
+        os.makedirs(os.path.dirname(self._manifest_path(version)), exist_ok=True)
+        with atomic_write(self._manifest_path(version)) as f:
+            json.dump(manifest, f, indent=2)
+        return Commit(version=version, created=True, files=len(files), new_objects=new_objects, new_bytes=new_bytes)
+
+    def versions(self) -> List[str]:
+        """
+        Versions of the store, oldest first.
+        """
+        manifests_dir = os.path.join(self.root, "manifests")
+        if not os.path.isdir(manifests_dir):
+            return []
+        return sorted(name[:-len(".json")] for name in os.listdir(manifests_dir) if name.endswith(".json"))
+
+    def manifest(self, version: str) -> dict:
+        """
+        Manifest of a version.
+        """
+        try:
+            with open(self._manifest_path(version), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown model version '{version}'") from None
+
+    def diff(self, old_version: str, new_version: Optional[str] = None, current_dir: Optional[str] = None) -> dict:
+        """
+        Models added, removed and changed from a version to another, or to the models of a directory.
+        """
+        new = self.manifest(new_version) if new_version is not None else self.snapshot(current_dir)
+        return diff_manifests(self.manifest(old_version), new)
+
+    def restore(self, version: str, current_dir: str, models: Optional[List[str]] = None) -> int:
+        """
+        Restore the models of a version (all of them, or the given exercises) to a directory, and return the number
+        of files written. The files of the restored models that are not part of the version are removed, and only
+        the files whose content differs are written.
+        """
+        manifest_models = self.manifest(version)["models"]
+        keys = list(manifest_models) if models is None else models
+        unknown = [key for key in keys if key not in manifest_models]
+        if unknown:
+            raise ValueError(f"No model for {unknown} in version '{version}'")
+
+        # Remove the files of the restored models (or of all the models) which are not in the version
+        wanted = {relpath: entry for key in keys for relpath, entry in manifest_models[key]["files"].items()}
+        for relpath, path in _model_files(current_dir).items():
+            if relpath not in wanted and (models is None or model_key(relpath) in keys):
+                os.remove(path)
+
+        def restore_file(relpath: str) -> bool:
+            path = os.path.join(current_dir, relpath)
+            if os.path.exists(path) and os.path.getsize(path) == wanted[relpath]["size"] \
+                    and hash_file(path) == wanted[relpath]["sha256"]:
+                return False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_write(path, 'wb') as f:
+                f.write(self._read_object(wanted[relpath]["sha256"]))
+            return True
+
+        # The LSTM exports are written after their models, so that they are not older than them
+        exports = [relpath for relpath in wanted if relpath.endswith(LSTM_BUNDLE_EXTENSION)]
+        written = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch in ([relpath for relpath in wanted if relpath not in exports], exports):
+                written += sum(executor.map(restore_file, batch))
+        return written
+
+    def gc(self, keep_last: int = KEEP_LAST_VERSIONS, keep_days: float = KEEP_DAYS) -> dict:
+        """
+        Remove the versions which are neither among the keep_last last ones nor younger than keep_days days (the
+        last version is always kept), then the objects no longer referenced by a version.
+        """
+        versions = self.versions()
+        oldest_kept = (datetime.now() - timedelta(days=keep_days)).isoformat(timespec="seconds")
+        removed_versions = []
+        for version in versions[:-max(keep_last, 1)]:
+            if self.manifest(version)["created_at"] < oldest_kept:
+                os.remove(self._manifest_path(version))
+                removed_versions.append(version)
+
+        # Collect the objects of no version, unless they were just written
+        referenced = {entry["sha256"] for version in self.versions()
+                      for model in self.manifest(version)["models"].values() for entry in model["files"].values()}
+        removed_objects, freed_bytes = 0, 0
+        objects_dir = os.path.join(self.root, "objects")
+        for root, _, names in os.walk(objects_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                if name[:-len(".gz")] in referenced or time.time() - os.path.getmtime(path) < GC_GRACE_SECONDS:
+                    continue
+                freed_bytes += os.path.getsize(path)
+                os.remove(path)
+                removed_objects += 1
+        return {"removed_versions": removed_versions, "removed_objects": removed_objects, "freed_bytes": freed_bytes}
@@ -1,23 +1,40 @@
 import pandas as pd
 import numpy as np
-import tensorflow as tf
 import os
+import time
+import hashlib
+import inspect
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Bidirectional, Dropout, Flatten
-from sklearn.preprocessing import MinMaxScaler
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import matplotlib.pyplot as plt
 import warnings
 
 from .logger_config import configure_logger
+from .instrumentation import instrumented
+from .files import atomic_write
+from .storage import read_table, write_table
+from .forecasting import exercise_series, min_max_range
+from .series_store import SeriesStore, series_store_path
+from .forecasters import (DEFAULT_BACKEND, FORECASTERS, GlobalForecaster, LSTMForecaster, forecaster_path,
+                          global_fingerprint_path, global_model_path, GLOBAL_MODEL_DIR)
+from .lstm_engine import LSTM_BUNDLE_EXTENSION, export_lstm_model, is_export_up_to_date
+from .model_store import ModelStore
 
 models_training_logger = configure_logger(name="models_training")
 
+# Training parameters shared by all the backends, part of the models fingerprint
+TRAINING_PARAMS = {
+    "train_split": 0.8,
+}
 
-def load_and_preprocess_data(min_exo_occurrence: int, data_path: str) -> Tuple[List[str], pd.DataFrame]:
+
+@instrumented()
+def load_and_preprocess_data(min_exo_occurrence: int, data_path: str) -> Tuple[List[str], Optional[SeriesStore]]:
     """
-    Load and preprocess data.
+    Load and preprocess data into the series store of the exercises.
     """
     try:
         models_training_logger.info("Loading and preprocessing data...")
@@ -26,7 +43,8 @@ def load_and_preprocess_data(min_exo_occurrence: int, data_path: str) -> Tuple[L
         warnings.filterwarnings('ignore')
 
         # Load data
-        df = pd.read_csv(os.path.join(data_path, "current/workout_data.csv"))
+        df = read_table(os.path.join(data_path, "current/workout_data.csv"),
+                        columns=["DATE", "EXERCISE", "SET", "NB_REPS", "WEIGHT"])
 
         # Metric to predict
         df['PERF'] = df['NB_REPS'] * df['WEIGHT']
@@ -41,92 +59,60 @@ def load_and_preprocess_data(min_exo_occurrence: int, data_path: str) -> Tuple[L
         perf = df.groupby(["DATE", "EXERCISE"]).mean("PERF").reset_index()
 
         # Save the performance data to a csv file
-        perf.to_csv(os.path.join(data_path, 'current/workout_perf.csv'), index=False, header=True)
+        write_table(perf, os.path.join(data_path, 'current/workout_perf.csv'))
+
+        # Group the performances of each exercise into contiguous series, sliced by training and analytics
+        series = SeriesStore.build(perf)
+        series.save(series_store_path(data_path))
 
         # Create a list with the exercises that have more than 10 values
         p = perf.groupby("EXERCISE").count().sort_values("DATE", ascending=False).reset_index()
         exos = p[p["DATE"] > min_exo_occurrence]["EXERCISE"].to_list()
 
         models_training_logger.info("Data loaded and preprocessed.")
-        return exos, perf
+        return exos, series
 
     except Exception as e:
         models_training_logger.error(f"Error occurred while loading data or preprocessing: {e}")
-        return [], pd.DataFrame()
+        return [], None
+
+
+def prepare_training_data(df_exo: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Normalize the dates and performances of an exercise and split them into train and validation sets.
+    """
+    # Normalize our columns between 0 and 1
+    x = (df_exo['DAYS'].values / min_max_range(df_exo['DAYS'].values)).astype(np.float32)
+    y = ((df_exo['PERF'].values - df_exo['PERF'].min()) / min_max_range(df_exo['PERF'].values)).astype(np.float32)
 
+    # Let's split our train - test data by 80% - 20%
+    split_point = int(len(df_exo) * TRAINING_PARAMS["train_split"])
 
-def train_model(exo: str, perf: pd.DataFrame, models_dir: str) -> Optional[tf.keras.callbacks.History]:
+    return x[:split_point], y[:split_point], x[split_point:], y[split_point:]
+
+
+@instrumented(item="exo")
+def train_model(exo: str, series: SeriesStore, models_dir: str,
+                backend: str = DEFAULT_BACKEND) -> Optional[Dict[str, List[float]]]:
     """
-    Train a model for a specific exercise.
+    Train a model for a specific exercise with a forecaster backend, and return its history.
     """
     try:
-        models_training_logger.info(f"Training model for exercise '{exo}'...")
+        models_training_logger.info(f"Training {backend} model for exercise '{exo}'...")
 
         # We try to predict the performances for a specific exercise
-        df_exo = perf[perf["EXERCISE"] == exo].reset_index(drop=True)
-
-        # We format the DATE column to the number of days since the beginning of the exercises
-        df_exo['DATE'] = pd.to_datetime(df_exo['DATE'])
-        df_exo['DATE'] = (df_exo['DATE'] - df_exo['DATE'].min()) / np.timedelta64(1, 'D')
-
-        # Normalize our columns for the LSTM model
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        df_exo['PERF'] = scaler.fit_transform(df_exo[['PERF']])
-        df_exo['DATE'] = scaler.fit_transform(df_exo[['DATE']])
-
-        # Let's split our train - test data by 80% - 20%
-        split_point = int(len(df_exo) * 0.8)
-
-        train = df_exo.iloc[:split_point]
-        test = df_exo.iloc[split_point:]
-
-        # Prepare data for LSTM
-        X_train = train['DATE'].values
-        y_train = train['PERF'].values
-
-        X_test = test['DATE'].values
-        y_test = test['PERF'].values
-
-        X_train = X_train.reshape(-1, 1, 1)
-        X_test = X_test.reshape(-1, 1, 1)
-
-        # Clear session
-        tf.keras.backend.clear_session()
-
-        # Define LSTM model
-        model = Sequential()
-        model.add(Bidirectional(LSTM(200, return_sequences=True), input_shape=(X_train.shape[1], X_train.shape[2])))
-        model.add(Dropout(0.2))
-        model.add(Bidirectional(LSTM(150, return_sequences=True)))
-        model.add(Dropout(0.2))
-        model.add(Bidirectional(LSTM(100, return_sequences=True)))
-        model.add(Dropout(0.2))
-        model.add(Bidirectional(LSTM(50, return_sequences=True)))
-        model.add(Dropout(0.2))
-        model.add(Flatten())
-        model.add(Dense(1))
-
-        # Define the loss and optimizer
-        model.compile(loss='mse', optimizer='adam')
-
-        # Save the best model based on the validation loss
-        best_model = tf.keras.callbacks.ModelCheckpoint(
-            filepath=f'{models_dir}/current/{exo}.h5',
-            monitor='val_loss',  # Monitor other things like val_accuracy or accuracy
-            save_best_only=True,  # Make sure to save only the best model
-            verbose=0
-        )
+        df_exo = exercise_series(exo=exo, series=series)
+        x_train, y_train, x_val, y_val = prepare_training_data(df_exo)
 
         # Fit model
-        history = model.fit(
-            X_train, y_train,
-            validation_data=[X_test, y_test],
-            epochs=20,
-            batch_size=5,
-            callbacks=[best_model],
-            verbose=0,
-            shuffle=False
-        )
+        forecaster = FORECASTERS[backend]()
+        history = forecaster.fit(x_train, y_train, x_val, y_val)
+
+        # Save the best model, replacing the model of the exercise trained with another backend
+        for other_backend in FORECASTERS:
+            if other_backend != backend and os.path.exists(forecaster_path(models_dir, exo, other_backend)):
+                os.remove(forecaster_path(models_dir, exo, other_backend))
+        forecaster.save(forecaster_path(models_dir, exo, backend))
 
         models_training_logger.info(f"Model for exercise '{exo}' trained.")
         return history
@@ -136,7 +122,132 @@ def train_model(exo: str, perf: pd.DataFrame, models_dir: str) -> Optional[tf.ke
         return None
 
 
-def plot_loss(exo: str, history: tf.keras.callbacks.History, models_dir: str) -> bool:
+@instrumented()
+def train_global_model(exos: List[str], series: SeriesStore, models_dir: str) -> Optional[Dict[str, List[float]]]:
+    """
+    Train a single model for all the exercises, and return its history.
+    """
+    try:
+        models_training_logger.info(f"Training global model for {len(exos)} exercises...")
+
+        # Normalize and split the series of each exercise
+        training_data = {exo: prepare_training_data(exercise_series(exo=exo, series=series)) for exo in exos}
+
+        # Fit model
+        forecaster = GlobalForecaster()
+        history = forecaster.fit(training_data)
+
+        # Save the best model
+        os.makedirs(os.path.dirname(global_model_path(models_dir)), exist_ok=True)
+        forecaster.save(global_model_path(models_dir))
+
+        # Remove the models of the exercises now served by the global model
+        for exo in exos:
+            for backend in FORECASTERS:
+                if os.path.exists(forecaster_path(models_dir, exo, backend)):
+                    os.remove(forecaster_path(models_dir, exo, backend))
+            if os.path.exists(f"{models_dir}/current/{exo}.json"):
+                os.remove(f"{models_dir}/current/{exo}.json")
+
+        models_training_logger.info("Global model trained.")
+        return history
+
+    except Exception as e:
+        models_training_logger.error(f"Error occurred while training the global model: {e}")
+        return None
+
+
+def training_code_version(backend: str = DEFAULT_BACKEND) -> str:
+    """
+    Version of the training code, changing whenever the model definition or its training changes.
+    """
+    if backend == GlobalForecaster.name:
+        source = inspect.getsource(prepare_training_data) + inspect.getsource(train_global_model) \
+            + GlobalForecaster.code_version()
+    else:
+        source = inspect.getsource(prepare_training_data) + inspect.getsource(train_model) \
+            + FORECASTERS[backend].code_version()
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def _hash_series(sha256, exo: str, series: SeriesStore) -> None:
+    # Hash the dates and performances of an exercise from its slice of the store
+    rows = series.bounds(exo)
+    sha256.update(series.dates[rows].view(np.int64).tobytes())
+    sha256.update(series.perf[rows].tobytes())
+
+
+def exercise_fingerprint(exo: str, series: SeriesStore, backend: str = DEFAULT_BACKEND) -> dict:
+    """
+    Fingerprint of everything a model depends on: its training data, hyperparameters and code version.
+    """
+    sha256 = hashlib.sha256()
+    _hash_series(sha256, exo, series)
+    data_hash = sha256.hexdigest()
+    params = {"backend": backend, **TRAINING_PARAMS, **FORECASTERS[backend].params}
+    return {"data": data_hash, "params": params, "code_version": training_code_version(backend)}
+
+
+def global_fingerprint(exos: List[str], series: SeriesStore) -> dict:
+    """
+    Fingerprint of the global model: the training data of all its exercises, hyperparameters and code version.
+    """
+    sha256 = hashlib.sha256()
+    for exo in sorted(exos):
+        sha256.update(exo.encode())
+        _hash_series(sha256, exo, series)
+    data_hash = sha256.hexdigest()
+    params = {"backend": GlobalForecaster.name, **TRAINING_PARAMS, **GlobalForecaster.params}
+    return {"data": data_hash, "params": params, "code_version": training_code_version(GlobalForecaster.name)}
+
+
+def fingerprint_path(exo: str, models_dir: str) -> str:
+    """
+    Path of the fingerprint stored alongside the model of an exercise, or of the global model (GLOBAL_MODEL_DIR).
+    """
+    if exo == GLOBAL_MODEL_DIR:
+        return global_fingerprint_path(models_dir)
+    return f"{models_dir}/current/{exo}.json"
+
+
+def load_fingerprint(exo: str, models_dir: str) -> Optional[dict]:
+    """
+    Load the fingerprint stored alongside the model of an exercise.
+    """
+    try:
+        with open(fingerprint_path(exo=exo, models_dir=models_dir), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_fingerprint(exo: str, fingerprint: dict, metrics: dict, models_dir: str) -> None:
+    """
+    Save the fingerprint and the metrics of a trained model alongside it.
+    """
+    # Written atomically so that a model is never skipped, nor archived, with a partially written fingerprint
+    with atomic_write(fingerprint_path(exo=exo, models_dir=models_dir)) as f:
+        json.dump({**fingerprint, "metrics": metrics, "trained_at": datetime.now().isoformat(timespec="seconds")},
+                  f, indent=2)
+
+
+def is_model_up_to_date(exo: str, fingerprint: dict, models_dir: str) -> bool:
+    """
+    Check if the model of an exercise and its loss plot exist, and the model was trained with the same fingerprint.
+    """
+    stored = load_fingerprint(exo=exo, models_dir=models_dir)
+    if fingerprint["params"]["backend"] == GlobalForecaster.name:
+        model_path = global_model_path(models_dir)
+    else:
+        model_path = forecaster_path(models_dir, exo, fingerprint["params"]["backend"])
+    return stored is not None \
+        and os.path.exists(model_path) \
+        and os.path.exists(os.path.join(models_dir, "loss", f"{exo}.png")) \
+        and all(stored.get(key) == value for key, value in fingerprint.items())
+
+
+@instrumented(item="exo")
+def plot_loss(exo: str, history: Dict[str, List[float]], models_dir: str) -> bool:
     """
     Plot the loss.
     """
@@ -144,8 +255,8 @@ def plot_loss(exo: str, history: tf.keras.callbacks.History, models_dir: str) ->
         models_training_logger.info("Plotting loss...")
 
         # Plot the loss
-        plt.plot(history.history['loss'], label='train')
-        plt.plot(history.history['val_loss'], label='test')
+        plt.plot(history['loss'], label='train')
+        plt.plot(history['val_loss'], label='test')
         plt.legend()
         plt.savefig(f"{models_dir}/loss/{exo}.png")
         plt.close()
@@ -158,16 +269,65 @@ def plot_loss(exo: str, history: tf.keras.callbacks.History, models_dir: str) ->
         return False
 
 
-def train_models(max_models: Optional[int], min_exo_occurrence: int, data_path: str, models_dir: str) -> bool:
+def _configure_training_worker(intra_op_threads: int, inter_op_threads: int) -> None:
     """
-    Train models for each exercise.
+    Pin the TensorFlow thread pools of a training worker, before TensorFlow is initialized.
+    """
+    import tensorflow as tf
+
+    warnings.filterwarnings('ignore')
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def _train_exercises(exos: List[str], backends: Dict[str, str], series: SeriesStore, models_dir: str,
+                     n_workers: int, threads_per_worker: Optional[int]):
+    """
+    Train the models of the exercises, sequentially or in a pool of worker processes, yielding their histories.
+    """
+    if n_workers <= 1:
+        for exo in exos:
+            yield exo, train_model(exo=exo, series=series, models_dir=models_dir, backend=backends[exo])
+        return
+
+    # Share the cores between the workers so that they do not oversubscribe them
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+
+    # TensorFlow is not fork-safe, the workers are spawned
+    with ProcessPoolExecutor(max_workers=n_workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_configure_training_worker,
+                             initargs=(threads_per_worker, 1)) as executor:
+        futures = {executor.submit(train_model, exo=exo, series=series.subset([exo]),
+                                   models_dir=models_dir, backend=backends[exo]): exo for exo in exos}
+        for future in as_completed(futures):
+            exo = futures[future]
+            try:
+                yield exo, future.result()
+            except Exception as e:
+                models_training_logger.error(f"Worker failed while training model '{exo}': {e}")
+                yield exo, None
+
+
+@instrumented()
+def train_models(max_models: Optional[int], min_exo_occurrence: int, data_path: str, models_dir: str,
+                 n_workers: int = 1, threads_per_worker: Optional[int] = None, force: bool = False,
+                 backend: str = DEFAULT_BACKEND, exercise_backends: Optional[Dict[str, str]] = None,
+                 mode: str = "per_exercise") -> bool:
+    """
+    Train models for each exercise, optionally in n_workers parallel processes.
+    With mode="global", a single model is trained for all the exercises instead.
+    Models are trained with the backend, unless another one is picked for the exercise in exercise_backends.
+    Exercises whose fingerprint did not change since their model was trained are skipped, unless force is set.
+    A failing exercise is logged and skipped, the run only fails if no model could be trained.
     """
     try:
         models_training_logger.info("Training models...")
 
         # Load and preprocess data
-        exos, perf = load_and_preprocess_data(min_exo_occurrence=min_exo_occurrence, data_path=data_path)
-        if perf.empty:
+        exos, series = load_and_preprocess_data(min_exo_occurrence=min_exo_occurrence, data_path=data_path)
+        if series is None:
             return False
         if not exos:
             models_training_logger.error("No exercises to train models for.")
@@ -177,27 +337,62 @@ def train_models(max_models: Optional[int], min_exo_occurrence: int, data_path:
             # Limit the number of models to train (for testing)
             exos = exos[:max_models]
 
-        for exo in exos:
-            # Train model
-            history = train_model(exo=exo, perf=perf, models_dir=models_dir)
+        if mode == "global":
+            return _train_global(exos=exos, series=series, models_dir=models_dir, force=force)
+
+        start = time.perf_counter()
+
+        # Skip the exercises whose training data, hyperparameters and code did not change
+        backends = {exo: (exercise_backends or {}).get(exo, backend) for exo in exos}
+        fingerprints = {exo: exercise_fingerprint(exo=exo, series=series, backend=backends[exo]) for exo in exos}
+        skipped = [] if force else [exo for exo in exos
+                                    if is_model_up_to_date(exo=exo, fingerprint=fingerprints[exo], models_dir=models_dir)]
+        to_train = [exo for exo in exos if exo not in skipped]
+
+        trained, failed = [], []
+        for exo, history in _train_exercises(exos=to_train, backends=backends, series=series, models_dir=models_dir,
+                                             n_workers=n_workers, threads_per_worker=threads_per_worker):
             if history is None:
-                return False
+                failed.append(exo)
+                continue
 
             # Plot loss
             loss_plotted = plot_loss(exo=exo, history=history, models_dir=models_dir)
             if not loss_plotted:
-                return False
+                failed.append(exo)
+                continue
 
             # Get the epoch with the best validation loss
-            best_epoch = np.argmin(history.history['val_loss'])
+            best_epoch = np.argmin(history['val_loss'])
 
             # Get the loss and validation loss of the best epoch
-            best_loss = history.history['loss'][best_epoch]
-            best_val_loss = history.history['val_loss'][best_epoch]
+            best_loss = history['loss'][best_epoch]
+            best_val_loss = history['val_loss'][best_epoch]
 
             # Log the loss and val_loss of the best epoch
             models_training_logger.info(f"Best Model '{exo}': epoch = {best_epoch + 1}, loss = {best_loss}, val_loss = {best_val_loss}")
 
+            # Store the fingerprint of the model alongside it
+            save_fingerprint(exo=exo, fingerprint=fingerprints[exo], models_dir=models_dir,
+                             metrics={"best_epoch": int(best_epoch) + 1, "loss": float(best_loss),
+                                      "val_loss": float(best_val_loss)})
+            trained.append(exo)
+
+        # Export the LSTM models to NumPy, so that they are served without TensorFlow
+        export_lstm_models(models_dir=models_dir)
+
+        # Summarize the run
+        models_size = sum(os.path.getsize(forecaster_path(models_dir, exo, backends[exo])) for exo in trained)
+        models_training_logger.info(f"Run summary: {len(trained)} trained, {len(skipped)} skipped (unchanged), "
+                                    f"{len(failed)} failed, in {time.perf_counter() - start:.1f} s "
+                                    f"({models_size / 1e6:.1f} MB of new models).")
+        if skipped:
+            models_training_logger.info(f"Skipped exercises: {skipped}")
+        if failed:
+            models_training_logger.error(f"Models could not be trained for {len(failed)} exercise(s): {failed}")
+        if to_train and len(failed) == len(to_train):
+            return False
+
         models_training_logger.info("Models trained.")
         return True
 
@@ -206,20 +401,100 @@ def train_models(max_models: Optional[int], min_exo_occurrence: int, data_path:
         return False
 
 
-def archive_models(models_dir: str) -> bool:
+@instrumented()
+def export_lstm_models(models_dir: str) -> bool:
     """
-    Archive models for versioning.
+    Export the LSTM models of models_dir/current whose NumPy export is missing or stale, and remove the exports
+    of the removed models. A model failing its export keeps being run with Keras.
     """
     try:
-        models_training_logger.info("Archiving models...")
+        models_training_logger.info("Exporting LSTM models...")
+        current_dir = os.path.join(models_dir, "current")
+
+        exported, failed = 0, []
+        for file in sorted(os.listdir(current_dir)):
+            model_path = os.path.join(current_dir, file)
+            if file.endswith(LSTM_BUNDLE_EXTENSION):
+                # Remove the export of a model trained with another backend since
+                keras_path = f"{model_path[:-len(LSTM_BUNDLE_EXTENSION)]}{LSTMForecaster.extension}"
+                if not os.path.exists(keras_path):
+                    os.remove(model_path)
+            elif file.endswith(LSTMForecaster.extension) and not is_export_up_to_date(model_path):
+                try:
+                    error = export_lstm_model(model_path)
+                    models_training_logger.info(f"Model '{file}' exported (max error {error:.1e}).")
+                    exported += 1
+                except Exception as e:
+                    models_training_logger.error(f"Error occurred while exporting model '{file}': {e}")
+                    failed.append(file)
+
+        models_training_logger.info(f"LSTM models exported: {exported} exported, {len(failed)} failed.")
+        return not failed
+
+    except Exception as e:
+        models_training_logger.error(f"Error occurred while exporting LSTM models: {e}")
+        return False
+
+
+def _train_global(exos: List[str], series: SeriesStore, models_dir: str, force: bool) -> bool:
+    """
+    Train the global model of the exercises, unless its fingerprint did not change.
+    """
+    start = time.perf_counter()
+
+    # Skip the training if the data, hyperparameters and code did not change
+    fingerprint = global_fingerprint(exos=exos, series=series)
+    if not force and is_model_up_to_date(exo=GLOBAL_MODEL_DIR, fingerprint=fingerprint, models_dir=models_dir):
+        models_training_logger.info(f"Run summary: global model skipped (unchanged) for {len(exos)} exercises.")
+        models_training_logger.info("Models trained.")
+        return True
+
+    history = train_global_model(exos=exos, series=series, models_dir=models_dir)
+    if history is None or not plot_loss(exo=GLOBAL_MODEL_DIR, history=history, models_dir=models_dir):
+        return False
+
+    # Get the loss and validation loss of the best epoch
+    best_epoch = np.argmin(history['val_loss'])
+    best_loss = history['loss'][best_epoch]
+    best_val_loss = history['val_loss'][best_epoch]
+    models_training_logger.info(f"Best global model: epoch = {best_epoch + 1}, loss = {best_loss}, val_loss = {best_val_loss}")
+
+    # Store the fingerprint of the model alongside it
+    save_fingerprint(exo=GLOBAL_MODEL_DIR, fingerprint=fingerprint, models_dir=models_dir,
+                     metrics={"best_epoch": int(best_epoch) + 1, "loss": float(best_loss),
+                              "val_loss": float(best_val_loss)})
 
-        # Get the relative path to models_dir
-        models_dir = os.path.relpath(models_dir, start=os.getcwd())
+    models_training_logger.info(f"Run summary: global model trained for {len(exos)} exercises, "
+                                f"in {time.perf_counter() - start:.1f} s "
+                                f"({os.path.getsize(global_model_path(models_dir)) / 1e6:.1f} MB).")
+    models_training_logger.info("Models trained.")
+    return True
 
-        # Archive models
-        os.system(f"tar -czf {models_dir}/versions/models_{datetime.now().strftime('%Y-%m-%d')}.tar.gz -C {models_dir}/current .")
 
-        models_training_logger.info(f"Models archived to : {models_dir}/versions/models_{datetime.now().strftime('%Y-%m-%d')}.tar.gz")
+@instrumented()
+def archive_models(models_dir: str) -> bool:
+    """
+    Archive models for versioning: store the current models as a version of the model store, and remove the versions
+    and models out of its retention.
+    """
+    try:
+        models_training_logger.info("Archiving models...")
+        store = ModelStore(os.path.join(models_dir, 'versions'))
+
+        # Store the models, only the new ones being compressed
+        commit = store.commit(os.path.join(models_dir, 'current'))
+        if commit.created:
+            models_training_logger.info(f"Models archived to version '{commit.version}': {commit.files} files, "
+                                        f"{commit.new_objects} new ({commit.new_bytes / 1e6:.1f} MB compressed).")
+        else:
+            models_training_logger.info(f"Models unchanged since version '{commit.version}'.")
+
+        # Apply the retention policy
+        collected = store.gc()
+        if collected["removed_versions"] or collected["removed_objects"]:
+            models_training_logger.info(f"Removed {len(collected['removed_versions'])} old versions and "
+                                        f"{collected['removed_objects']} stored files "
+                                        f"({collected['freed_bytes'] / 1e6:.1f} MB).")
         return True
 
     except Exception as e:
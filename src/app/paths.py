@@ -0,0 +1,67 @@
+import os
+import re
+from typing import List, NamedTuple
+
+# Athlete whose partition is the original single-athlete layout (data/workouts, data/current, models/current...)
+DEFAULT_ATHLETE = "default"
+
+# Directory of the partitions of the other athletes, under the data, models and static directories
+ATHLETES_DIR = "athletes"
+
+# Names of the athletes, also used as directory names and URL parameters
+ATHLETE_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+class AthletePaths(NamedTuple):
+    """
+    Directories of the partition of an athlete, laid out like the single-athlete directories:
+    data_dir holds workouts/ and current/, models_dir holds current/, loss/ and versions/, static_dir holds plots/.
+    """
+    athlete: str
+    data_dir: str
+    models_dir: str
+    static_dir: str
+
+
+def check_athlete(athlete: str) -> str:
+    """
+    Validate the name of an athlete, so that it can be safely used in paths.
+    """
+    if not ATHLETE_PATTERN.match(athlete or ""):
+        raise ValueError(f"Invalid athlete name '{athlete}'")
+    return athlete
+
+
+def athlete_paths(athlete: str, data_dir: str, models_dir: str, static_dir: str) -> AthletePaths:
+    """
+    Directories of the partition of an athlete, the default athlete using the root directories.
+    """
+    if check_athlete(athlete) == DEFAULT_ATHLETE:
+        return AthletePaths(athlete=athlete, data_dir=data_dir, models_dir=models_dir, static_dir=static_dir)
+    return AthletePaths(athlete=athlete,
+                        data_dir=os.path.join(data_dir, ATHLETES_DIR, athlete),
+                        models_dir=os.path.join(models_dir, ATHLETES_DIR, athlete),
+                        static_dir=os.path.join(static_dir, ATHLETES_DIR, athlete))
+
+
+def create_athlete_dirs(paths: AthletePaths) -> None:
+    """
+    Create the output directories of the partition of an athlete.
+    """
+    for directory in (os.path.join(paths.data_dir, 'current'), os.path.join(paths.models_dir, 'current'),
+                      os.path.join(paths.models_dir, 'loss'), os.path.join(paths.models_dir, 'versions'),
+                      os.path.join(paths.static_dir, 'plots/predicted_volume')):
+        os.makedirs(directory, exist_ok=True)
+
+
+def list_athletes(data_dir: str) -> List[str]:
+    """
+    Athletes with workout files: the default athlete if data/workouts exists, then the partitions of data/athletes.
+    """
+    athletes = [DEFAULT_ATHLETE] if os.path.isdir(os.path.join(data_dir, 'workouts')) else []
+    athletes_dir = os.path.join(data_dir, ATHLETES_DIR)
+    if os.path.isdir(athletes_dir):
+        athletes += sorted(athlete for athlete in os.listdir(athletes_dir)
+                           if athlete != DEFAULT_ATHLETE and ATHLETE_PATTERN.match(athlete)
+                           and os.path.isdir(os.path.join(athletes_dir, athlete, 'workouts')))
+    return athletes
@@ -0,0 +1,226 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .logger_config import configure_logger
+from .files import atomic_write, hash_file
+
+pipeline_logger = configure_logger(name="pipeline")
+
+# Number of nodes run concurrently by default
+MAX_PIPELINE_WORKERS = 4
+
+
+class Node(NamedTuple):
+    """
+    Stage of the pipeline: a function reading its input paths (files or directories) and writing its output paths.
+    The node is skipped when the content of its inputs, its code (modules) and its params did not change since its
+    last successful run, and the files of its outputs still exist.
+    """
+    name: str
+    func: Callable[[], bool]
+    inputs: List[str]
+    outputs: List[str]
+    modules: List[str] = []
+    params: dict = {}
+
+
+class NodeResult(NamedTuple):
+    """
+    Outcome of a node: "done", "skipped", "failed" or "blocked" (an upstream node failed).
+    """
+    name: str
+    status: str
+    seconds: float
+
+
+def _is_under(path: str, directory: str) -> bool:
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+class Pipeline:
+    """
+    DAG of nodes, ordered by their inputs and outputs: a node depends on the nodes writing one of its inputs.
+    The state of the last successful run of each node is persisted in state_path.
+    """
+    def __init__(self, nodes: List[Node], state_path: str):
+        names = [node.name for node in nodes]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate node names in {names}")
+
+        self.nodes = {node.name: node for node in nodes}
+        self.state_path = state_path
+        self._lock = threading.Lock()
+
+        # Link each node to the nodes writing its inputs
+        self.upstream = {node.name: sorted({other.name for other in nodes if other.name != node.name
+                                            for output in map(os.path.abspath, other.outputs)
+                                            for path in map(os.path.abspath, node.inputs)
+                                            if _is_under(path, output) or _is_under(output, path)})
+                         for node in nodes}
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        # Depth-first search of a cycle in the dependencies
+        visiting, visited = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visiting:
+                raise ValueError(f"Cycle in the pipeline through node '{name}'")
+            if name not in visited:
+                visiting.add(name)
+                for upstream in self.upstream[name]:
+                    visit(upstream)
+                visiting.remove(name)
+                visited.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {"nodes": {}, "files": {}}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict) -> None:
+        # Written atomically so that an interrupted run keeps the previous state
+        with atomic_write(self.state_path) as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+
+    def _file_hash(self, file_path: str, state: dict) -> str:
+        # Only hash the files whose size or modification time changed since they were last hashed
+        stat = os.stat(file_path)
+        with self._lock:
+            cached = state["files"].get(file_path)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        sha256 = hash_file(file_path)
+        with self._lock:
+            state["files"][file_path] = [stat.st_size, stat.st_mtime_ns, sha256]
+        return sha256
+
+    def _path_hash(self, path: str, state: dict) -> str:
+        # Hash a file, or the relative paths and contents of the files of a directory
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            return self._file_hash(path, state)
+        if not os.path.isdir(path):
+            return "missing"
+        sha256 = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                sha256.update(f"{os.path.relpath(file_path, path)}:{self._file_hash(file_path, state)}\n".encode())
+        return sha256.hexdigest()
+
+    @staticmethod
+    def _path_files(path: str) -> str:
+        # Hash the relative paths of the files of a directory, so that a deleted file is detected
+        if os.path.isfile(path):
+            return "file"
+        if not os.path.isdir(path):
+            return "missing"
+        sha256 = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                sha256.update(f"{os.path.relpath(os.path.join(root, file), path)}\n".encode())
+        return sha256.hexdigest()
+
+    def fingerprint(self, node: Node, state: dict) -> dict:
+        """
+        Content hashes of the inputs of a node, with the version of its code and its params.
+        """
+        modules = {}
+        for module in node.modules:
+            modules[module] = self._file_hash(importlib.util.find_spec(module).origin, state)
+        return {"inputs": {path: self._path_hash(path, state) for path in node.inputs},
+                "modules": modules,
+                "params": json.loads(json.dumps(node.params, sort_keys=True, default=str))}
+
+    def outputs(self, node: Node) -> dict:
+        """
+        Files of the outputs of a node, recorded after its successful run.
+        """
+        return {path: self._path_files(path) for path in node.outputs}
+
+    def run(self, max_workers: int = MAX_PIPELINE_WORKERS, force: bool = False) -> List[NodeResult]:
+        """
+        Run the nodes whose inputs changed, independent nodes concurrently, and return the outcome of each node.
+        The nodes downstream of a failed node are not run.
+        """
+        pipeline_logger.info(f"Running pipeline of {len(self.nodes)} nodes with {max_workers} workers...")
+        start = time.perf_counter()
+
+        state = self._load_state()
+        results = {}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            while len(results) < len(self.nodes):
+                # Block the nodes with a failed upstream node, and start the nodes whose upstream nodes completed
+                for name, node in self.nodes.items():
+                    if name in results or name in running.values():
+                        continue
+                    upstream = [results.get(upstream) for upstream in self.upstream[name]]
+                    if any(result is not None and result.status in ("failed", "blocked") for result in upstream):
+                        pipeline_logger.error(f"Node '{name}' blocked by a failed upstream node.")
+                        results[name] = NodeResult(name=name, status="blocked", seconds=0.0)
+                    elif all(result is not None for result in upstream):
+                        running[executor.submit(self._run_node, node, state, force)] = name
+
+                if not running:
+                    continue
+
+                # Wait for a node to complete
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+
+        # Summarize the run
+        counts = {status: sum(result.status == status for result in results.values())
+                  for status in ("done", "skipped", "failed", "blocked")}
+        pipeline_logger.info(f"Pipeline run in {time.perf_counter() - start:.1f} s: "
+                             + ", ".join(f"{count} {status}" for status, count in counts.items()) + ".")
+
+        return [results[name] for name in self.nodes]
+
+    def _run_node(self, node: Node, state: dict, force: bool) -> NodeResult:
+        start = time.perf_counter()
+        try:
+            # Skip the node if its fingerprint matches its last successful run
+            fingerprint = self.fingerprint(node, state)
+            with self._lock:
+                last_run = state["nodes"].get(node.name)
+            if not force and last_run == {**fingerprint, "outputs": self.outputs(node)}:
+                pipeline_logger.info(f"Node '{node.name}' skipped (unchanged).")
+                with self._lock:
+                    self._save_state(state)
+                return NodeResult(name=node.name, status="skipped", seconds=time.perf_counter() - start)
+
+            pipeline_logger.info(f"Running node '{node.name}'...")
+            if not node.func():
+                raise RuntimeError("the node function reported a failure")
+
+            # Record the successful run, keyed by the inputs read by the node, with the files it wrote
+            with self._lock:
+                state["nodes"][node.name] = {**fingerprint, "outputs": self.outputs(node)}
+                self._save_state(state)
+
+            pipeline_logger.info(f"Node '{node.name}' done in {time.perf_counter() - start:.1f} s.")
+            return NodeResult(name=node.name, status="done", seconds=time.perf_counter() - start)
+
+        except Exception as e:
+            pipeline_logger.error(f"Error occurred while running node '{node.name}': {e}")
+            with self._lock:
+                state["nodes"].pop(node.name, None)
+                self._save_state(state)
+            return NodeResult(name=node.name, status="failed", seconds=time.perf_counter() - start)
@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+import os
+from typing import Iterable, List
+
+from .files import atomic_write
+from .storage import read_table
+
+# Store of the performance series, written next to the performance table
+SERIES_STORE_FILE = 'workout_series.npz'
+
+
+def series_store_path(data_path: str) -> str:
+    """
+    Path of the series store of a data directory.
+    """
+    return os.path.join(data_path, 'current', SERIES_STORE_FILE)
+
+
+class SeriesStore:
+    """
+    Performance history of each exercise, stored as contiguous arrays of dates, days since its first session and
+    performances, the rows of an exercise being at offsets[i]:offsets[i + 1], so that a series is sliced without
+    scanning the other exercises.
+    """
+
+    def __init__(self, exercises: List[str], offsets: np.ndarray, dates: np.ndarray, days: np.ndarray,
+                 perf: np.ndarray):
+        self.exercises = exercises
+        self.offsets = offsets
+        self.dates = dates
+        self.days = days
+        self.perf = perf
+        self._positions = {exo: i for i, exo in enumerate(exercises)}
+
+    @classmethod
+    def build(cls, perf: pd.DataFrame) -> "SeriesStore":
+        # Group the rows of each exercise together, keeping their order within the exercise
+        codes, exercises = pd.factorize(perf['EXERCISE'], sort=True)
+        order = np.argsort(codes, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(exercises)))]).astype(np.int64)
+
+        # The dates are parsed once for all the exercises, the days are counted from the first session of each one
+        dates = pd.to_datetime(perf['DATE']).to_numpy(dtype='datetime64[ns]')[order]
+        if len(dates):
+            first_dates = np.repeat(np.minimum.reduceat(dates, offsets[:-1]), np.diff(offsets))
+            days = (dates - first_dates) / np.timedelta64(1, 'D')
+        else:
+            days = np.zeros(0, dtype=np.float64)
+
+        return cls(exercises=list(exercises), offsets=offsets, dates=dates, days=days.astype(np.float64),
+                   perf=perf['PERF'].to_numpy(dtype=np.float64)[order])
+
+    def save(self, path: str) -> None:
+        # Written atomically so that readers never see a partially written store
+        with atomic_write(path, 'wb') as f:
+            np.savez(f, exercises=np.array(self.exercises, dtype=str), offsets=self.offsets, dates=self.dates,
+                     days=self.days, perf=self.perf)
+
+    @classmethod
+    def load(cls, path: str) -> "SeriesStore":
+        with np.load(path) as data:
+            return cls(exercises=data['exercises'].tolist(), offsets=data['offsets'], dates=data['dates'],
+                       days=data['days'], perf=data['perf'])
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def __contains__(self, exo: str) -> bool:
+        return exo in self._positions
+
+    def bounds(self, exo: str) -> slice:
+        """
+        Rows of an exercise in the arrays of the store.
+        """
+        if exo not in self._positions:
+            raise ValueError(f"No data found for exercise '{exo}'")
+        i = self._positions[exo]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def frame(self, exo: str) -> pd.DataFrame:
+        """
+        Performance history of an exercise, with the number of days since its first session.
+        """
+        rows = self.bounds(exo)
+        return pd.DataFrame({'DATE': self.dates[rows], 'PERF': self.perf[rows], 'DAYS': self.days[rows]})
+
+    def subset(self, exercises: Iterable[str]) -> "SeriesStore":
+        """
+        Store of some of the exercises only, e.g. to send them to a worker process.
+        """
+        exercises = sorted(set(exercises))
+        rows = [self.bounds(exo) for exo in exercises]
+        lengths = [row.stop - row.start for row in rows]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        return SeriesStore(exercises=exercises, offsets=offsets,
+                           dates=np.concatenate([self.dates[row] for row in rows] or [self.dates[:0]]),
+                           days=np.concatenate([self.days[row] for row in rows] or [self.days[:0]]),
+                           perf=np.concatenate([self.perf[row] for row in rows] or [self.perf[:0]]))
+
+
+def load_series_store(data_path: str) -> SeriesStore:
+    """
+    Series store of a data directory, built from the performance table when it is missing or older than it.
+    """
+    path = series_store_path(data_path)
+    perf_path = os.path.join(data_path, 'current/workout_perf.csv')
+    if os.path.exists(path) and (not os.path.exists(perf_path) or os.path.getmtime(path) >= os.path.getmtime(perf_path)):
+        return SeriesStore.load(path)
+    return SeriesStore.build(read_table(perf_path, columns=["DATE", "EXERCISE", "PERF"]))
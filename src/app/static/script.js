@@ -1,5 +1,74 @@
 $(document).ready(function(){
-    $(".filter").on("keyup", function() {
+    // Tables served by an API are filtered, sorted and paginated server-side
+    $(".filter-table[data-api]").each(function() {
+        var table = $(this);
+        var columns = table.data("columns").split(",");
+        var pager = table.next(".pager");
+        var state = {page: 1, sort: "", order: "asc", total: table.data("total")};
+        var timer = null;
+
+        function render(data) {
+            var tbody = table.find("tbody").empty();
+            data.rows.forEach(function(row) {
+                var tr = $("<tr>");
+                columns.forEach(function(column) {
+                    tr.append($("<td>").text(row[column]));
+                });
+                tbody.append(tr);
+            });
+            state.total = data.total;
+            renderPager();
+        }
+
+        function renderPager() {
+            var pages = Math.max(1, Math.ceil(state.total / table.data("page-size")));
+            pager.empty()
+                .append($("<button>").text("Previous").prop("disabled", state.page <= 1).on("click", function() {
+                    state.page -= 1;
+                    load();
+                }))
+                .append($("<span>").text(" Page " + state.page + " of " + pages + " (" + state.total + " rows) "))
+                .append($("<button>").text("Next").prop("disabled", state.page >= pages).on("click", function() {
+                    state.page += 1;
+                    load();
+                }));
+        }
+
+        function load() {
+            var params = {page: state.page, page_size: table.data("page-size"), order: state.order};
+            if (state.sort) {
+                params.sort = state.sort;
+            }
+            table.find(".filter").each(function() {
+                if ($(this).val()) {
+                    params[$(this).data("param")] = $(this).val();
+                }
+            });
+            $.getJSON(table.data("api"), params, render);
+        }
+
+        table.find(".filter").on("input", function() {
+            // Wait for the user to stop typing before querying the API
+            clearTimeout(timer);
+            timer = setTimeout(function() {
+                state.page = 1;
+                load();
+            }, 300);
+        });
+
+        table.find(".sort").on("click", function() {
+            var column = $(this).data("sort");
+            state.order = (state.sort === column && state.order === "asc") ? "desc" : "asc";
+            state.sort = column;
+            state.page = 1;
+            load();
+        });
+
+        renderPager();
+    });
+
+    // Other tables are filtered client-side
+    $(".filter-table:not([data-api]) .filter").on("keyup", function() {
         var input = $(this).val().toUpperCase();
         var column = $(this).data("column"); // get the column number
         $(this).closest('.filter-table').find("tbody tr").each(function() {
@@ -12,4 +81,4 @@ $(document).ready(function(){
             }
         });
     });
-});
\ No newline at end of file
+});
@@ -0,0 +1,252 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import os
+from typing import List, Optional
+
+from .files import AtomicFile, atomic_write
+
+# Backend used to persist the data/current tables
+STORAGE_BACKEND = "feather"
+
+# Keep a CSV export of every table next to the binary one, for humans
+EXPORT_CSV = True
+
+
+class CsvBackend:
+    """
+    Plain text tables, re-parsed and re-typed on every read.
+    """
+    extension = ".csv"
+
+    def read(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        df = pd.read_csv(path, header=0, usecols=columns)
+        return df if columns is None else df[columns]
+
+    def write(self, df: pd.DataFrame, path: str) -> None:
+        with atomic_write(path, newline='') as f:
+            df.to_csv(f, index=False, header=True)
+
+    def append(self, appended: pd.DataFrame, path: str) -> None:
+        appended.to_csv(path, mode='a', index=False, header=False)
+
+    def rows(self, path: str) -> int:
+        return len(pd.read_csv(path, header=0, usecols=[0]))
+
+    def open_writer(self, path: str) -> "CsvWriter":
+        return CsvWriter(path)
+
+
+class CsvWriter:
+    """
+    CSV table written chunk by chunk, the header being written with the first chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = AtomicFile(path, 'w', newline='')
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.file.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self) -> None:
+        self.file.commit()
+
+    def abort(self) -> None:
+        self.file.abort()
+
+
+class FeatherBackend:
+    """
+    Typed columnar tables (Arrow IPC), written uncompressed so that reads are memory-mapped.
+    """
+    extension = ".feather"
+
+    def read(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    def write(self, df: pd.DataFrame, path: str) -> None:
+        # Written atomically so that readers never see a partially written table
+        with atomic_write(path, 'wb') as f:
+            feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), f, compression="uncompressed")
+
+    def append(self, appended: pd.DataFrame, path: str) -> None:
+        # Arrow files cannot be appended to in place: the memory-mapped batches of the table are written again with
+        # the new rows, without converting them to pandas (columns are promoted like a concat, e.g. integers to floats)
+        table = pa.concat_tables([feather.read_table(path, memory_map=True),
+                                  pa.Table.from_pandas(appended, preserve_index=False)], promote_options="permissive")
+        with atomic_write(path, 'wb') as f:
+            feather.write_feather(table, f, compression="uncompressed")
+
+    def rows(self, path: str) -> int:
+        return feather.read_table(path, memory_map=True).num_rows
+
+    def open_writer(self, path: str) -> "FeatherWriter":
+        return FeatherWriter(path)
+
+
+class FeatherWriter:
+    """
+    Arrow IPC table written as a sequence of record batches, with the schema of the first chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.schema = None
+        self.file = None
+        self.writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.writer is None:
+            # A column without any value in the first chunk is typed by its next values as strings
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            self.schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                     for field in schema]).remove_metadata()
+            self.file = AtomicFile(self.path, 'wb')
+            self.writer = pa.ipc.new_file(self.file.file, self.schema)
+        # The next chunks are cast to the schema of the first one (e.g. integer weights to floats)
+        self.writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self) -> None:
+        if self.writer is None:
+            # Nothing was written, an empty table has no schema
+            raise ValueError(f"No rows were written to {self.path}")
+        self.writer.close()
+        self.file.commit()
+
+    def abort(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.file.abort()
+
+
+BACKENDS = {
+    "csv": CsvBackend(),
+    "feather": FeatherBackend(),
+}
+
+
+def _backend_path(path: str, backend) -> str:
+    # Tables are addressed by their CSV path, each backend stores them under its own extension
+    return f"{os.path.splitext(path)[0]}{backend.extension}"
+
+
+def table_version(path: str, backend: Optional[str] = None) -> tuple:
+    """
+    Modification time and size of each copy of a table, changing whenever one of them is rewritten.
+    """
+    storage = BACKENDS[backend or STORAGE_BACKEND]
+    version = []
+    for copy_path in dict.fromkeys((path, _backend_path(path, storage))):
+        if os.path.exists(copy_path):
+            stat = os.stat(copy_path)
+            version.append((copy_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+def _read_copy(path: str, backend: Optional[str]) -> tuple:
+    # The binary copy is used unless it is missing or older than the CSV file (e.g. edited by hand)
+    storage = BACKENDS[backend or STORAGE_BACKEND]
+    storage_path = _backend_path(path, storage)
+
+    if storage_path != path and os.path.exists(storage_path):
+        if not os.path.exists(path) or os.path.getmtime(storage_path) >= os.path.getmtime(path):
+            return storage, storage_path
+
+    return BACKENDS["csv"], path
+
+
+def read_table(path: str, columns: Optional[List[str]] = None, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a table, only loading the requested columns.
+    The binary copy is used unless it is missing or older than the CSV file (e.g. edited by hand).
+    """
+    storage, copy_path = _read_copy(path, backend)
+    return storage.read(copy_path, columns=columns)
+
+
+def table_rows(path: str, backend: Optional[str] = None) -> int:
+    """
+    Number of rows of a table, without loading it (only its first column for a CSV file).
+    """
+    storage, copy_path = _read_copy(path, backend)
+    return storage.rows(copy_path)
+
+
+def write_table(df: pd.DataFrame, path: str, backend: Optional[str] = None,
+                export_csv: Optional[bool] = None) -> None:
+    """
+    Write a table with the storage backend, and export it as CSV.
+    """
+    storage = BACKENDS[backend or STORAGE_BACKEND]
+    export_csv = EXPORT_CSV if export_csv is None else export_csv
+
+    # The CSV export is written first so that the binary copy is never older than it
+    if export_csv or storage.extension == ".csv":
+        BACKENDS["csv"].write(df, path)
+    if storage.extension != ".csv":
+        storage.write(df, _backend_path(path, storage))
+
+
+def append_table(appended: pd.DataFrame, path: str, backend: Optional[str] = None,
+                 export_csv: Optional[bool] = None) -> None:
+    """
+    Append rows to a previously written table, without loading it.
+    """
+    storage = BACKENDS[backend or STORAGE_BACKEND]
+    export_csv = EXPORT_CSV if export_csv is None else export_csv
+
+    # Only the new rows are appended to the CSV export
+    if export_csv or storage.extension == ".csv":
+        BACKENDS["csv"].append(appended, path)
+    if storage.extension != ".csv":
+        storage.append(appended, _backend_path(path, storage))
+
+
+class TableWriter:
+    """
+    Table written chunk by chunk with the storage backend, and exported as CSV, so that it never has to be held
+    in memory at once. The table is only replaced when the writer is closed, readers see the previous one until then.
+
+        with TableWriter(path) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path: str, backend: Optional[str] = None, export_csv: Optional[bool] = None):
+        storage = BACKENDS[backend or STORAGE_BACKEND]
+        export_csv = EXPORT_CSV if export_csv is None else export_csv
+
+        # The CSV export is closed first so that the binary copy is never older than it
+        self.writers = []
+        if export_csv or storage.extension == ".csv":
+            self.writers.append(BACKENDS["csv"].open_writer(path))
+        if storage.extension != ".csv":
+            self.writers.append(storage.open_writer(_backend_path(path, storage)))
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        for writer in self.writers:
+            writer.write(df)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        for writer in self.writers:
+            writer.close()
+
+    def abort(self) -> None:
+        for writer in self.writers:
+            writer.abort()
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # A failed write leaves the previous table in place
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
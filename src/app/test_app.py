@@ -3,6 +3,7 @@ from flask.testing import FlaskClient
 
 from .app import *
 from .jobs import *
+from .logger_config import flush_logs
 
 # Scheduler log file path
 scheduler_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/scheduler.log')
@@ -22,6 +23,9 @@ class TestApp(unittest.TestCase):
     def setUp(self):
         self.client = FlaskClient(app, response_wrapper=app.response_class)
 
+        # Write the pending log records
+        flush_logs()
+
         # Save the logs to memory
         with open(data_loading_log, 'r') as f:
             self.data_loading_log_content = f.read()
@@ -41,17 +45,28 @@ class TestApp(unittest.TestCase):
         data_ingestion_job()
 
         # Assert that the job completes successfully by checking the logs
+        flush_logs()
         with open(scheduler_log, 'r') as log_file:
             log_contents = log_file.read()
 
             # Check that the log file contains the expected message
             self.assertIn("Data ingestion job complete.", log_contents)
 
+    def test_data_ingestion_job_streaming(self):
+        # Run the data ingestion job by chunks
+        data_ingestion_job(streaming=True, chunk_rows=500)
+
+        # Assert that the job completes successfully by checking the logs
+        flush_logs()
+        with open(scheduler_log, 'r') as log_file:
+            self.assertIn("Data ingestion job complete.", log_file.read())
+
     def test_model_training_job(self):
         # Run the model training job
         model_training_job(max_models=2)
 
         # Assert that the job completes successfully by checking the logs
+        flush_logs()
         with open(scheduler_log, 'r') as log_file:
             log_contents = log_file.read()
 
@@ -66,6 +81,7 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
 
         # Assert that the job completes successfully by checking the logs
+        flush_logs()
         with open(data_loading_log, 'r') as log_file:
             log_contents = log_file.read()
 
@@ -80,13 +96,61 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
 
         # Assert that the job completes successfully by checking the logs
+        flush_logs()
         with open(data_loading_log, 'r') as log_file:
             log_contents = log_file.read()
 
             # Check that the log file contains the expected message
             self.assertIn("Filtered exercise data loaded.", log_contents)
 
+    def test_analytics_endpoint(self):
+        # Send a GET request to the /analytics endpoint
+        response = self.client.get('/analytics')
+
+        # Assert that the page links the shared plotly.js bundle
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/plotly.min.js', response.text)
+
+        # Assert that the bundle is served with a long cache lifetime
+        response = self.client.get('/plotly.min.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        response.close()
+
+    def test_api_workouts_endpoint(self):
+        # Send a GET request to the /api/workouts endpoint
+        response = self.client.get('/api/workouts?page_size=5&sort=DATE&order=desc')
+
+        # Assert that a single page of the workouts is returned
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.json['rows']), 5)
+
+        # Assert that invalid queries are rejected
+        self.assertEqual(self.client.get('/api/workouts?sort=UNKNOWN').status_code, 400)
+
+    def test_api_forecast_endpoint(self):
+        # Assert that invalid horizons and exercises without model are rejected
+        self.assertEqual(self.client.get('/api/forecast/Barbell Squat?weeks=0').status_code, 400)
+        response = self.client.get('/api/forecast/Unknown Exercise')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('error', response.json)
+
+    def test_athletes_endpoint(self):
+        # Send a GET request to the /api/athletes endpoint
+        response = self.client.get('/api/athletes')
+
+        # Assert that the default athlete is listed
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(DEFAULT_ATHLETE, response.json['athletes'])
+
+        # Assert that invalid and unknown athletes are rejected
+        self.assertEqual(self.client.get('/workouts?athlete=../models').status_code, 400)
+        self.assertEqual(self.client.get('/api/workouts?athlete=unknown_athlete').status_code, 404)
+
     def tearDown(self):
+        # Write the pending log records
+        flush_logs()
+
         # Restore the logs
         with open(data_loading_log, 'w') as f:
             f.write(self.data_loading_log_content)
@@ -0,0 +1,69 @@
+import unittest
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+from .data_analytics import generate_plots
+from .forecasters import RidgeTrendForecaster, forecaster_path
+from .logger_config import flush_logs
+
+# Data Analytics log file path
+data_analytics_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/data_analytics.log')
+
+
+class TestDataAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test data directory with the performance history of an exercise only
+        os.makedirs('test_data/current', exist_ok=True)
+        pd.DataFrame({'DATE': ['2022-01-01', '2022-01-08', '2022-01-15'],
+                      'EXERCISE': ['Exercise 1', 'Exercise 1', 'Exercise 1'],
+                      'PERF': [100.0, 110.0, 120.0]}).to_csv('test_data/current/workout_perf.csv', index=False)
+
+        # Create a test models directory with a model of the exercise, and a corrupted model
+        os.makedirs('test_models/current', exist_ok=True)
+        x = np.linspace(0, 1, 10)
+        forecaster = RidgeTrendForecaster()
+        forecaster.fit(x[:8], x[:8], x[8:], x[8:])
+        forecaster.save(forecaster_path('test_models', 'Exercise 1', 'ridge'))
+        open(forecaster_path('test_models', 'Exercise 2', 'ridge'), 'w').close()
+
+        # Create a test static directory
+        os.makedirs('test_static/plots/predicted_volume', exist_ok=True)
+
+        # Write the pending log records
+        flush_logs()
+
+        # Save the logs to memory
+        with open(data_analytics_log, 'r') as f:
+            self.data_analytics_log_content = f.read()
+
+    def tearDown(self):
+        # Delete test directories
+        for directory in ('test_data', 'test_models', 'test_static'):
+            shutil.rmtree(directory)
+
+        # Write the pending log records
+        flush_logs()
+
+        # Restore the logs
+        with open(data_analytics_log, 'w') as f:
+            f.write(self.data_analytics_log_content)
+
+    def test_generate_plots(self):
+        results = generate_plots(models_path='test_models', data_path='test_data', static_path='test_static',
+                                 n_weeks=4, max_workers=2)
+
+        # Assert that every plot is reported, in submission order
+        self.assertEqual([result.name for result in results],
+                         ['predicted_volume/Exercise 1', 'predicted_volume/Exercise 2', 'distribution_workout_types',
+                          'distribution_muscle_groups', 'weight_reps_over_time'])
+
+        # Assert that the failing plots (corrupted model, missing data) do not stop the others
+        self.assertEqual([result.plotted for result in results], [True, False, False, False, False])
+        self.assertTrue(os.path.exists('test_static/plots/predicted_volume/Exercise 1.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
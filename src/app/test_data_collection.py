@@ -1,8 +1,12 @@
 import unittest
 import pandas as pd
 import os
+import tempfile
 
-from .data_collection import collect_workout_data
+from .data_collection import (collect_workout_data, compute_workout_aggregates, fetch_exercise_data,
+                              filter_exercise_data, enrich_workout_data, aggregate_workout_data, stream_workout_data)
+from .storage import read_table
+from .logger_config import flush_logs
 
 # Data Collection log file path
 data_collection_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/data_collection.log')
@@ -21,6 +25,9 @@ class TestDataCollection(unittest.TestCase):
         # Save the test data to the test directory
         pd.DataFrame(self.workout_data).to_csv('test/workout_2024-01-01.csv', index=False)
 
+        # Write the pending log records
+        flush_logs()
+
         # Save the logs to memory
         with open(data_collection_log, 'r') as f:
             self.data_collection_log_content = f.read()
@@ -29,10 +36,16 @@ class TestDataCollection(unittest.TestCase):
         # Delete test data files
         os.remove('test/workout_2024-01-01.csv')
         os.remove('test/workout_data.csv')
+        for file in ('test/workout_data.feather', 'test/workout_2024-01-08.csv', 'test/workout_manifest.json'):
+            if os.path.exists(file):
+                os.remove(file)
 
         # Delete test data directory
         os.rmdir('test')
 
+        # Write the pending log records
+        flush_logs()
+
         # Restore the logs
         with open(data_collection_log, 'w') as f:
             f.write(self.data_collection_log_content)
@@ -51,6 +64,178 @@ class TestDataCollection(unittest.TestCase):
         pd.testing.assert_frame_equal(result1, expected_result)
         pd.testing.assert_frame_equal(result2, expected_result)
 
+    def test_collect_workout_data_incremental(self):
+        # The first incremental run ingests every file and writes the manifest
+        result1 = collect_workout_data(input_path='test', output_path='test', incremental=True)
+        pd.testing.assert_frame_equal(result1, pd.DataFrame(self.workout_data))
+        self.assertTrue(os.path.exists('test/workout_manifest.json'))
+
+        # A new week is appended to the current workout data
+        new_week = [{'DATE': '2022-01-08', 'WORKOUT': 'Workout 2', 'EXERCISE': 'Exercise 2'}]
+        pd.DataFrame(new_week).to_csv('test/workout_2024-01-08.csv', index=False)
+        result2 = collect_workout_data(input_path='test', output_path='test', incremental=True)
+        expected_result = pd.DataFrame(self.workout_data + new_week)
+        pd.testing.assert_frame_equal(result2, expected_result)
+        pd.testing.assert_frame_equal(pd.read_csv('test/workout_data.csv', header=0), expected_result)
+
+        # A changed week replaces only its own partition
+        changed_week = [{'DATE': '2022-01-02', 'WORKOUT': 'Workout 3', 'EXERCISE': 'Exercise 3'}]
+        pd.DataFrame(changed_week).to_csv('test/workout_2024-01-01.csv', index=False)
+        result3 = collect_workout_data(input_path='test', output_path='test', incremental=True)
+        expected_result = pd.DataFrame(changed_week + new_week)
+        pd.testing.assert_frame_equal(result3, expected_result)
+        pd.testing.assert_frame_equal(pd.read_csv('test/workout_data.csv', header=0), expected_result)
+
+        # A deleted week triggers a full rebuild
+        os.remove('test/workout_2024-01-08.csv')
+        result4 = collect_workout_data(input_path='test', output_path='test', incremental=True)
+        pd.testing.assert_frame_equal(result4, pd.DataFrame(changed_week))
+
+
+class TestDataAggregation(unittest.TestCase):
+
+    def test_compute_workout_aggregates(self):
+        # Define a known enriched input with two exercises on the same day
+        enriched_workouts = pd.DataFrame({'DATE': ['2022-01-01'] * 3, 'WORKOUT': ['Workout 1'] * 3,
+                                          'EXERCISE': ['Exercise 1', 'Exercise 1', 'Exercise 2'],
+                                          'SET': [1, 2, 1], 'NB_REPS': [10, 5, 8], 'WEIGHT': [40.0, 70.0, 20.0],
+                                          'Type': ['Strength'] * 3, 'BodyPart': ['Legs'] * 3,
+                                          'Equipment': ['Barbell'] * 3, 'Level': ['Intermediate'] * 3,
+                                          'Rating': [8.9] * 3})
+
+        # Call the function with the known input
+        workout_day_exercises, workout_days = compute_workout_aggregates(enriched_workouts)
+
+        # Assert that the average weight is weighted by the number of reps
+        self.assertEqual(list(workout_day_exercises['AVERAGE_WEIGHT']), [(40.0 * 10 + 70.0 * 5) / 15, 20.0])
+        self.assertEqual(list(workout_day_exercises['NB_SETS']), [2, 1])
+        self.assertEqual(list(workout_day_exercises.columns[-4:]),
+                         ['NB_SETS', 'AVERAGE_REPS', 'AVERAGE_WEIGHT', 'MAX_WEIGHT'])
+
+        # Assert that the day-level rollup counts the exercises and sets
+        self.assertEqual(workout_days.to_dict(orient='records'),
+                         [{'DATE': '2022-01-01', 'WORKOUT': 'Workout 1', 'NB_EXERCISES': 2, 'NB_SETS': 3}])
+
+    def test_compute_workout_aggregates_missing_weight(self):
+        # Define a known enriched input with a set of unknown weight, an exercise without any weight and a known one
+        enriched_workouts = pd.DataFrame({'DATE': ['2022-01-01'] * 6, 'WORKOUT': ['Workout 1'] * 6,
+                                          'EXERCISE': ['Exercise 1'] * 3 + ['Exercise 2'] + ['Exercise 3'] * 2,
+                                          'SET': [1, 2, 3, 1, 1, 2], 'NB_REPS': [10, 5, 8, 12, 8, 6],
+                                          'WEIGHT': [40.0, 70.0, None, None, 20.0, 30.0],
+                                          'Type': ['Strength'] * 6, 'BodyPart': ['Legs'] * 6,
+                                          'Equipment': ['Barbell'] * 6, 'Level': ['Intermediate'] * 6,
+                                          'Rating': [8.9] * 6})
+
+        workout_day_exercises, _ = compute_workout_aggregates(enriched_workouts)
+
+        # Assert that, like np.average, the average weight of an exercise with a set of unknown weight is unknown
+        self.assertTrue(workout_day_exercises['AVERAGE_WEIGHT'][:2].isna().all())
+        self.assertEqual(workout_day_exercises['AVERAGE_WEIGHT'][2], (20.0 * 8 + 30.0 * 6) / 14)
+        self.assertEqual(list(workout_day_exercises['AVERAGE_REPS']), [23 / 3, 12.0, 7.0])
+
+
+class TestStreamingIngestion(unittest.TestCase):
+
+    def setUp(self):
+        # Write two weeks of workouts, the second one spanning several chunks with a set of unknown weight,
+        # and an empty week
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp_dir.name, 'workouts')
+        os.makedirs(self.input_path)
+        weeks = {'workout_2024-01-07.csv': [('2024-01-01', 'Legs', 'Exercise 1', 3),
+                                            ('2024-01-03', 'Back', 'Exercise 2', 2)],
+                 'workout_2024-01-14.csv': [('2024-01-08', 'Legs', 'Exercise 1', 4),
+                                            ('2024-01-08', 'Legs', 'Exercise 3', 3),
+                                            ('2024-01-10', 'Back', 'Exercise 2', 3)],
+                 'workout_2024-01-21.csv': []}
+        for name, exercises in weeks.items():
+            rows = [{'DATE': date, 'WORKOUT': workout, 'EXERCISE': exercise, 'MUSCLE': workout, 'SET': s,
+                     'NB_REPS': 10 - s, 'WEIGHT': None if (date, exercise, s) == ('2024-01-08', 'Exercise 1', 2)
+                     else 20.0 + 5 * s}
+                    for date, workout, exercise, sets in exercises for s in range(1, sets + 1)]
+            pd.DataFrame(rows, columns=['DATE', 'WORKOUT', 'EXERCISE', 'MUSCLE', 'SET', 'NB_REPS', 'WEIGHT']) \
+                .to_csv(os.path.join(self.input_path, name), index=False)
+
+        # Catalog with an exercise listed twice and an exercise that is not in the workouts
+        catalog_path = os.path.join(self.tmp_dir.name, 'catalog.csv')
+        pd.DataFrame({'Title': ['Exercise 1', 'Exercise 2', 'Exercise 2', 'Exercise 4'],
+                      'Desc': ['Desc 1', 'Desc 2', 'Other desc 2', 'Desc 4'],
+                      'Type': ['Strength'] * 4, 'BodyPart': ['Legs', 'Lats', 'Lats', 'Chest'],
+                      'Equipment': ['Barbell'] * 4, 'Level': ['Intermediate'] * 4,
+                      'Rating': [8.9, 7.5, 7.5, None], 'RatingDesc': ['Average'] * 4}).to_csv(catalog_path)
+        self.exercises = fetch_exercise_data(file_path=catalog_path)
+
+        # Save the logs to memory
+        flush_logs()
+        with open(data_collection_log, 'r') as f:
+            self.data_collection_log_content = f.read()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+        # Restore the logs
+        flush_logs()
+        with open(data_collection_log, 'w') as f:
+            f.write(self.data_collection_log_content)
+
+    def test_stream_workout_data(self):
+        # Run the batch ingestion
+        batch_path = os.path.join(self.tmp_dir.name, 'batch')
+        os.makedirs(batch_path)
+        workout_data = collect_workout_data(input_path=self.input_path, output_path=batch_path)
+        filtered_exercises = filter_exercise_data(workout_data=workout_data, exercises=self.exercises,
+                                                  output_path=batch_path)
+        enriched_workouts = enrich_workout_data(workout_data=workout_data, filtered_exercises=filtered_exercises,
+                                                output_path=batch_path)
+        aggregate_workout_data(enriched_workouts=enriched_workouts, output_path=batch_path)
+
+        # Assert that each set is enriched once, with the first entry of an exercise listed twice
+        self.assertEqual(len(enriched_workouts), len(workout_data))
+        self.assertEqual(list(filtered_exercises['Desc']), ['Desc 1', 'Desc 2'])
+        self.assertTrue(enriched_workouts.loc[enriched_workouts['EXERCISE'] == 'Exercise 3', 'Type'].isna().all())
+
+        for chunk_rows in (2, 5, 1000):
+            # Run the streaming ingestion, with groups split across chunks
+            stream_path = os.path.join(self.tmp_dir.name, f'stream_{chunk_rows}')
+            os.makedirs(stream_path)
+            summary = stream_workout_data(input_path=self.input_path, exercises=self.exercises,
+                                          output_path=stream_path, chunk_rows=chunk_rows)
+            self.assertEqual(summary.rows, len(workout_data))
+
+            # Assert that the streamed tables match the batch ones
+            for table in ('workout_data', 'workout_exercises', 'enriched_workout_data', 'workout_day_exercises',
+                          'workout_days'):
+                pd.testing.assert_frame_equal(read_table(os.path.join(stream_path, f'{table}.csv')),
+                                              read_table(os.path.join(batch_path, f'{table}.csv')))
+
+            # Assert that the next incremental collection starts from the streamed data
+            pd.testing.assert_frame_equal(collect_workout_data(input_path=self.input_path, output_path=stream_path,
+                                                               incremental=True), workout_data)
+
+    def test_enrich_workout_data_aliases(self):
+        # Enrich the workouts with an exercise name aliased to a catalog title
+        workout_data = collect_workout_data(input_path=self.input_path, output_path=self.tmp_dir.name)
+        enriched_workouts = enrich_workout_data(workout_data=workout_data,
+                                                filtered_exercises=self.exercises.filter(['Exercise 1', 'Exercise 2']),
+                                                output_path=self.tmp_dir.name, aliases={'Exercise 3': 'Exercise 1'})
+
+        # Assert that the aliased sets get the attributes of their title, and keep their name
+        aliased = enriched_workouts[enriched_workouts['EXERCISE'] == 'Exercise 3']
+        self.assertEqual(len(aliased), 3)
+        self.assertEqual(list(aliased['BodyPart']), ['Legs'] * 3)
+
+    def test_stream_workout_data_out_of_order(self):
+        # A week whose dates are before the previous week cannot be aggregated by chunks
+        pd.read_csv(os.path.join(self.input_path, 'workout_2024-01-07.csv')) \
+            .to_csv(os.path.join(self.input_path, 'workout_2024-01-28.csv'), index=False)
+        output_path = os.path.join(self.tmp_dir.name, 'stream')
+        os.makedirs(output_path)
+        self.assertIsNone(stream_workout_data(input_path=self.input_path, exercises=self.exercises,
+                                              output_path=output_path, chunk_rows=2))
+
+        # Assert that no partial table was left behind
+        self.assertEqual(os.listdir(output_path), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,7 +2,8 @@ import unittest
 import os
 import pandas as pd
 
-from .data_loading import load_workout_data, load_filtered_exercise_data
+from .data_loading import load_workout_data, load_filtered_exercise_data, query_workout_data
+from .logger_config import flush_logs
 
 # Data Loading log file path
 data_loading_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/data_loading.log')
@@ -18,6 +19,9 @@ class TestDataLoading(unittest.TestCase):
         pd.DataFrame(workout_data).to_csv('workout_data.csv', index=False)
         pd.DataFrame(exercise_data).to_csv('workout_exercises.csv', index=False)
 
+        # Write the pending log records
+        flush_logs()
+
         # Save the logs to memory
         with open(data_loading_log, 'r') as f:
             self.data_loading_log_content = f.read()
@@ -27,6 +31,9 @@ class TestDataLoading(unittest.TestCase):
         os.remove('workout_data.csv')
         os.remove('workout_exercises.csv')
 
+        # Write the pending log records
+        flush_logs()
+
         # Restore the logs
         with open(data_loading_log, 'w') as f:
             f.write(self.data_loading_log_content)
@@ -57,6 +64,31 @@ class TestDataLoading(unittest.TestCase):
         # Assert that the result matches the expected result
         self.assertEqual(result, expected_result)
 
+    def test_query_workout_data(self):
+        # Create a workout history of several sessions
+        workout_data = pd.DataFrame({'DATE': ['2022-01-01', '2022-01-01', '2022-01-08', '2022-01-15'],
+                                     'WORKOUT': ['Legs', 'Legs', 'Push', 'Legs'],
+                                     'EXERCISE': ['Squat', 'Lunge', 'Bench Press', 'Squat'],
+                                     'WEIGHT': [50.0, None, 40.0, 60.0]})
+        workout_data.to_csv('workout_data.csv', index=False)
+
+        # Query the second page of the squats and lunges since the first session, heaviest first
+        result = query_workout_data(file_path='workout_data.csv', filters={'workout': 'legs'},
+                                    date_from='2022-01-01', sort='WEIGHT', order='desc', page=2, page_size=1)
+
+        # Assert that the rows are filtered, sorted and paginated
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(result['rows'], [{'DATE': '2022-01-01', 'WORKOUT': 'Legs', 'EXERCISE': 'Squat',
+                                           'WEIGHT': 50.0}])
+
+        # Assert that the cached table is reloaded when its file changes
+        workout_data.iloc[:1].to_csv('workout_data.csv', index=False)
+        self.assertEqual(query_workout_data(file_path='workout_data.csv', filters={})['total'], 1)
+
+        # Assert that invalid queries are rejected
+        with self.assertRaises(ValueError):
+            query_workout_data(file_path='workout_data.csv', filters={}, sort='UNKNOWN')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -18,6 +18,20 @@ def start_app():
     app.run()
 
 
+def read_log_until(log_path: str, text: str, timeout: float = 5.0) -> str:
+    """
+    Read a log file until it contains the text or the timeout expires: the app process writes its records
+    asynchronously, from its own listener thread.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with open(log_path, 'r') as f:
+            log_content = f.read()
+        if text in log_content or time.monotonic() > deadline:
+            return log_content
+        time.sleep(0.05)
+
+
 class TestApp(unittest.TestCase):
     def setUp(self):
         # Create a process for the Flask app
@@ -54,9 +68,7 @@ class TestApp(unittest.TestCase):
         self.assertEqual(self.driver.current_url, 'http://127.0.0.1:5000/workouts')
 
         # Check the logs
-        with open(data_loading_log, 'r') as f:
-            log_content = f.read()
-            self.assertIn('Workout data loaded.', log_content)
+        self.assertIn('Workout data loaded.', read_log_until(data_loading_log, 'Workout data loaded.'))
 
     def test_my_exercises_page(self):
         self.driver.get('http://127.0.0.1:5000/my-exercises')
@@ -66,9 +78,7 @@ class TestApp(unittest.TestCase):
         self.assertEqual(self.driver.current_url, 'http://127.0.0.1:5000/my-exercises')
 
         # Check the logs
-        with open(data_loading_log, 'r') as f:
-            log_content = f.read()
-            self.assertIn('Filtered exercise data loaded.', log_content)
+        self.assertIn('Filtered exercise data loaded.', read_log_until(data_loading_log, 'Filtered exercise data loaded.'))
 
     def test_analytics_page(self):
         self.driver.get('http://127.0.0.1:5000/analytics')
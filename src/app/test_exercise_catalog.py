@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+import time
+import pandas as pd
+
+from .exercise_catalog import catalog_cache, catalog_index_path, load_exercise_catalog
+from .logger_config import flush_logs
+
+# Data Collection log file path, where the compilations are logged
+data_collection_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/data_collection.log')
+
+
+class TestExerciseCatalog(unittest.TestCase):
+
+    def setUp(self):
+        # Write a test catalog, with an exercise listed twice
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.catalog_path = os.path.join(self.tmp_dir.name, 'catalog.csv')
+        self.catalog = pd.DataFrame({'Title': ['Exercise 1', 'Exercise 2', 'Exercise 2'],
+                                     'Desc': ['Desc 1', 'Desc 2', 'Other desc 2'],
+                                     'Type': ['Strength'] * 3, 'BodyPart': ['Legs', 'Lats', 'Lats'],
+                                     'Equipment': ['Barbell'] * 3, 'Level': ['Intermediate'] * 3,
+                                     'Rating': [8.9, 7.5, 7.5], 'RatingDesc': ['Average'] * 3})
+        self.catalog.to_csv(self.catalog_path)
+        catalog_cache.invalidate()
+
+        # Save the logs to memory
+        flush_logs()
+        with open(data_collection_log, 'r') as f:
+            self.data_collection_log_content = f.read()
+
+    def tearDown(self):
+        catalog_cache.invalidate()
+        self.tmp_dir.cleanup()
+
+        # Restore the logs
+        flush_logs()
+        with open(data_collection_log, 'w') as f:
+            f.write(self.data_collection_log_content)
+
+    def test_load_exercise_catalog(self):
+        catalog = load_exercise_catalog(self.catalog_path)
+        self.assertTrue(os.path.exists(os.path.join(catalog_index_path(self.catalog_path), 'index.json')))
+
+        # Assert that the attributes are looked up by title, the first entry of a title being kept
+        self.assertEqual(len(catalog), 2)
+        self.assertIn('Exercise 2', catalog)
+        self.assertEqual(catalog.get('Exercise 1'), {'Type': 'Strength', 'BodyPart': 'Legs', 'Equipment': 'Barbell',
+                                                     'Level': 'Intermediate', 'Rating': 8.9})
+        self.assertIsNone(catalog.get('Exercise 3'))
+
+        # Assert that the descriptions are only loaded when filtering, with the columns of the catalog
+        self.assertIsNone(catalog._descriptions)
+        pd.testing.assert_frame_equal(catalog.filter(['Exercise 2', 'Exercise 3']),
+                                      self.catalog.iloc[[1]].reset_index(drop=True))
+
+    def test_load_exercise_catalog_cached(self):
+        # Assert that the catalog is kept in memory while its file does not change
+        catalog = load_exercise_catalog(self.catalog_path)
+        self.assertIs(load_exercise_catalog(self.catalog_path), catalog)
+
+        # Assert that a new process reuses the compiled index of an unchanged file
+        index_mtime = os.path.getmtime(os.path.join(catalog_index_path(self.catalog_path), 'attributes.feather'))
+        catalog_cache.invalidate()
+        time.sleep(0.01)
+        os.utime(self.catalog_path)
+        self.assertEqual(len(load_exercise_catalog(self.catalog_path)), 2)
+        self.assertEqual(os.path.getmtime(os.path.join(catalog_index_path(self.catalog_path), 'attributes.feather')),
+                         index_mtime)
+
+        # Assert that a changed file is compiled again
+        self.catalog.iloc[:1].to_csv(self.catalog_path)
+        self.assertEqual(len(load_exercise_catalog(self.catalog_path)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+
+from .exercise_catalog import catalog_cache, load_exercise_catalog
+from .exercise_names import ExerciseResolver, NameIndex, normalize_name
+from .logger_config import flush_logs
+
+# Data Collection log file path, where the resolutions are logged
+data_collection_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/data_collection.log')
+
+# Exercise catalog path
+catalog_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data/kaggle/megaGymDataset.csv')
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex.build(['Lat Pulldown', 'Barbell Squat', 'Barbell Full Squat', 'Hammer Curls'])
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('Lat pull-down'), normalize_name('Lat Pulldown'))
+
+    def test_search(self):
+        # Assert that a spelling variant ranks its title first, with the same normalized name
+        candidates = self.index.search('Lat pull-down')
+        self.assertEqual(candidates[0].title, 'Lat Pulldown')
+        self.assertEqual(candidates[0].score, 1.0)
+
+        # Assert that the candidates are ranked by similarity and limited
+        candidates = self.index.search('Barbel squat', limit=2)
+        self.assertEqual([c.title for c in candidates], ['Barbell Squat', 'Barbell Full Squat'])
+        self.assertGreater(candidates[0].score, candidates[1].score)
+
+        # Assert that a name without any common n-gram has no candidate
+        self.assertEqual(self.index.search('xyz'), [])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.index.save(os.path.join(tmp_dir, 'names.npz'))
+            index = NameIndex.load(os.path.join(tmp_dir, 'names.npz'))
+        self.assertEqual(index.search('Hammer curl'), self.index.search('Hammer curl'))
+
+    def test_search_catalog_latency(self):
+        # Assert that a name is matched against the ~2.9k catalog titles in less than a millisecond
+        index = NameIndex.build(pd.read_csv(catalog_path, usecols=['Title'])['Title'].dropna().unique())
+        start = time.perf_counter()
+        for _ in range(100):
+            index.search('Incline dumbell bench press')
+        self.assertLess((time.perf_counter() - start) / 100, 1e-3)
+
+
+class TestExerciseResolver(unittest.TestCase):
+
+    def setUp(self):
+        # Write a test catalog and an alias table with a manual alias
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.catalog_path = os.path.join(self.tmp_dir.name, 'catalog.csv')
+        titles = ['Lat Pulldown', 'Barbell Squat', 'Barbell Full Squat', 'Hammer Curls']
+        pd.DataFrame({'Title': titles, 'Desc': ['Desc'] * 4, 'Type': ['Strength'] * 4,
+                      'BodyPart': ['Lats', 'Quadriceps', 'Quadriceps', 'Biceps'], 'Equipment': ['Cable'] * 4,
+                      'Level': ['Intermediate'] * 4, 'Rating': [8.0] * 4,
+                      'RatingDesc': ['Average'] * 4}).to_csv(self.catalog_path)
+        self.aliases_path = os.path.join(self.tmp_dir.name, 'aliases.json')
+        with open(self.aliases_path, 'w') as f:
+            json.dump({'Squats': {'title': 'Barbell Full Squat', 'source': 'manual'}}, f)
+        catalog_cache.invalidate()
+
+        # Save the logs to memory
+        flush_logs()
+        with open(data_collection_log, 'r') as f:
+            self.data_collection_log_content = f.read()
+
+    def tearDown(self):
+        catalog_cache.invalidate()
+        self.tmp_dir.cleanup()
+
+        # Restore the logs
+        flush_logs()
+        with open(data_collection_log, 'w') as f:
+            f.write(self.data_collection_log_content)
+
+    def test_resolve_all(self):
+        resolver = ExerciseResolver(catalog=load_exercise_catalog(self.catalog_path), aliases_path=self.aliases_path)
+        titles = resolver.resolve_all(['Lat Pulldown', 'Lat pull-down', 'Squats', 'Curl'])
+
+        # Assert that titles are kept, aliases are used first and the other names are resolved by the index
+        self.assertEqual(titles, {'Lat Pulldown': 'Lat Pulldown', 'Lat pull-down': 'Lat Pulldown',
+                                  'Squats': 'Barbell Full Squat', 'Curl': None})
+
+        # Assert that the names resolved by the index are persisted with their score
+        with open(self.aliases_path, 'r') as f:
+            aliases = json.load(f)
+        self.assertEqual(aliases['Lat pull-down'], {'title': 'Lat Pulldown', 'source': 'index', 'score': 1.0})
+        self.assertNotIn('Curl', aliases)
+
+
+if __name__ == '__main__':
+    unittest.main()
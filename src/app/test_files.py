@@ -0,0 +1,57 @@
+import unittest
+import hashlib
+import os
+import threading
+import shutil
+
+from .files import atomic_write, hash_file
+
+
+class TestFiles(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test directory
+        os.makedirs('test_files', exist_ok=True)
+
+    def tearDown(self):
+        # Delete test directory
+        shutil.rmtree('test_files')
+
+    def test_hash_file(self):
+        # Assert that a file larger than a block is hashed like its whole content
+        content = os.urandom((1 << 20) + 123)
+        with open('test_files/file.bin', 'wb') as f:
+            f.write(content)
+        self.assertEqual(hash_file('test_files/file.bin'), hashlib.sha256(content).hexdigest())
+
+    def test_atomic_write(self):
+        with atomic_write('test_files/file.txt') as f:
+            f.write('first')
+
+        # Assert that a failed write keeps the previous file, without temporary files left
+        with self.assertRaises(ValueError):
+            with atomic_write('test_files/file.txt') as f:
+                f.write('partial')
+                raise ValueError("Interrupted")
+        with open('test_files/file.txt') as f:
+            self.assertEqual(f.read(), 'first')
+        self.assertEqual(os.listdir('test_files'), ['file.txt'])
+
+        # Assert that concurrent writers of a same file do not mix their contents
+        def write(i):
+            with atomic_write('test_files/file.txt') as f:
+                for _ in range(1000):
+                    f.write(str(i))
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open('test_files/file.txt') as f:
+            self.assertIn(f.read(), [str(i) * 1000 for i in range(8)])
+        self.assertEqual(os.listdir('test_files'), ['file.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import unittest
+import os
+import shutil
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from .forecast_service import ForecastService, MicroBatcher
+from .forecasters import RidgeTrendForecaster, forecaster_path
+from .forecasting import forecast_exercises
+from .model_registry import ModelRegistry
+from .series_store import load_series_store
+
+
+class CountingModel:
+    """
+    Model doubling its inputs, recording the batches it predicts.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, x):
+        self.batches.append(np.array(x))
+        return 2 * x
+
+
+def save_ridge_model(models_path: str, exo: str, coefs: list) -> None:
+    RidgeTrendForecaster(coefs=np.array(coefs)).save(forecaster_path(models_path, exo, 'ridge'))
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def run_concurrently(self, batcher: MicroBatcher, predict, inputs: list) -> list:
+        # Request the predictions of all the inputs at the same time, from one thread each
+        outputs = [None] * len(inputs)
+        barrier = threading.Barrier(len(inputs))
+
+        def request(i):
+            barrier.wait()
+            try:
+                outputs[i] = batcher.predict('model', predict, inputs[i])
+            except Exception as e:
+                outputs[i] = e
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(inputs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outputs
+
+    def test_predict(self):
+        # Assert that concurrent requests are coalesced into a single prediction
+        batcher = MicroBatcher(window=0.5)
+        model = CountingModel()
+        inputs = [np.arange(n, dtype=np.float32) + 10 * n for n in range(1, 6)]
+        outputs = self.run_concurrently(batcher, model.predict, inputs)
+        self.assertEqual(len(model.batches), 1)
+        self.assertEqual(len(model.batches[0]), sum(len(x) for x in inputs))
+        self.assertEqual((batcher.requests, batcher.batches), (5, 1))
+
+        # Assert that each request receives the predictions of its own inputs
+        for x, y in zip(inputs, outputs):
+            np.testing.assert_array_equal(y, 2 * x)
+
+    def test_predict_max_rows(self):
+        # Assert that a full batch is run without waiting for the end of the window
+        batcher = MicroBatcher(window=10, max_rows=4)
+        model = CountingModel()
+        start = time.perf_counter()
+        outputs = self.run_concurrently(batcher, model.predict, [np.ones(2, dtype=np.float32)] * 4)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(len(model.batches), 2)
+        for y in outputs:
+            np.testing.assert_array_equal(y, [2, 2])
+
+    def test_predict_error(self):
+        # Assert that the error of a batch is raised in all its requests
+        def predict(x):
+            raise RuntimeError("prediction failed")
+
+        outputs = self.run_concurrently(MicroBatcher(window=0.5), predict, [np.ones(1)] * 3)
+        for output in outputs:
+            self.assertIsInstance(output, RuntimeError)
+
+
+class TestForecastService(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test data directory with the performances of two exercises
+        os.makedirs('test_data/current', exist_ok=True)
+        pd.DataFrame({'DATE': ['2022-01-01', '2022-01-08', '2022-01-15', '2022-01-01', '2022-01-15'],
+                      'EXERCISE': ['Exercise 1', 'Exercise 1', 'Exercise 1', 'Exercise 2', 'Exercise 2'],
+                      'PERF': [100.0, 110.0, 120.0, 50.0, 60.0]}).to_csv('test_data/current/workout_perf.csv',
+                                                                        index=False)
+
+        # Create a test models directory with a model for the first exercise and one without data
+        os.makedirs('test_models/current', exist_ok=True)
+        save_ridge_model('test_models', 'Exercise 1', [0.0, 1.0, 0.0])
+        save_ridge_model('test_models', 'Exercise 3', [0.0, 1.0, 0.0])
+
+        self.service = ForecastService(registry=ModelRegistry(), window=0.001)
+
+    def tearDown(self):
+        # Delete test data and models directories
+        shutil.rmtree('test_data')
+        shutil.rmtree('test_models')
+
+    def test_forecast(self):
+        # Assert that the forecast is the one of the pipeline
+        forecast = self.service.forecast(exo='Exercise 1', n_weeks=4, data_path='test_data', models_path='test_models')
+        expected = forecast_exercises(exercises=['Exercise 1'], series=load_series_store('test_data'),
+                                      models_path='test_models', n_weeks=4)['Exercise 1']
+        np.testing.assert_array_equal(forecast.dates, expected.dates)
+        np.testing.assert_allclose(forecast.perf, expected.perf, rtol=1e-6)
+
+        # Assert that the same forecast is then served by the cache, without prediction
+        self.assertIs(self.service.forecast(exo='Exercise 1', n_weeks=4, data_path='test_data',
+                                            models_path='test_models'), forecast)
+        self.assertEqual(self.service.stats(), {'requests': 1, 'batches': 1, 'cache_hits': 1, 'cache_misses': 1})
+
+        # Assert that another horizon is predicted
+        self.assertEqual(len(self.service.forecast(exo='Exercise 1', n_weeks=8, data_path='test_data',
+                                                   models_path='test_models').dates), 8)
+        self.assertEqual(self.service.stats()['batches'], 2)
+
+    def test_forecast_model_change(self):
+        forecast = self.service.forecast(exo='Exercise 1', n_weeks=4, data_path='test_data', models_path='test_models')
+
+        # Assert that a retrained model is used instead of the cached forecast
+        save_ridge_model('test_models', 'Exercise 1', [0.0, 2.0, 0.0])
+        retrained = self.service.forecast(exo='Exercise 1', n_weeks=4, data_path='test_data',
+                                          models_path='test_models')
+        self.assertFalse(np.allclose(retrained.perf, forecast.perf))
+        self.assertEqual(self.service.stats()['batches'], 2)
+
+        # Assert that the model of a newly trained exercise is served
+        with self.assertRaises(KeyError):
+            self.service.forecast(exo='Exercise 2', n_weeks=4, data_path='test_data', models_path='test_models')
+        save_ridge_model('test_models', 'Exercise 2', [0.0, 1.0, 0.0])
+        self.assertEqual(len(self.service.forecast(exo='Exercise 2', n_weeks=4, data_path='test_data',
+                                                   models_path='test_models').dates), 4)
+
+    def test_forecast_errors(self):
+        # Assert that exercises without model or data are rejected
+        with self.assertRaises(KeyError):
+            self.service.forecast(exo='Exercise 2', n_weeks=4, data_path='test_data', models_path='test_models')
+        with self.assertRaises(KeyError):
+            self.service.forecast(exo='Exercise 3', n_weeks=4, data_path='test_data', models_path='test_models')
+
+        # Assert that invalid horizons are rejected
+        for n_weeks in (0, 10000):
+            with self.assertRaises(ValueError):
+                self.service.forecast(exo='Exercise 1', n_weeks=n_weeks, data_path='test_data',
+                                      models_path='test_models')
+
+
+if __name__ == '__main__':
+    unittest.main()
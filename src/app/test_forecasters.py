@@ -0,0 +1,88 @@
+import unittest
+import os
+import shutil
+import numpy as np
+
+from .forecasters import (FORECASTERS, GlobalForecaster, forecaster_path, global_model_path, list_forecasters,
+                          load_forecaster)
+import json
+
+
+class TestForecasters(unittest.TestCase):
+
+    def setUp(self):
+        # Create a noisy linear trend, split into train and validation sets
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 1, 50)
+        y = 0.2 + 0.6 * x + rng.normal(0, 0.01, size=50)
+        self.x_train, self.y_train, self.x_val, self.y_val = x[:40], y[:40], x[40:], y[40:]
+
+        # Create a test models directory
+        os.makedirs('test_models/current', exist_ok=True)
+
+    def tearDown(self):
+        # Delete test models directory
+        shutil.rmtree('test_models')
+
+    def test_numpy_forecasters(self):
+        for backend in ('ridge', 'holt'):
+            forecaster = FORECASTERS[backend]()
+            history = forecaster.fit(self.x_train, self.y_train, self.x_val, self.y_val)
+
+            # Assert that the trend is learned
+            self.assertLess(history['val_loss'][-1], 1e-3, backend)
+
+            # Assert that a saved model predicts the same values once loaded
+            forecaster.save(forecaster_path('test_models', 'Exercise 1', backend))
+            loaded = load_forecaster(forecaster_path('test_models', 'Exercise 1', backend))
+            np.testing.assert_allclose(loaded.predict(self.x_val), forecaster.predict(self.x_val))
+            os.remove(forecaster_path('test_models', 'Exercise 1', backend))
+
+    def test_list_forecasters(self):
+        # Create model files of several backends, and an unrelated file
+        for exo, backend in (('Exercise 1', 'lstm'), ('Exercise 2', 'ridge'), ('Ex. 3', 'holt')):
+            open(forecaster_path('test_models', exo, backend), 'w').close()
+        open('test_models/current/Exercise 1.json', 'w').close()
+
+        # Assert that the exercises are parsed from the model files
+        self.assertEqual(sorted(list_forecasters('test_models')), ['Ex. 3', 'Exercise 1', 'Exercise 2'])
+
+    def test_list_forecasters_global(self):
+        # Create a global model of two exercises, and a per-exercise model of one of them
+        os.makedirs(os.path.dirname(global_model_path('test_models')))
+        with open(os.path.join(os.path.dirname(global_model_path('test_models')), 'index.json'), 'w') as f:
+            json.dump({"exercises": ['Exercise 1', 'Exercise 2']}, f)
+        open(global_model_path('test_models'), 'w').close()
+        open(forecaster_path('test_models', 'Exercise 2', 'ridge'), 'w').close()
+
+        # Assert that the per-exercise model takes precedence over the global model
+        models = list_forecasters('test_models')
+        self.assertEqual(models['Exercise 1'], global_model_path('test_models'))
+        self.assertEqual(models['Exercise 2'], forecaster_path('test_models', 'Exercise 2', 'ridge'))
+
+    def test_global_forecaster_save(self):
+        import tensorflow as tf
+
+        # Create a global model of two exercises
+        date_input = tf.keras.Input(shape=(1,))
+        exercise_input = tf.keras.Input(shape=(1,), dtype="int32")
+        embedding = tf.keras.layers.Flatten()(tf.keras.layers.Embedding(2, 2)(exercise_input))
+        output = tf.keras.layers.Dense(1)(tf.keras.layers.Concatenate()([date_input, embedding]))
+        forecaster = GlobalForecaster(model=tf.keras.Model(inputs=[date_input, exercise_input], outputs=output),
+                                      exercises=['Exercise 1', 'Exercise 2'])
+        global_dir = os.path.dirname(global_model_path('test_models'))
+        os.makedirs(global_dir)
+        forecaster.save(global_model_path('test_models'))
+        self.assertEqual(sorted(os.listdir(global_dir)), ['index.json', 'model.h5'])
+
+        # Assert that the exercises are loaded with the model, even if the index was replaced since
+        with open(os.path.join(global_dir, 'index.json'), 'w') as f:
+            json.dump({"exercises": ['Exercise 2', 'Exercise 1']}, f)
+        loaded = load_forecaster(global_model_path('test_models'))
+        self.assertEqual(loaded.exercises, ['Exercise 1', 'Exercise 2'])
+        np.testing.assert_allclose(loaded.predict(self.x_val, 'Exercise 2'),
+                                   forecaster.predict(self.x_val, 'Exercise 2'), rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from .forecasting import exercise_series, forecast_exercise
+from .series_store import SeriesStore
+
+
+class IdentityModel:
+    """
+    Model returning its (scaled) input dates, counting its calls.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, x):
+        self.calls += 1
+        return x
+
+
+class TestForecasting(unittest.TestCase):
+
+    def setUp(self):
+        # Create a performance history of two exercises
+        self.perf = pd.DataFrame({'DATE': ['2022-01-01', '2022-01-08', '2022-01-15', '2022-01-01'],
+                                  'EXERCISE': ['Exercise 1', 'Exercise 1', 'Exercise 1', 'Exercise 2'],
+                                  'PERF': [100.0, 110.0, 120.0, 50.0]})
+        self.series = SeriesStore.build(self.perf)
+
+    def test_exercise_series(self):
+        # Call the function with the known input
+        df_exo = exercise_series(exo='Exercise 1', series=self.series)
+
+        # Assert that the dates are converted to days since the first session
+        self.assertEqual(list(df_exo['DAYS']), [0.0, 7.0, 14.0])
+
+        # Assert that unknown exercises are rejected
+        with self.assertRaises(ValueError):
+            exercise_series(exo='Exercise 3', series=self.series)
+
+    def test_forecast_exercise(self):
+        # Forecast 3 weeks with a model predicting the scaled dates
+        model = IdentityModel()
+        forecast = forecast_exercise(model=model, df_exo=exercise_series(exo='Exercise 1', series=self.series),
+                                     n_weeks=3)
+
+        # Assert that all the horizons are predicted with a single call
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(list(forecast.dates), list(pd.to_datetime(['2022-01-15', '2022-01-22', '2022-01-29'])))
+
+        # Assert that the predictions are denormalized with the performance range
+        np.testing.assert_allclose(forecast.perf, [120.0, 130.0, 140.0], rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import shutil
+import pandas as pd
+
+from . import instrumentation
+from .instrumentation import instrumented, load_records, new_run, prometheus_metrics
+
+
+@instrumented(item="exo")
+def process(exo: str, rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'EXERCISE': [exo] * rows})
+
+
+@instrumented()
+def fail() -> bool:
+    raise ValueError("Failure")
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        # Record the runs in a test metrics directory
+        self.metrics_dir = instrumentation.metrics_dir
+        instrumentation.metrics_dir = 'test_metrics'
+        new_run(name="test")
+
+    def tearDown(self):
+        # Delete test metrics directory
+        instrumentation.metrics_dir = self.metrics_dir
+        shutil.rmtree('test_metrics', ignore_errors=True)
+
+    def test_instrumented(self):
+        # Call the instrumented functions
+        process(exo='Exercise 1', rows=3)
+        process(exo='Exercise 1', rows=0)
+        with self.assertRaises(ValueError):
+            fail()
+
+        # Assert that each call is recorded with its rows and outcome
+        records = load_records()
+        self.assertEqual([(record['stage'], record['item'], record['rows'], record['ok']) for record in records],
+                         [('process', 'Exercise 1', 3, True), ('process', 'Exercise 1', 0, False),
+                          ('fail', None, None, False)])
+        self.assertTrue(all(record['wall_seconds'] >= 0 and record['peak_rss_bytes'] > 0 for record in records))
+
+    def test_prometheus_metrics(self):
+        process(exo='Exercise "1"', rows=3)
+        fail_records = [{'stage': 'fail', 'item': None, 'wall_seconds': 1.5, 'ok': False}]
+
+        # Assert that the last call of each stage is exposed, with escaped labels
+        metrics = prometheus_metrics(load_records() + fail_records)
+        self.assertIn('workout_stage_rows{stage="process",item="Exercise \\"1\\""} 3', metrics)
+        self.assertIn('workout_stage_wall_seconds{stage="fail"} 1.5', metrics)
+        self.assertIn('workout_stage_failures{stage="fail"} 1', metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
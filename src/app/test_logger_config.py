@@ -0,0 +1,47 @@
+import unittest
+import logging
+import os
+
+from .logger_config import configure_logger, flush_logs, logs_dir
+
+
+class TestLoggerConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.log_paths = [os.path.join(logs_dir, f"test_logger_{name}.log") for name in ("a", "b")]
+
+    def tearDown(self):
+        # Delete the test log files
+        flush_logs()
+        for log_path in self.log_paths:
+            if os.path.exists(log_path):
+                os.remove(log_path)
+
+    def test_configure_logger_twice(self):
+        # Assert that configuring a logger again does not duplicate its handlers nor its records
+        configure_logger(name="test_logger_a")
+        logger = configure_logger(name="test_logger_a")
+        self.assertEqual(len(logger.handlers), 1)
+
+        logger.info("Logged once.")
+        flush_logs()
+        with open(self.log_paths[0], 'r') as f:
+            self.assertEqual(f.read().count("Logged once."), 1)
+
+    def test_log_routing(self):
+        # Assert that the records of each logger are written to its own file
+        configure_logger(name="test_logger_a").info("Record of a.")
+        configure_logger(name="test_logger_b", level=logging.WARNING).info("Record of b.")
+        configure_logger(name="test_logger_b").warning("Warning of b.")
+        flush_logs()
+
+        with open(self.log_paths[0], 'r') as f:
+            self.assertNotIn("of b", f.read())
+        with open(self.log_paths[1], 'r') as f:
+            log_contents = f.read()
+            self.assertIn("Warning of b.", log_contents)
+            self.assertIn("test_logger_b - WARNING", log_contents)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import os
+import shutil
+import time
+import numpy as np
+
+from .forecasters import LSTMForecaster, forecaster_path, load_forecaster
+from .lstm_engine import NumpyLSTM, lstm_bundle_path
+from .models_training import export_lstm_models
+from .logger_config import flush_logs
+
+# Models Training log file path, where the exports are logged
+models_training_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/models_training.log')
+
+
+def build_keras_model(timesteps: int = 1):
+    # Small model with the layers of the LSTM backend and random weights
+    import tensorflow as tf
+    from tensorflow.keras.layers import LSTM, Dense, Bidirectional, Dropout, Flatten
+
+    model = tf.keras.models.Sequential()
+    model.add(tf.keras.Input(shape=(timesteps, 1)))
+    for units in (6, 4):
+        model.add(Bidirectional(LSTM(units, return_sequences=True)))
+        model.add(Dropout(0.2))
+    model.add(Flatten())
+    model.add(Dense(1))
+    rng = np.random.default_rng(0)
+    model.set_weights([rng.normal(0, 0.5, weights.shape).astype(np.float32) for weights in model.get_weights()])
+    return model
+
+
+class TestLSTMEngine(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test models directory
+        os.makedirs('test_models/current', exist_ok=True)
+
+        # Write the pending log records
+        flush_logs()
+
+        # Save the logs to memory
+        with open(models_training_log, 'r') as f:
+            self.models_training_log_content = f.read()
+
+    def tearDown(self):
+        # Delete test models directory
+        shutil.rmtree('test_models')
+
+        # Write the pending log records
+        flush_logs()
+
+        # Restore the logs
+        with open(models_training_log, 'w') as f:
+            f.write(self.models_training_log_content)
+
+    def test_numpy_lstm(self):
+        # Assert that the NumPy engine predicts like Keras, on sequences of one and several timesteps
+        for timesteps in (1, 3):
+            model = build_keras_model(timesteps)
+            x = np.random.default_rng(1).random((7, timesteps, 1)).astype(np.float32)
+            np.testing.assert_allclose(NumpyLSTM.from_keras(model).predict_on_batch(x), model.predict_on_batch(x),
+                                       atol=1e-6)
+
+        # Assert that a saved engine predicts the same values once loaded
+        engine = NumpyLSTM.from_keras(model)
+        engine.save('test_models/engine.npz')
+        np.testing.assert_array_equal(NumpyLSTM.load('test_models/engine.npz').predict_on_batch(x),
+                                      engine.predict_on_batch(x))
+
+    def test_export_lstm_models(self):
+        model_path = forecaster_path('test_models', 'Exercise 1', 'lstm')
+        build_keras_model().save(model_path)
+        keras_forecaster = LSTMForecaster.load(model_path)
+
+        # Assert that the model is exported, and then run by the NumPy engine with the same predictions
+        self.assertTrue(export_lstm_models('test_models'))
+        self.assertTrue(os.path.exists(lstm_bundle_path(model_path)))
+        forecaster = load_forecaster(model_path)
+        self.assertIsInstance(forecaster.model, NumpyLSTM)
+        x = np.linspace(0, 1.5, 26)
+        np.testing.assert_allclose(forecaster.predict(x), keras_forecaster.predict(x), atol=1e-5)
+
+        # Assert that a stale export is not used
+        time.sleep(0.01)
+        os.utime(model_path)
+        self.assertNotIsInstance(load_forecaster(model_path).model, NumpyLSTM)
+
+        # Assert that the export of a removed model is removed
+        os.remove(model_path)
+        self.assertTrue(export_lstm_models('test_models'))
+        self.assertFalse(os.path.exists(lstm_bundle_path(model_path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
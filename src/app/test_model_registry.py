@@ -0,0 +1,76 @@
+import unittest
+import os
+import time
+
+from .model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        # Create test model files
+        self.files = ['model_1.h5', 'model_2.h5', 'model_3.h5']
+        for i, file in enumerate(self.files):
+            with open(file, 'w') as f:
+                f.write(f"weights {i}")
+
+        # Registry "loading" the content of the files, and counting the loads
+        self.loads = []
+
+        def loader(file_path):
+            self.loads.append(os.path.basename(file_path))
+            with open(file_path, 'r') as f:
+                return f.read()
+
+        self.registry = ModelRegistry(max_models=2, max_bytes=100, loader=loader, sizeof=len)
+
+    def tearDown(self):
+        # Delete test model files
+        for file in self.files:
+            os.remove(file)
+
+    def test_get_cached_model(self):
+        # Get the same model twice
+        self.assertEqual(self.registry.get('model_1.h5'), 'weights 0')
+        self.assertEqual(self.registry.get('model_1.h5'), 'weights 0')
+
+        # Assert that the model was loaded once
+        self.assertEqual(self.loads, ['model_1.h5'])
+        self.assertEqual(self.registry.stats()['hits'], 1)
+        self.assertEqual(self.registry.stats()['misses'], 1)
+
+    def test_lru_eviction(self):
+        # Get more models than the registry can hold
+        self.registry.get('model_1.h5')
+        self.registry.get('model_2.h5')
+        self.registry.get('model_1.h5')
+        self.registry.get('model_3.h5')
+
+        # Assert that the least recently used model was evicted
+        self.registry.get('model_1.h5')
+        self.registry.get('model_2.h5')
+        self.assertEqual(self.loads, ['model_1.h5', 'model_2.h5', 'model_3.h5', 'model_2.h5'])
+
+        # Assert that the memory limit is also enforced
+        self.registry.max_bytes = 9
+        self.registry.get('model_3.h5')
+        self.assertEqual(self.registry.stats()['models'], 1)
+
+    def test_reload_changed_model(self):
+        self.registry.get('model_1.h5')
+
+        # Touch the file without changing its content
+        time.sleep(0.01)
+        os.utime('model_1.h5')
+        self.registry.get('model_1.h5')
+        self.assertEqual(self.loads, ['model_1.h5'])
+
+        # Change the content of the file
+        with open('model_1.h5', 'w') as f:
+            f.write("new weights")
+        self.assertEqual(self.registry.get('model_1.h5'), 'new weights')
+        self.assertEqual(self.registry.stats()['reloads'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
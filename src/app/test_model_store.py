@@ -0,0 +1,156 @@
+import unittest
+import os
+import json
+import shutil
+import time
+
+from .model_store import ModelStore, model_key
+from .models_training import archive_models
+from .logger_config import flush_logs
+
+# Models Training log file path, where the archives are logged
+models_training_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/models_training.log')
+
+
+def write_file(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class TestModelStore(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test models directory with two exercises and a global model
+        write_file('test_models/current/Exercise 1.ridge.npz', b'ridge model 1' * 100)
+        write_file('test_models/current/Exercise 1.json', json.dumps({'metrics': {'val_loss': 0.1}}).encode())
+        write_file('test_models/current/Exercise 2.h5', b'lstm model 2' * 100)
+        write_file('test_models/current/Exercise 2.lstm.npz', b'lstm export 2' * 100)
+        write_file('test_models/current/_global/model.h5', b'global model' * 100)
+        write_file('test_models/current/_global/index.json', b'{"exercises": ["Exercise 3"]}')
+        write_file('test_models/current/_global/fingerprint.json', json.dumps({'metrics': {'val_loss': 0.2}}).encode())
+        self.store = ModelStore('test_models/versions')
+
+        # Write the pending log records
+        flush_logs()
+
+        # Save the logs to memory
+        with open(models_training_log, 'r') as f:
+            self.models_training_log_content = f.read()
+
+    def tearDown(self):
+        # Delete test models directory
+        shutil.rmtree('test_models')
+
+        # Write the pending log records
+        flush_logs()
+
+        # Restore the logs
+        with open(models_training_log, 'w') as f:
+            f.write(self.models_training_log_content)
+
+    def test_model_key(self):
+        # Assert that the files are grouped by exercise, and the files of the global model together
+        self.assertEqual(model_key('Exercise 1.ridge.npz'), 'Exercise 1')
+        self.assertEqual(model_key('Exercise 2.lstm.npz'), 'Exercise 2')
+        self.assertEqual(model_key('Exercise 2.json'), 'Exercise 2')
+        self.assertEqual(model_key('_global/index.json'), '_global')
+        self.assertIsNone(model_key('notes.txt'))
+
+    def test_commit(self):
+        # Assert that each file is stored once, with a manifest of the models and their metrics
+        commit = self.store.commit('test_models/current')
+        self.assertTrue(commit.created)
+        self.assertEqual((commit.files, commit.new_objects), (7, 7))
+        manifest = self.store.manifest(commit.version)
+        self.assertEqual(list(manifest['models']), ['Exercise 1', 'Exercise 2', '_global'])
+        self.assertEqual(manifest['models']['Exercise 1']['metrics']['val_loss'], 0.1)
+        self.assertEqual(manifest['models']['_global']['metrics']['val_loss'], 0.2)
+
+        # Assert that unchanged models do not create a new version
+        unchanged = self.store.commit('test_models/current')
+        self.assertFalse(unchanged.created)
+        self.assertEqual((unchanged.version, unchanged.new_objects), (commit.version, 0))
+
+        # Assert that only the changed model is stored by a new version
+        time.sleep(0.001)
+        write_file('test_models/current/Exercise 1.ridge.npz', b'retrained ridge model 1')
+        changed = self.store.commit('test_models/current')
+        self.assertTrue(changed.created)
+        self.assertEqual(changed.new_objects, 1)
+        self.assertEqual(self.store.versions(), [commit.version, changed.version])
+        self.assertEqual(self.store.diff(commit.version, changed.version),
+                         {'added': [], 'removed': [], 'changed': ['Exercise 1']})
+
+        # Assert that the models of the directory are compared without being stored
+        os.remove('test_models/current/Exercise 2.h5')
+        os.remove('test_models/current/Exercise 2.lstm.npz')
+        self.assertEqual(self.store.diff(changed.version, current_dir='test_models/current'),
+                         {'added': [], 'removed': ['Exercise 2'], 'changed': []})
+
+    def test_restore(self):
+        version = self.store.commit('test_models/current').version
+
+        # Assert that a single exercise is restored, without its files which are not in the version
+        write_file('test_models/current/Exercise 1.ridge.npz', b'retrained ridge model 1')
+        write_file('test_models/current/Exercise 1.holt.npz', b'holt model 1')
+        write_file('test_models/current/Exercise 2.h5', b'retrained lstm model 2')
+        self.assertEqual(self.store.restore(version, 'test_models/current', models=['Exercise 1']), 1)
+        self.assertEqual(read_file('test_models/current/Exercise 1.ridge.npz'), b'ridge model 1' * 100)
+        self.assertFalse(os.path.exists('test_models/current/Exercise 1.holt.npz'))
+        self.assertEqual(read_file('test_models/current/Exercise 2.h5'), b'retrained lstm model 2')
+
+        # Assert that a whole version is restored to an empty directory, the exports not older than their models
+        self.assertEqual(self.store.restore(version, 'test_models/restored'), 7)
+        self.assertEqual(read_file('test_models/restored/_global/model.h5'), b'global model' * 100)
+        self.assertGreaterEqual(os.path.getmtime('test_models/restored/Exercise 2.lstm.npz'),
+                                os.path.getmtime('test_models/restored/Exercise 2.h5'))
+
+        # Assert that unknown versions and exercises are rejected
+        with self.assertRaises(ValueError):
+            self.store.restore('unknown', 'test_models/current')
+        with self.assertRaises(ValueError):
+            self.store.restore(version, 'test_models/current', models=['Exercise 3'])
+
+    def test_gc(self):
+        versions = []
+        for i in range(3):
+            write_file('test_models/current/Exercise 1.ridge.npz', f'ridge model {i}'.encode())
+            versions.append(self.store.commit('test_models/current').version)
+            time.sleep(0.001)
+
+        # Make the versions old, and their objects older than the grace period
+        for version in versions:
+            manifest = self.store.manifest(version)
+            manifest['created_at'] = '2020-01-01T00:00:00'
+            with open(f'test_models/versions/manifests/{version}.json', 'w') as f:
+                json.dump(manifest, f)
+        for root, _, names in os.walk('test_models/versions/objects'):
+            for name in names:
+                os.utime(os.path.join(root, name), (0, 0))
+
+        # Assert that the versions out of the retention are removed, with the models only they reference
+        collected = self.store.gc(keep_last=2)
+        self.assertEqual(collected['removed_versions'], versions[:1])
+        self.assertEqual(collected['removed_objects'], 1)
+        self.assertEqual(self.store.versions(), versions[1:])
+
+        # Assert that the kept versions can still be restored
+        self.assertEqual(self.store.restore(versions[1], 'test_models/restored'), 7)
+        self.assertEqual(read_file('test_models/restored/Exercise 1.ridge.npz'), b'ridge model 1')
+
+    def test_archive_models(self):
+        # Assert that the models are archived to a version of the store
+        self.assertTrue(archive_models('test_models'))
+        self.assertEqual(len(self.store.versions()), 1)
+        self.assertTrue(archive_models('test_models'))
+        self.assertEqual(len(self.store.versions()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
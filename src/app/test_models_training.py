@@ -0,0 +1,103 @@
+import unittest
+import os
+import shutil
+import pandas as pd
+
+from .models_training import exercise_fingerprint, save_fingerprint, is_model_up_to_date, train_models
+from .series_store import SeriesStore
+from .logger_config import flush_logs
+
+# Models Training log file path, where the failed exercises are logged
+models_training_log = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs/models_training.log')
+
+
+class TestModelsTraining(unittest.TestCase):
+
+    def setUp(self):
+        # Create a performance history of two exercises
+        self.perf = pd.DataFrame({'DATE': ['2022-01-01', '2022-01-08', '2022-01-01'],
+                                  'EXERCISE': ['Exercise 1', 'Exercise 1', 'Exercise 2'],
+                                  'PERF': [100.0, 110.0, 50.0]})
+
+        # Create a test models directory with a model for the first exercise
+        os.makedirs('test_models/current', exist_ok=True)
+        open('test_models/current/Exercise 1.h5', 'w').close()
+
+        # Write the pending log records
+        flush_logs()
+
+        # Save the logs to memory
+        with open(models_training_log, 'r') as f:
+            self.models_training_log_content = f.read()
+
+    def tearDown(self):
+        # Delete test models and data directories
+        shutil.rmtree('test_models')
+        shutil.rmtree('test_data', ignore_errors=True)
+
+        # Write the pending log records
+        flush_logs()
+
+        # Restore the logs
+        with open(models_training_log, 'w') as f:
+            f.write(self.models_training_log_content)
+
+    def test_exercise_fingerprint(self):
+        fingerprint = exercise_fingerprint(exo='Exercise 1', series=SeriesStore.build(self.perf))
+
+        # Assert that the fingerprint only depends on the data of the exercise
+        other_perf = pd.concat([self.perf, pd.DataFrame({'DATE': ['2022-01-08'], 'EXERCISE': ['Exercise 2'],
+                                                         'PERF': [60.0]})], ignore_index=True)
+        self.assertEqual(fingerprint, exercise_fingerprint(exo='Exercise 1', series=SeriesStore.build(other_perf)))
+
+        # Assert that a new session of the exercise changes the fingerprint of its data
+        new_perf = pd.concat([self.perf, pd.DataFrame({'DATE': ['2022-01-15'], 'EXERCISE': ['Exercise 1'],
+                                                       'PERF': [120.0]})], ignore_index=True)
+        self.assertNotEqual(fingerprint['data'],
+                            exercise_fingerprint(exo='Exercise 1', series=SeriesStore.build(new_perf))['data'])
+
+    def test_is_model_up_to_date(self):
+        fingerprint = exercise_fingerprint(exo='Exercise 1', series=SeriesStore.build(self.perf))
+
+        # A model without a stored fingerprint must be trained
+        self.assertFalse(is_model_up_to_date(exo='Exercise 1', fingerprint=fingerprint, models_dir='test_models'))
+
+        # A model with the same fingerprint is up to date, once its loss is plotted
+        save_fingerprint(exo='Exercise 1', fingerprint=fingerprint, metrics={}, models_dir='test_models')
+        self.assertFalse(is_model_up_to_date(exo='Exercise 1', fingerprint=fingerprint, models_dir='test_models'))
+        os.makedirs('test_models/loss', exist_ok=True)
+        open('test_models/loss/Exercise 1.png', 'w').close()
+        self.assertTrue(is_model_up_to_date(exo='Exercise 1', fingerprint=fingerprint, models_dir='test_models'))
+
+        # A change of hyperparameters requires a new training
+        changed_fingerprint = {**fingerprint, 'params': {**fingerprint['params'], 'epochs': 1}}
+        self.assertFalse(is_model_up_to_date(exo='Exercise 1', fingerprint=changed_fingerprint,
+                                             models_dir='test_models'))
+
+    def test_train_models_parallel_failure(self):
+        # Create a workout history of two exercises, with 10 sessions of 3 sets each
+        os.makedirs('test_data/current', exist_ok=True)
+        os.makedirs('test_models/loss', exist_ok=True)
+        dates = pd.date_range('2022-01-01', periods=10, freq='7D').strftime('%Y-%m-%d')
+        pd.DataFrame([{'DATE': date, 'EXERCISE': exo, 'SET': s, 'NB_REPS': 10, 'WEIGHT': 50.0 + i + s}
+                      for exo in ['Exercise 1', 'Exercise 2'] for i, date in enumerate(dates) for s in range(1, 4)]
+                     ).to_csv('test_data/current/workout_data.csv', index=False)
+
+        # Make the model of the second exercise impossible to save, so that its worker fails
+        os.makedirs('test_models/current/Exercise 2.ridge.npz')
+
+        # Assert that the failing exercise is skipped while the other one is still trained
+        self.assertTrue(train_models(max_models=None, min_exo_occurrence=1, data_path='test_data',
+                                     models_dir='test_models', n_workers=2, backend='ridge'))
+        self.assertTrue(os.path.isfile('test_models/current/Exercise 1.ridge.npz'))
+        self.assertTrue(os.path.exists('test_models/current/Exercise 1.json'))
+        self.assertFalse(os.path.exists('test_models/current/Exercise 2.json'))
+
+        # Assert that the failure is logged
+        flush_logs()
+        with open(models_training_log, 'r') as f:
+            self.assertIn("Models could not be trained for 1 exercise(s): ['Exercise 2']", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
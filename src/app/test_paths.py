@@ -0,0 +1,52 @@
+import unittest
+import os
+import shutil
+
+from .paths import DEFAULT_ATHLETE, athlete_paths, check_athlete, create_athlete_dirs, list_athletes
+
+
+class TestPaths(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test data directory with the workouts of the default athlete and of another athlete
+        os.makedirs('test_paths/data/workouts', exist_ok=True)
+        os.makedirs('test_paths/data/athletes/alice/workouts', exist_ok=True)
+        os.makedirs('test_paths/data/athletes/bob', exist_ok=True)
+
+    def tearDown(self):
+        # Delete test paths directory
+        shutil.rmtree('test_paths')
+
+    def test_athlete_paths(self):
+        # Assert that the default athlete uses the root directories
+        paths = athlete_paths(DEFAULT_ATHLETE, data_dir='data', models_dir='models', static_dir='static')
+        self.assertEqual((paths.data_dir, paths.models_dir, paths.static_dir), ('data', 'models', 'static'))
+
+        # Assert that the other athletes use their own partition
+        paths = athlete_paths('alice', data_dir='data', models_dir='models', static_dir='static')
+        self.assertEqual(paths.data_dir, os.path.join('data', 'athletes', 'alice'))
+        self.assertEqual(paths.static_dir, os.path.join('static', 'athletes', 'alice'))
+
+    def test_check_athlete(self):
+        # Assert that names escaping the partitions are rejected
+        self.assertEqual(check_athlete('athlete_1'), 'athlete_1')
+        for athlete in ('', '..', '../alice', 'a/b'):
+            with self.assertRaises(ValueError):
+                check_athlete(athlete)
+
+    def test_list_athletes(self):
+        # Assert that only the athletes with workouts are listed, the default athlete first
+        self.assertEqual(list_athletes('test_paths/data'), [DEFAULT_ATHLETE, 'alice'])
+
+    def test_create_athlete_dirs(self):
+        # Assert that the output directories of the partition are created
+        paths = athlete_paths('alice', data_dir='test_paths/data', models_dir='test_paths/models',
+                              static_dir='test_paths/static')
+        create_athlete_dirs(paths)
+        self.assertTrue(os.path.isdir('test_paths/data/athletes/alice/current'))
+        self.assertTrue(os.path.isdir('test_paths/models/athletes/alice/versions'))
+        self.assertTrue(os.path.isdir('test_paths/static/athletes/alice/plots/predicted_volume'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import shutil
+
+from .pipeline import Node, Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test pipeline directory with an input file
+        os.makedirs('test_pipeline', exist_ok=True)
+        with open('test_pipeline/input.txt', 'w') as f:
+            f.write('1')
+        self.calls = []
+        self.fail = set()
+
+    def tearDown(self):
+        # Delete test pipeline directory
+        shutil.rmtree('test_pipeline')
+
+    def copy_node(self, name, input_path, output_path):
+        # Node copying its input file to its output file
+        def copy():
+            self.calls.append(name)
+            if name in self.fail:
+                return False
+            shutil.copy(input_path, output_path)
+            return True
+        return Node(name=name, func=copy, inputs=[input_path], outputs=[output_path])
+
+    def pipeline(self):
+        # Diamond of nodes: a -> (b, c) -> d, with c independent of b
+        return Pipeline(nodes=[self.copy_node('d', 'test_pipeline/b.txt', 'test_pipeline/d.txt'),
+                               self.copy_node('b', 'test_pipeline/a.txt', 'test_pipeline/b.txt'),
+                               self.copy_node('a', 'test_pipeline/input.txt', 'test_pipeline/a.txt'),
+                               self.copy_node('c', 'test_pipeline/a.txt', 'test_pipeline/c.txt')],
+                        state_path='test_pipeline/state.json')
+
+    def test_run_pipeline(self):
+        # Assert that the nodes run after the nodes writing their inputs
+        results = self.pipeline().run(max_workers=2)
+        self.assertEqual({result.name: result.status for result in results},
+                         {'a': 'done', 'b': 'done', 'c': 'done', 'd': 'done'})
+        self.assertEqual(self.calls[0], 'a')
+        self.assertLess(self.calls.index('b'), self.calls.index('d'))
+
+        # Assert that the nodes are skipped when nothing changed
+        self.calls.clear()
+        self.pipeline().run()
+        self.assertEqual(self.calls, [])
+
+        # Assert that the nodes downstream of a changed input are run again
+        with open('test_pipeline/input.txt', 'w') as f:
+            f.write('2')
+        self.pipeline().run()
+        self.assertEqual(sorted(self.calls), ['a', 'b', 'c', 'd'])
+
+    def test_run_pipeline_failure(self):
+        # Assert that a failed node blocks its downstream nodes but not the independent ones
+        self.fail.add('b')
+        results = self.pipeline().run()
+        self.assertEqual({result.name: result.status for result in results},
+                         {'a': 'done', 'b': 'failed', 'c': 'done', 'd': 'blocked'})
+
+        # Assert that the next run resumes from the failed node
+        self.fail.clear()
+        self.calls.clear()
+        self.pipeline().run()
+        self.assertEqual(self.calls, ['b', 'd'])
+
+    def test_run_pipeline_deleted_output(self):
+        # Node writing a file in its output directory
+        def write():
+            self.calls.append('write')
+            os.makedirs('test_pipeline/out', exist_ok=True)
+            shutil.copy('test_pipeline/input.txt', 'test_pipeline/out/output.txt')
+            return True
+
+        def pipeline():
+            return Pipeline(nodes=[Node(name='write', func=write, inputs=['test_pipeline/input.txt'],
+                                        outputs=['test_pipeline/out'])],
+                            state_path='test_pipeline/state.json')
+
+        pipeline().run()
+        pipeline().run()
+        self.assertEqual(self.calls, ['write'])
+
+        # Assert that the node is run again when a file of its output directory is deleted
+        os.remove('test_pipeline/out/output.txt')
+        pipeline().run()
+        self.assertEqual(self.calls, ['write', 'write'])
+        self.assertTrue(os.path.exists('test_pipeline/out/output.txt'))
+
+    def test_pipeline_cycle(self):
+        # Assert that cyclic dependencies are rejected
+        with self.assertRaises(ValueError):
+            Pipeline(nodes=[self.copy_node('a', 'test_pipeline/b.txt', 'test_pipeline/a.txt'),
+                            self.copy_node('b', 'test_pipeline/a.txt', 'test_pipeline/b.txt')],
+                     state_path='test_pipeline/state.json')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+from .series_store import SeriesStore, load_series_store, series_store_path
+
+
+class TestSeriesStore(unittest.TestCase):
+
+    def setUp(self):
+        # Create a performance history of two interleaved exercises
+        self.perf = pd.DataFrame({'DATE': ['2022-01-01', '2022-01-01', '2022-01-08', '2022-01-15', '2022-01-15'],
+                                  'EXERCISE': ['Exercise 2', 'Exercise 1', 'Exercise 1', 'Exercise 2', 'Exercise 1'],
+                                  'PERF': [50.0, 100.0, 110.0, 60.0, 120.0]})
+        self.series = SeriesStore.build(self.perf)
+
+        # Create a test data directory
+        os.makedirs('test_data/current', exist_ok=True)
+
+    def tearDown(self):
+        # Delete test data directory
+        shutil.rmtree('test_data')
+
+    def test_build(self):
+        # Assert that the rows of each exercise are contiguous, in their original order
+        self.assertEqual(self.series.exercises, ['Exercise 1', 'Exercise 2'])
+        self.assertEqual(list(self.series.offsets), [0, 3, 5])
+        self.assertEqual(self.series.bounds('Exercise 2'), slice(3, 5))
+
+        # Assert that the days are counted from the first session of each exercise
+        df_exo = self.series.frame('Exercise 1')
+        self.assertEqual(list(df_exo['DAYS']), [0.0, 7.0, 14.0])
+        self.assertEqual(list(df_exo['PERF']), [100.0, 110.0, 120.0])
+        self.assertEqual(list(self.series.frame('Exercise 2')['DAYS']), [0.0, 14.0])
+
+        # Assert that unknown exercises are rejected
+        self.assertNotIn('Exercise 3', self.series)
+        with self.assertRaises(ValueError):
+            self.series.frame('Exercise 3')
+
+    def test_subset(self):
+        subset = self.series.subset(['Exercise 2'])
+
+        # Assert that the subset only holds the series of its exercises
+        self.assertEqual(subset.exercises, ['Exercise 2'])
+        pd.testing.assert_frame_equal(subset.frame('Exercise 2'), self.series.frame('Exercise 2'))
+
+    def test_load_series_store(self):
+        self.perf.to_csv('test_data/current/workout_perf.csv', index=False)
+
+        # Assert that the store is built from the performance table when it was not saved
+        self.assertEqual(load_series_store('test_data').exercises, ['Exercise 1', 'Exercise 2'])
+
+        # Assert that the saved store is used, unless the performance table is newer
+        self.series.subset(['Exercise 1']).save(series_store_path('test_data'))
+        self.assertEqual(load_series_store('test_data').exercises, ['Exercise 1'])
+        time.sleep(0.01)
+        self.perf.to_csv('test_data/current/workout_perf.csv', index=False)
+        self.assertEqual(load_series_store('test_data').exercises, ['Exercise 1', 'Exercise 2'])
+
+        # Assert that the saved store keeps the arrays of the series
+        self.series.save(series_store_path('test_data'))
+        loaded = load_series_store('test_data')
+        np.testing.assert_array_equal(loaded.dates, self.series.dates)
+        pd.testing.assert_frame_equal(loaded.frame('Exercise 1'), self.series.frame('Exercise 1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import glob
+import os
+import time
+import pandas as pd
+
+from .storage import read_table, write_table, append_table, table_rows, TableWriter
+
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        # Create a test table
+        self.table = pd.DataFrame({'DATE': ['2022-01-01', '2022-01-02'],
+                                   'EXERCISE': ['Exercise 1', 'Exercise 2'],
+                                   'NB_REPS': [10, 8],
+                                   'WEIGHT': [40.0, None]})
+
+    def tearDown(self):
+        # Delete test data files
+        for file in ('table.csv', 'table.feather'):
+            if os.path.exists(file):
+                os.remove(file)
+
+    def test_write_and_read_table(self):
+        # Write the table with the binary backend and its CSV export
+        write_table(self.table, 'table.csv')
+        self.assertTrue(os.path.exists('table.feather'))
+
+        # Assert that both copies hold the same data
+        pd.testing.assert_frame_equal(read_table('table.csv'), self.table)
+        pd.testing.assert_frame_equal(pd.read_csv('table.csv', header=0), self.table)
+
+        # Assert that only the requested columns are read, in the requested order
+        pd.testing.assert_frame_equal(read_table('table.csv', columns=['WEIGHT', 'DATE']),
+                                      self.table[['WEIGHT', 'DATE']])
+
+    def test_append_table(self):
+        # Write the first row then append the second one
+        write_table(self.table.iloc[:1], 'table.csv')
+        append_table(self.table.iloc[1:], 'table.csv')
+
+        # Assert that both copies hold the full table
+        pd.testing.assert_frame_equal(read_table('table.csv'), self.table)
+        pd.testing.assert_frame_equal(pd.read_csv('table.csv', header=0), self.table)
+        self.assertEqual(table_rows('table.csv'), len(self.table))
+
+        # Assert that the rows of the CSV backend are appended without rewriting the previous ones
+        write_table(self.table.iloc[:1], 'table.csv', backend='csv')
+        append_table(self.table.iloc[1:], 'table.csv', backend='csv')
+        pd.testing.assert_frame_equal(read_table('table.csv', backend='csv'), self.table)
+        self.assertEqual(table_rows('table.csv', backend='csv'), len(self.table))
+
+    def test_read_table_edited_csv(self):
+        # Write the table then edit its CSV export by hand
+        write_table(self.table, 'table.csv')
+        time.sleep(0.01)
+        self.table.iloc[:1].to_csv('table.csv', index=False)
+
+        # Assert that the newer CSV file is read instead of the stale binary copy
+        pd.testing.assert_frame_equal(read_table('table.csv'), self.table.iloc[:1])
+
+    def test_table_writer(self):
+        # Write the table row by row, the second weight being missing
+        with TableWriter('table.csv') as writer:
+            writer.write(self.table.iloc[:1])
+            writer.write(self.table.iloc[1:])
+        self.assertEqual(writer.rows, 2)
+
+        # Assert that both copies hold the full table
+        pd.testing.assert_frame_equal(read_table('table.csv'), self.table)
+        pd.testing.assert_frame_equal(pd.read_csv('table.csv', header=0), self.table)
+
+        # Assert that a failed write keeps the previous table
+        with self.assertRaises(ValueError):
+            with TableWriter('table.csv') as writer:
+                writer.write(self.table.iloc[:1])
+                raise ValueError("Interrupted")
+        pd.testing.assert_frame_equal(read_table('table.csv'), self.table)
+        self.assertEqual(glob.glob('table.*.tmp'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,26 @@
 import multiprocessing
-import schedule
 import time
 
-from app.app import *
-from app.jobs import *
+from app.logger_config import start_log_listener, use_log_queue
 
+# Each process only imports what it runs: the web app never loads the jobs modules and their ML stack,
+# and the scheduler only loads them when a job runs
+
+
+def start_flask_app(log_queue):
+    # Send the logs to the listener of the main process
+    use_log_queue(log_queue)
+    from app.app import app
 
-def start_flask_app():
     app.run(port=5000)
 
 
-def start_scheduler():
+def start_scheduler(log_queue):
+    # Send the logs to the listener of the main process
+    use_log_queue(log_queue)
+    import schedule
+    from app.jobs import data_pipeline_stage
+
     # Schedule the data pipeline stage to run every Monday at 00:00
     schedule.every().monday.at("00:00").do(data_pipeline_stage)
 
@@ -21,9 +31,12 @@ def start_scheduler():
 
 
 if __name__ == '__main__':
+    # Write the logs of both processes from a single listener, so that their records do not interleave
+    log_queue = start_log_listener(multiprocessing.Queue())
+
     # Create processes
-    flask_process = multiprocessing.Process(target=start_flask_app)
-    scheduler_process = multiprocessing.Process(target=start_scheduler)
+    flask_process = multiprocessing.Process(target=start_flask_app, args=(log_queue,))
+    scheduler_process = multiprocessing.Process(target=start_scheduler, args=(log_queue,))
 
     # Start processes
     flask_process.start()